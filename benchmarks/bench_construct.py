@@ -0,0 +1,76 @@
+"""
+Widget construction benchmark.
+
+Measures how many widgets per second can be constructed: every widget class
+on its own, with and without custom styles, and the large synthetic trees
+from benchmarks/trees.py. Save a run with --output and compare a later run
+(for example after changing the widget constructors) with --compare.
+
+Usage:
+    python benchmarks/bench_construct.py --output before.json
+    python benchmarks/bench_construct.py --compare before.json
+"""
+import argparse
+import json
+
+from bench_render import _time
+from trees import MIXES, build_tree, count_widgets
+
+from butterflask import Button, Card, Center, Column, Image, Page, Row, Text
+
+BATCH = 1000
+
+WIDGETS = {
+    'Row': lambda index: Row(horizontal='space-between'),
+    'Column': lambda index: Column(),
+    'Card': lambda index: Card(),
+    'Center': lambda index: Center(None),
+    'Page': lambda index: Page(),
+    'Button': lambda index: Button(f'Button {index}', id=f'button-{index}'),
+    'Image': lambda index: Image(f'/static/img/{index}.png', alt=f'Image {index}'),
+    'Text': lambda index: Text(f'Item {index}'),
+    'Button+style': lambda index: Button(f'Button {index}', style={'margin': '4px'}),
+    'Row+style': lambda index: Row(style={'gap': '8px'}),
+    'Text+style': lambda index: Text(f'Item {index}', style={'color': '#333'}),
+}
+
+TREES = {'balanced': (8, 4), 'wide': (400, 2)}
+
+
+def run(repeat):
+    results = {}
+    for name, build in WIDGETS.items():
+        seconds = _time(lambda: [build(index) for index in range(BATCH)], repeat)
+        results[name] = BATCH / seconds
+    for shape, (width, depth) in TREES.items():
+        for mix in MIXES:
+            widgets = count_widgets(build_tree(width, depth, mix))
+            seconds = _time(lambda: build_tree(width, depth, mix), repeat)
+            results[f'{shape}/{mix} ({widgets})'] = widgets / seconds
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=7)
+    parser.add_argument('--output', help='write the results to this JSON file')
+    parser.add_argument('--compare', help='a previous JSON result file to compare against')
+    args = parser.parse_args()
+
+    results = run(args.repeat)
+    baseline = {}
+    if args.compare:
+        with open(args.compare) as baseline_file:
+            baseline = json.load(baseline_file)
+    for name, rate in results.items():
+        line = f'{name:<24} {rate:12,.0f} widgets/s'
+        if name in baseline:
+            line += f'  (before {baseline[name]:12,.0f}, {rate / baseline[name]:5.2f}x)'
+        print(line)
+    if args.output:
+        with open(args.output, 'w') as output:
+            json.dump(results, output, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+"""
+Document builder benchmark.
+
+Writes a stylesheet with a rule for every section of a long page to a
+temporary static directory, then renders the page with render_document
+and with a DocumentBuilder. Prints the bytes a browser downloads before the
+first content can paint (the HTML before it and the render-blocking
+resources), the critical CSS size and the render times.
+
+jQuery comes from a CDN; its size is taken from --jquery-bytes, roughly
+its compressed transfer size.
+
+Usage:
+    python benchmarks/bench_document_builder.py [--sections 40] [--rules 20] [--jquery-bytes 30000]
+"""
+import argparse
+import os
+import tempfile
+
+from bench_render import _time
+
+from butterflask import Column, DocumentBuilder, Image, Page, Row, Text, render_document
+from butterflask.document import JQUERY_URL, render_with_js
+from butterflask.document_builder import first_content_metrics
+
+
+def write_stylesheet(path, sections, rules):
+    lines = [
+        '@font-face { font-family: "Lato"; src: url(fonts/lato.woff2) format("woff2"); }',
+        'html, body { margin: 0; color: #222; }',
+    ]
+    for section in range(sections):
+        for rule in range(rules):
+            lines.append(f'.section-{section} .item-{rule} {{ padding: {rule}px; margin: 0 auto; color: #{rule:03x}; }}')
+        lines.append(f'@media (max-width: 600px) {{ .section-{section} {{ padding: 0; }} }}')
+    with open(path, 'w') as stylesheet:
+        stylesheet.write('\n'.join(lines))
+
+
+def build_page(sections, rules):
+    return Column(children=[
+        Page(classes=[f'section-{section}'], children=[
+            Text(f'Section {section}', classes='item-0'),
+            Image(f'/static/photo-{section}.jpg', alt=''),
+            Row(children=[Text(f'Item {rule}', classes=f'item-{rule}') for rule in range(rules)]),
+        ])
+        for section in range(sections)
+    ])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sections', type=int, default=40)
+    parser.add_argument('--rules', type=int, default=20)
+    parser.add_argument('--jquery-bytes', type=int, default=30000)
+    parser.add_argument('--repeat', type=int, default=7)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as static_dir:
+        write_stylesheet(os.path.join(static_dir, 'site.css'), args.sections, args.rules)
+        tree = build_page(args.sections, args.rules)
+        stylesheets = ['/static/site.css']
+        builder = DocumentBuilder(stylesheets=stylesheets, roots={'/static/': static_dir})
+
+        def size(url):
+            return args.jquery_bytes if url == JQUERY_URL else builder.resource_size(url)
+
+        def plain():
+            body, js = render_with_js(tree)
+            return render_document(body, js='\n'.join(js), stylesheets=stylesheets)
+
+        before = first_content_metrics(plain(), size)
+        built = builder.render(tree)
+        after = first_content_metrics(built, size)
+        critical = built.split('<style>', 1)[1].split('</style>', 1)[0]
+        print(f'critical CSS {len(critical)} of {builder.resource_size(stylesheets[0])} stylesheet bytes')
+        for label, metrics in (('render_document', before), ('DocumentBuilder', after)):
+            print(f'{label:>16}: {metrics["bytes_before_first_content"]:8d} bytes before first content '
+                  f'({metrics["html_bytes"]} HTML, {metrics["blocking_requests"]} blocking requests, '
+                  f'{metrics["blocking_bytes"]} blocking bytes)')
+
+        plain_time = _time(plain, args.repeat)
+        built_time = _time(lambda: builder.render(tree), args.repeat)
+        print(f'render: render_document {plain_time * 1000:8.3f} ms  DocumentBuilder {built_time * 1000:8.3f} ms '
+              f'({built_time / plain_time - 1:+6.1%})')
+
+
+if __name__ == '__main__':
+    main()
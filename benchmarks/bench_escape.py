@@ -0,0 +1,82 @@
+"""
+Measures the overhead of escaping widget output.
+
+Times render() of the benchmark trees as they are, and with escaping
+swapped out of every widget module, which reproduces the output from
+before widgets escaped their values. The trees from trees.py contain no
+characters that need escaping, so both outputs are checked to be equal.
+The `entities` case renders texts and ids that all need escaping.
+
+Usage:
+    python benchmarks/bench_escape.py [--repeat 7]
+"""
+import argparse
+import sys
+from contextlib import contextmanager
+
+from bench_render import _time
+from trees import build_tree
+
+from butterflask import Column, Text, style_formatter
+from butterflask.markup import escape
+
+CASES = {'page/text': (6, 3, 'text'), 'page/mixed': (6, 3, 'mixed'), 'page/ajax': (6, 3, 'ajax'),
+         'balanced/mixed': (8, 4, 'mixed')}
+
+
+def _identity(value):
+    return value
+
+
+def _format_style_unescaped(style, separator=': '):
+    return '; '.join(f'{key}{separator}{value}' for key, value in style.items())
+
+
+@contextmanager
+def unescaped():
+    """
+    Replaces escape() and format_style() in every loaded butterflask module with their unescaped versions.
+    """
+    patched = []
+    for module in list(sys.modules.values()):
+        if not getattr(module, '__name__', '').startswith('butterflask.') or module is style_formatter:
+            continue
+        for name, replacement in (('escape', _identity), ('format_style', _format_style_unescaped)):
+            original = vars(module).get(name)
+            if original is escape or original is style_formatter.format_style:
+                setattr(module, name, replacement)
+                patched.append((module, name, original))
+    try:
+        yield
+    finally:
+        for module, name, original in patched:
+            setattr(module, name, original)
+
+
+def build_entities():
+    return Column(children=[
+        Text(f'Fish & Chips <{index}>', id=f'item-"{index}"', style={'color': '#333'}) for index in range(200)
+    ])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=7)
+    args = parser.parse_args()
+
+    builders = {name: (lambda case=case: build_tree(*case)) for name, case in CASES.items()}
+    builders['entities'] = build_entities
+    for name, build in builders.items():
+        function = (build, lambda tree: tree.render())
+        with unescaped():
+            before = _time(function, args.repeat)
+            before_html = build().render()
+        after = _time(function, args.repeat)
+        after_html = build().render()
+        same = 'same output' if before_html == after_html else f'{len(after_html) - len(before_html):+d} bytes'
+        print(f'{name:<16} unescaped {before * 1000:8.3f} ms  escaped {after * 1000:8.3f} ms '
+              f'({after / before - 1:+6.1%})  {same}')
+
+
+if __name__ == '__main__':
+    main()
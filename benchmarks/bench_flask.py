@@ -0,0 +1,56 @@
+"""
+Compares ButterFlask.render_page with the README's render_template approach.
+
+Requests every document route of benchmarks/loadtest/app.py in-process
+through Flask's test client, so only the framework and rendering are
+measured, and checks that render_page serves the same document.
+
+Usage:
+    python benchmarks/bench_flask.py [--repeat 7]
+"""
+import argparse
+import os
+import re
+import sys
+
+from bench_render import _time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'loadtest'))
+
+from app import app, build_page, butterflask, TEMPLATE  # noqa: E402
+from flask import render_template_string  # noqa: E402
+
+ROUTES = ('/readme', '/page', '/stream')
+
+
+def _normalize(document):
+    # The shell adds a charset declaration and lays out whitespace differently.
+    return re.sub(r'\s+', '', document.replace('<meta charset="utf-8">', ''))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=7)
+    args = parser.parse_args()
+
+    client = app.test_client()
+    documents = {route: client.get(route).get_data(as_text=True) for route in ROUTES}
+    if len({_normalize(document) for document in documents.values()}) != 1:
+        raise SystemExit('render_page and the README template serve different documents')
+
+    with app.test_request_context('/'):
+        direct = {
+            'render_template_string': lambda: render_template_string(
+                TEMPLATE, ui=build_page(js := [' ']).render(), js='\n'.join(js)
+            ),
+            'render_page': lambda: butterflask.render_page(build_page([' ']), title='My Web App', etag=False),
+        }
+        for name, function in direct.items():
+            print(f'{name:<24} {_time(function, args.repeat) * 1000:8.3f} ms')
+
+    for route in ROUTES:
+        print(f'GET {route:<20} {_time(lambda: client.get(route).get_data(), args.repeat) * 1000:8.3f} ms')
+
+
+if __name__ == '__main__':
+    main()
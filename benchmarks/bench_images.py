@@ -0,0 +1,82 @@
+"""
+Image variant benchmark.
+
+Writes synthetic photos to a temporary static directory, generates their
+variants with an ImagePipeline using one worker process and then the
+default pool, and compares the bytes a Card of thumbnails transfers with
+and without the pipeline. Finally times render() of the thumbnails, with
+variants resolved from the pipeline's memo, against plain Image widgets.
+Requires Pillow.
+
+Usage:
+    python benchmarks/bench_images.py [--images 24] [--size 2400x1600] [--width 300]
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from bench_render import _time
+from PIL import Image as PILImage, ImageFilter
+
+from butterflask import Card, Image, ImagePipeline, images
+
+
+def write_photos(directory, count, size):
+    random.seed(0)
+    paths = []
+    for index in range(count):
+        noise = bytes(random.getrandbits(8) for _ in range(96 * 64 * 3))
+        # Blurred, upscaled noise compresses about like a photo.
+        photo = PILImage.frombytes('RGB', (96, 64), noise).resize(size, PILImage.BICUBIC)
+        photo = photo.filter(ImageFilter.GaussianBlur(2))
+        path = os.path.join(directory, f'photo-{index}.jpg')
+        photo.save(path, quality=90)
+        paths.append(path)
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--images', type=int, default=24)
+    parser.add_argument('--size', default='2400x1600')
+    parser.add_argument('--width', type=int, default=300, help='the display width of the thumbnails')
+    parser.add_argument('--repeat', type=int, default=7)
+    args = parser.parse_args()
+    size = tuple(int(part) for part in args.size.split('x'))
+
+    with tempfile.TemporaryDirectory() as directory:
+        static_dir = os.path.join(directory, 'static')
+        os.makedirs(static_dir)
+        paths = write_photos(static_dir, args.images, size)
+        sources = [f'/static/{os.path.basename(path)}' for path in paths]
+
+        for processes in (1, None):
+            cache_dir = os.path.join(directory, f'cache-{processes}')
+            pipeline = ImagePipeline(static_dir, cache_dir=cache_dir, processes=processes)
+            start = time.perf_counter()
+            generated = pipeline.prepare(sources)
+            seconds = time.perf_counter() - start
+            pipeline.close()
+            print(f'prepare, {processes or os.cpu_count()} process(es): {generated} variants in {seconds:6.2f} s')
+
+        pipeline = ImagePipeline(static_dir, cache_dir=cache_dir).install()
+        original = sum(os.path.getsize(path) for path in paths)
+        variants = 0
+        for source in sources:
+            src, _ = pipeline.resolve(source, args.width)
+            variants += os.path.getsize(pipeline.fetch(src[len(pipeline.route):]))
+        print(f'{args.images} thumbnails at {args.width}px: originals {original / 1024:9.1f} KiB, '
+              f'variants {variants / 1024:9.1f} KiB ({variants / original:.1%})')
+
+        plain = (lambda: Card(children=[Image(source) for source in sources]), lambda card: card.render())
+        sized = (lambda: Card(children=[Image(source, width=args.width) for source in sources]), lambda card: card.render())
+        before = _time(plain, args.repeat)
+        after = _time(sized, args.repeat)
+        print(f'render: plain {before * 1000:8.3f} ms  variants {after * 1000:8.3f} ms ({after / before - 1:+6.1%})')
+        images.PIPELINE = None
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+"""
+Package import benchmark.
+
+Runs each import statement in a fresh interpreter with `-X importtime` and
+reports the cumulative import time of the statement's own modules, the
+butterflask modules it loaded and the total number of modules loaded.
+Every statement runs --repeat times and the fastest run is reported.
+
+Usage:
+    python benchmarks/bench_import.py [--repeat 5]
+    python benchmarks/bench_import.py --statement "from butterflask import Row"
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+STATEMENTS = (
+    'import butterflask',
+    'from butterflask import Text',
+    'from butterflask import Page, Row, Column, Button',
+    'from butterflask.Widgets.Button import Button',
+    'from butterflask import freeze, render_document',
+    'from butterflask import ButterFlask',
+)
+
+
+def measure(statement):
+    """
+    Imports in a fresh interpreter and parses its `-X importtime` report.
+
+    Returns:
+        Tuple[float, List[str], int]: (microseconds spent in the statement's imports,
+            butterflask modules loaded, number of modules loaded).
+    """
+    # Modules the interpreter loads at startup are reported before the marker.
+    code = f'import sys; sys.stderr.write("-- start\\n"); {statement}'
+    environment = dict(os.environ, PYTHONPATH=ROOT)
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        capture_output=True, text=True, env=environment, check=True
+    )
+    lines = result.stderr.splitlines()
+    lines = lines[lines.index('-- start') + 1:]
+    total, modules = 0, []
+    for line in lines:
+        if not line.startswith('import time:') or '|' not in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        if not cumulative.strip().isdigit():
+            continue
+        # Top-level imports are the ones not indented under another module.
+        if not name[1:].startswith(' '):
+            total += int(cumulative)
+        modules.append(name.strip())
+    return total, [module for module in modules if module.split('.')[0] == 'butterflask'], len(modules)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--statement', action='append', help='an import statement to measure instead of the defaults')
+    args = parser.parse_args()
+
+    for statement in args.statement or STATEMENTS:
+        runs = [measure(statement) for _ in range(args.repeat)]
+        total, own, count = min(runs)
+        print(f'{statement:<52} {total / 1000:8.2f} ms  {count:4d} modules  {len(own):3d} butterflask')
+        print(f"    {', '.join(sorted(own))}")
+
+
+if __name__ == '__main__':
+    main()
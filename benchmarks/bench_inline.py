@@ -0,0 +1,65 @@
+"""
+Asset inlining benchmark.
+
+Writes small icons to a temporary static directory and renders a page
+that references them from many Image widgets: without inlining, with
+inlining and a warm memo, and with a new AssetInliner for every render
+(every file read and encoded again). Prints the requests and bytes the
+inlined page saves.
+
+Usage:
+    python benchmarks/bench_inline.py [--icons 12] [--images 120] [--icon-bytes 1500]
+"""
+import argparse
+import os
+import tempfile
+
+from bench_render import _time
+
+from butterflask import Column, Image, Row, render_document
+from butterflask.inlining import AssetInliner, inline_assets
+
+
+def build_page(icons, images):
+    return Column(children=[
+        Row(children=[Image(f'/static/icon-{(row * 6 + column) % icons}.png', alt='') for column in range(6)])
+        for row in range(images // 6)
+    ])
+
+
+def render(tree, inliner):
+    with inline_assets(inliner) as report:
+        html = render_document(tree.render(), scripts=['/static/app.js'])
+    return html, report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--icons', type=int, default=12)
+    parser.add_argument('--images', type=int, default=120)
+    parser.add_argument('--icon-bytes', type=int, default=1500)
+    parser.add_argument('--repeat', type=int, default=7)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as static_dir:
+        for index in range(args.icons):
+            with open(os.path.join(static_dir, f'icon-{index}.png'), 'wb') as icon:
+                icon.write(os.urandom(args.icon_bytes))
+        with open(os.path.join(static_dir, 'app.js'), 'w') as script:
+            script.write('console.log("ready");\n' * 20)
+        tree = build_page(args.icons, args.images)
+        roots = {'/static/': static_dir}
+        inliner = AssetInliner(roots, max_bytes=4096)
+
+        plain = _time(lambda: render_document(tree.render(), scripts=['/static/app.js']), args.repeat)
+        warm = _time(lambda: render(tree, inliner), args.repeat)
+        cold = _time(lambda: render(tree, AssetInliner(roots, max_bytes=4096)), args.repeat)
+        html, report = render(tree, inliner)
+        print(f'render: plain {plain * 1000:8.3f} ms  inlined {warm * 1000:8.3f} ms  '
+              f'inlined without memo {cold * 1000:8.3f} ms')
+        print(f'saved {report.requests_saved} requests and {report.bytes_saved} bytes; '
+              f'the page grew by {report.bytes_inlined} bytes of data URIs to {len(html)} bytes')
+
+
+if __name__ == '__main__':
+    main()
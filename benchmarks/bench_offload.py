@@ -0,0 +1,92 @@
+"""
+Render offloading benchmark.
+
+Simulates a threaded WSGI worker: request threads build and render small
+pages in a loop while other threads build and render a large page. Prints
+the latency percentiles of the small requests and the large pages, first
+with every page built and rendered in its request thread and then with a
+RenderPool doing the large ones in worker processes, which receive only the
+builder and its arguments. Offloading needs spare CPUs to pay off: with a
+single CPU the workers compete with the request threads for it.
+
+Usage:
+    python benchmarks/bench_offload.py [--threads 8] [--large-threads 1] [--duration 5] [--width 8 --depth 5]
+"""
+import argparse
+import os
+import threading
+import time
+
+from trees import build_tree, count_widgets
+
+from butterflask import RenderPool
+from butterflask.document import render_with_js
+
+
+def _percentiles(samples):
+    samples = sorted(samples)
+    if not samples:
+        return 'no samples'
+    pick = lambda fraction: samples[min(len(samples) - 1, int(fraction * len(samples)))] * 1000
+    return (f'n={len(samples):6d}  p50 {pick(0.5):8.2f} ms  p95 {pick(0.95):8.2f} ms  '
+            f'p99 {pick(0.99):8.2f} ms  max {samples[-1] * 1000:8.2f} ms')
+
+
+def run(render_small, render_large, threads, large_threads, duration, pause):
+    stop = time.perf_counter() + duration
+    small_latencies = []
+    large_latencies = []
+
+    def serve(render, latencies, wait):
+        while time.perf_counter() < stop:
+            start = time.perf_counter()
+            render()
+            latencies.append(time.perf_counter() - start)
+            time.sleep(wait)
+
+    workers = [threading.Thread(target=serve, args=(render_small, small_latencies, pause)) for _ in range(threads)]
+    workers += [threading.Thread(target=serve, args=(render_large, large_latencies, 0)) for _ in range(large_threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return small_latencies, large_latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--threads', type=int, default=8, help='threads serving small pages')
+    parser.add_argument('--large-threads', type=int, default=1, help='threads serving the large page')
+    parser.add_argument('--duration', type=float, default=5.0)
+    parser.add_argument('--small-width', type=int, default=6, help='children per container of the small page')
+    parser.add_argument('--width', type=int, default=8)
+    parser.add_argument('--depth', type=int, default=5)
+    parser.add_argument('--processes', type=int, default=None)
+    parser.add_argument('--pause', type=float, default=0.005, help='seconds between small requests of a thread')
+    args = parser.parse_args()
+
+    print(f'small page: {count_widgets(build_tree(args.small_width, 3))} widgets, '
+          f'large page: {count_widgets(build_tree(args.width, args.depth))} widgets, {os.cpu_count()} CPUs')
+
+    pool = RenderPool(args.processes).start()
+    render_small = lambda: render_with_js(build_tree(args.small_width, 3))
+    modes = (
+        ('in thread', lambda: render_with_js(build_tree(args.width, args.depth))),
+        ('offloaded', lambda: pool.render_call(build_tree, args.width, args.depth)),
+    )
+    try:
+        for label, render_large in modes:
+            small_latencies, large_latencies = run(
+                render_small, render_large, args.threads, args.large_threads, args.duration, args.pause
+            )
+            print(f'{label}:')
+            print(f'  small {_percentiles(small_latencies)}')
+            print(f'  large {_percentiles(large_latencies)}')
+        print(f'pool: {pool.offloaded} offloaded, {pool.local} local, {pool.fallbacks} fallbacks, '
+              f'{pool.saturated} saturated')
+    finally:
+        pool.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,37 @@
+"""
+Measures the overhead of the render profiling hooks.
+
+Times render() of the same trees before profiling was ever enabled, after a
+profiling session has ended (instrumentation removed), and while profiling.
+
+Usage:
+    python benchmarks/bench_profiling.py [--repeat 7]
+"""
+import argparse
+
+from bench_render import _time
+from trees import build_tree
+
+from butterflask.profiling import profile_render
+
+CASES = {'page': (6, 3), 'balanced': (8, 4)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=7)
+    args = parser.parse_args()
+
+    for name, (width, depth) in CASES.items():
+        function = (lambda: build_tree(width, depth, 'mixed'), lambda tree: tree.render())
+        baseline = _time(function, args.repeat)
+        with profile_render():
+            enabled = _time(function, args.repeat)
+        disabled = _time(function, args.repeat)
+        print(f'{name:<10} baseline {baseline * 1000:8.3f} ms  '
+              f'disabled {disabled * 1000:8.3f} ms ({disabled / baseline - 1:+6.1%})  '
+              f'enabled {enabled * 1000:8.3f} ms ({enabled / baseline - 1:+6.1%})')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,166 @@
+"""
+Rendering benchmark suite.
+
+Builds synthetic trees of every shape and widget mix from benchmarks/trees.py
+and measures construction time, render time for each render mode, peak memory
+and output bytes. Results are written as JSON so CI can compare two runs.
+
+Usage:
+    python benchmarks/bench_render.py --output results.json
+    python benchmarks/bench_render.py --compare baseline.json --threshold 0.15
+
+With --compare the script exits with status 1 if any timing regressed by more
+than the threshold (a fraction, 0.15 = 15%).
+"""
+import argparse
+import gc
+import json
+import platform
+import sys
+import time
+import tracemalloc
+
+from trees import MIXES, SHAPES, build_tree, count_widgets
+
+from butterflask.document import render_with_js
+from butterflask.fingerprint import fingerprint
+from butterflask.frozen import freeze
+
+
+def _time(function, repeat, min_duration=0.02):
+    """
+    Returns the fastest per-call wall time of `function` in seconds.
+
+    `function` is either a callable or a (setup, run) pair; for pairs, setup()
+    is called once per call of run() and excluded from the timing. Each of the
+    `repeat` samples runs enough calls to last at least `min_duration`.
+    """
+    setup, run = function if isinstance(function, tuple) else (lambda: None, lambda _: function())
+    start = time.perf_counter()
+    run(setup())
+    single = max(time.perf_counter() - start, 1e-6)
+    number = max(1, int(min_duration / single))
+    best = float('inf')
+    for _ in range(repeat):
+        arguments = [setup() for _ in range(number)]
+        gc.collect()
+        start = time.perf_counter()
+        for argument in arguments:
+            run(argument)
+        best = min(best, (time.perf_counter() - start) / number)
+    return best
+
+
+def _peak_memory(function):
+    tracemalloc.start()
+    try:
+        function()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def render_modes(width, depth, mix):
+    """
+    Returns the render modes to benchmark as name -> (setup, run) pairs.
+    """
+    build = lambda: build_tree(width, depth, mix)
+    return {
+        'render': (build, lambda tree: tree.render()),
+        'fingerprint': (build, fingerprint),
+        'freeze': (build, freeze),
+        'frozen_render': (lambda: freeze(build()), lambda tree: tree.render()),
+    }
+
+
+def run_case(width, depth, mix, repeat):
+    tree = build_tree(width, depth, mix)
+    html, js = render_with_js(tree)
+    result = {
+        'widgets': count_widgets(tree),
+        'output_bytes': len(html.encode('utf-8')),
+        'js_bytes': len('\n'.join(js).encode('utf-8')),
+        'construct_s': _time(lambda: build_tree(width, depth, mix), repeat),
+        'peak_memory_bytes': _peak_memory(lambda: build_tree(width, depth, mix).render()),
+    }
+    for mode, function in render_modes(width, depth, mix).items():
+        result[f'{mode}_s'] = _time(function, repeat)
+    return result
+
+
+def run_suite(repeat, shapes=None, mixes=None):
+    results = {}
+    for shape, (width, depth) in SHAPES.items():
+        if shapes and shape not in shapes:
+            continue
+        for mix in MIXES:
+            if mixes and mix not in mixes:
+                continue
+            results[f'{shape}/{mix}'] = run_case(width, depth, mix, repeat)
+    return {
+        'meta': {
+            'python': platform.python_version(),
+            'implementation': platform.python_implementation(),
+            'machine': platform.machine(),
+            'repeat': repeat,
+        },
+        'results': results,
+    }
+
+
+def compare(current, baseline, threshold):
+    """
+    Prints the change of every timing against a baseline run.
+
+    Returns:
+        List[str]: The metrics that regressed by more than the threshold.
+    """
+    regressions = []
+    for case, metrics in current['results'].items():
+        previous = baseline['results'].get(case)
+        if previous is None:
+            continue
+        for metric, value in metrics.items():
+            if not metric.endswith('_s') or not previous.get(metric):
+                continue
+            change = value / previous[metric] - 1
+            flag = ''
+            if change > threshold:
+                flag = '  REGRESSION'
+                regressions.append(f'{case} {metric}')
+            print(f'{case:<18} {metric:<18} {previous[metric] * 1000:10.3f} ms -> {value * 1000:10.3f} ms  {change:+7.1%}{flag}')
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--output', help='write the results to this JSON file')
+    parser.add_argument('--compare', help='a previous JSON result file to compare against')
+    parser.add_argument('--threshold', type=float, default=0.15, help='allowed slowdown before failing (default 0.15)')
+    parser.add_argument('--repeat', type=int, default=7, help='timing repetitions per measurement (default 7)')
+    parser.add_argument('--shape', action='append', choices=sorted(SHAPES), help='only run these tree shapes')
+    parser.add_argument('--mix', action='append', choices=sorted(MIXES), help='only run these widget mixes')
+    args = parser.parse_args()
+
+    current = run_suite(args.repeat, args.shape, args.mix)
+    if args.output:
+        with open(args.output, 'w') as output:
+            json.dump(current, output, indent=2, sort_keys=True)
+
+    if args.compare:
+        with open(args.compare) as baseline_file:
+            baseline = json.load(baseline_file)
+        regressions = compare(current, baseline, args.threshold)
+        if regressions:
+            print(f'{len(regressions)} regression(s) above {args.threshold:.0%}', file=sys.stderr)
+            sys.exit(1)
+    else:
+        for case, metrics in current['results'].items():
+            timings = '  '.join(
+                f"{metric[:-2]} {value * 1000:8.3f} ms" for metric, value in metrics.items() if metric.endswith('_s')
+            )
+            print(f"{case:<18} {metrics['widgets']:6d} widgets {metrics['output_bytes']:9d} B  {timings}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+"""
+Compares the JSON tree encoding with HTML rendering.
+
+For every shape and widget mix, checks that decoding the JSON gives back
+exactly the HTML and JavaScript render() produces, then reports the size
+of both encodings (raw and gzipped, JavaScript included) and the server CPU time to produce them
+from a freshly built tree and from a frozen one.
+
+Usage:
+    python benchmarks/bench_serializer.py [--repeat 7]
+"""
+import argparse
+import gzip
+import json
+
+from bench_render import _time
+from trees import MIXES, SHAPES, build_tree
+
+from butterflask.document import render_with_js
+from butterflask.frozen import freeze
+from butterflask.serializer import dumps, to_html
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=7)
+    args = parser.parse_args()
+
+    print(f"{'case':<18} {'html':>9} {'json':>9} {'html.gz':>8} {'json.gz':>8} "
+          f"{'render':>9} {'dumps':>9} {'frozen render':>14} {'frozen dumps':>13}")
+    for shape, (width, depth) in SHAPES.items():
+        for mix in MIXES:
+            build = lambda: build_tree(width, depth, mix, js=[' '])
+            html, js = render_with_js(build())
+            payload = dumps(build())
+            decoded = json.loads(payload)
+            if to_html(decoded) != html or decoded['js'] != js:
+                raise SystemExit(f'{shape}/{mix}: the JSON encoding does not round-trip')
+            # The HTML side ships the generated JavaScript inline as well.
+            markup = html + '\n'.join(js)
+            sizes = [len(text.encode('utf-8')) for text in (markup, payload)]
+            compressed = [len(gzip.compress(text.encode('utf-8'))) for text in (markup, payload)]
+            timings = [
+                _time((build, lambda tree: tree.render()), args.repeat),
+                _time((build, dumps), args.repeat),
+                _time((lambda: freeze(build()), lambda tree: tree.render()), args.repeat),
+                _time((lambda: freeze(build()), dumps), args.repeat),
+            ]
+            print(f'{shape + "/" + mix:<18} {sizes[0]:9d} {sizes[1]:9d} {compressed[0]:8d} {compressed[1]:8d} '
+                  + ' '.join(f'{timing * 1000:{width_}.3f}' for timing, width_ in zip(timings, (6, 6, 11, 10)))
+                  + ' ms')
+
+
+if __name__ == '__main__':
+    main()
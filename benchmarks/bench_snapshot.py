@@ -0,0 +1,54 @@
+"""
+Compares loading a snapshot with rebuilding a tree and with unpickling it.
+
+For every shape and widget mix, reports the size of the pickled tree and of
+its snapshot, and the time to get a renderable tree by rebuilding it, by
+pickle.loads, by snapshot.loads, and by a lazy snapshot.load (until the
+root is available, and until the tree is rendered).
+
+Usage:
+    python benchmarks/bench_snapshot.py [--repeat 7]
+"""
+import argparse
+import os
+import pickle
+import tempfile
+
+from bench_render import _time
+from trees import MIXES, SHAPES, build_tree
+
+from butterflask import snapshot
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=7)
+    args = parser.parse_args()
+
+    print(f"{'case':<18} {'pickle':>9} {'snapshot':>9} {'rebuild':>9} {'unpickle':>9} "
+          f"{'load':>9} {'lazy root':>10} {'lazy render':>12}")
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'tree.bfs')
+        for shape, (width, depth) in SHAPES.items():
+            for mix in MIXES:
+                build = lambda: build_tree(width, depth, mix, js=[' '])
+                pickled = pickle.dumps(build(), pickle.HIGHEST_PROTOCOL)
+                data = snapshot.dumps(build())
+                if snapshot.loads(data).render() != build().render():
+                    raise SystemExit(f'{shape}/{mix}: the snapshot does not round-trip')
+                # Small sections, so the lazy load has something to defer.
+                snapshot.save(build(), path, segment_nodes=256)
+                timings = [
+                    _time(build, args.repeat),
+                    _time(lambda: pickle.loads(pickled), args.repeat),
+                    _time(lambda: snapshot.loads(data), args.repeat),
+                    _time(lambda: snapshot.load(path, lazy=True), args.repeat),
+                    _time(lambda: snapshot.load(path, lazy=True).render(), args.repeat),
+                ]
+                print(f'{shape + "/" + mix:<18} {len(pickled):9d} {len(data):9d} '
+                      + ' '.join(f'{timing * 1000:{column}.3f}' for timing, column in zip(timings, (6, 6, 6, 7, 9)))
+                      + ' ms')
+
+
+if __name__ == '__main__':
+    main()
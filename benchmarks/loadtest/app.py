@@ -0,0 +1,158 @@
+"""
+Reference Flask app for the load tests.
+
+It follows the README's pattern (Page/Row/Column/Card/Button with AJAX
+routes) and serves the same page through every render mode:
+
+    /readme   build the tree per request and render it through Jinja, as in the README
+    /frozen   render a frozen tree prebuilt by a PreloadRegistry
+    /etag     like /readme, but answer 304 when If-None-Match matches
+    /cached   like /readme, with the product grid served from a fragment cache
+    /page     build the tree per request and render it with ButterFlask.render_page
+    /stream   like /page, streaming the head before the tree is rendered
+
+Usage:
+    python benchmarks/loadtest/app.py [--port 5000]
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+
+from flask import Flask, jsonify, render_template_string, request
+from werkzeug.serving import WSGIRequestHandler
+
+from butterflask.fingerprint import conditional_render
+from butterflask.fragment_cache import CachedFragment, MemoryFragmentCache
+from butterflask.integrations.flask import ButterFlask
+from butterflask.preload import PreloadRegistry
+from butterflask.Widgets.Button import Button
+from butterflask.Widgets.Card import Card
+from butterflask.Widgets.Column import Column
+from butterflask.Widgets.Image import Image
+from butterflask.Widgets.Page import Page
+from butterflask.Widgets.Row import Row
+from butterflask.Widgets.Text import Text
+
+PRODUCTS = 48
+
+TEMPLATE = """<!DOCTYPE html>
+<html>
+<head>
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <script src="https://code.jquery.com/jquery-3.7.0.min.js"></script>
+    <title>My Web App</title>
+</head>
+<body style="margin: 0px; padding: 0%;">
+    {{ ui | safe }}
+    <script>
+        {{ js | safe }}
+    </script>
+</body>
+</html>
+"""
+
+app = Flask(__name__)
+cache = MemoryFragmentCache()
+registry = PreloadRegistry()
+butterflask = ButterFlask(app)
+
+
+def build_grid():
+    return Row(
+        children=[
+            Card(children=[
+                Column(children=[
+                    Image(f'/static/products/{index}.png', alt=f'Product {index}'),
+                    Text(f'Product {index}', font_size='1.2rem'),
+                    Text(f'${index * 3 + 9}.99', style={'color': '#4caf50'}),
+                ])
+            ])
+            for index in range(PRODUCTS)
+        ],
+        horizontal='space-between'
+    )
+
+
+def build_page(js, grid=None):
+    return Page(children=[
+        Column(children=[
+            Row(
+                children=[
+                    Text('ButterFlask Shop', font_size='2rem'),
+                    Button('Like', id='like', js=js, func_name='like', method='POST', route='/api/like',
+                           on_click='like(event)', on_success="$('#like').text('Liked ' + response.likes);"),
+                    Button('Refresh', id='refresh', js=js, func_name='refresh', method='GET', route='/api/refresh',
+                           on_click='refresh(event)', content_type='text/plain'),
+                ],
+                horizontal='space-between'
+            ),
+            grid if grid is not None else build_grid(),
+        ])
+    ])
+
+
+@registry.page('/frozen')
+def frozen_page():
+    return build_page([' '])
+
+
+@app.route('/readme')
+def readme():
+    js = [' ']
+    ui = build_page(js)
+    return render_template_string(TEMPLATE, ui=ui.render(), js='\n'.join(js))
+
+
+@app.route('/frozen')
+def frozen():
+    page = registry.get('/frozen')
+    return render_template_string(TEMPLATE, ui=page.render(), js='\n'.join(page.js_code()))
+
+
+@app.route('/etag')
+def etag():
+    js = [' ']
+    ui = build_page(js)
+    status, html, tag = conditional_render(ui, request.headers.get('If-None-Match'))
+    if status == 304:
+        return '', 304, {'ETag': tag}
+    return render_template_string(TEMPLATE, ui=html, js='\n'.join(js)), 200, {'ETag': tag}
+
+
+@app.route('/cached')
+def cached():
+    js = [' ']
+    ui = build_page(js, grid=CachedFragment(build_grid(), cache))
+    return render_template_string(TEMPLATE, ui=ui.render(), js='\n'.join(js))
+
+
+@app.route('/page')
+def page():
+    return butterflask.render_page(build_page([' ']), title='My Web App', etag=False)
+
+
+@app.route('/stream')
+def stream():
+    return butterflask.render_page(build_page([' ']), title='My Web App', etag=False, stream=True)
+
+
+@app.route('/api/like', methods=['POST'])
+def like():
+    return jsonify(likes=1)
+
+
+@app.route('/api/refresh')
+def refresh():
+    return jsonify(ok=True)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--port', type=int, default=5000)
+    args = parser.parse_args()
+    registry.warmup(freeze_gc=False)
+    # Keep-alive connections, so the driver measures rendering rather than TCP setup.
+    WSGIRequestHandler.protocol_version = 'HTTP/1.1'
+    app.run(host='127.0.0.1', port=args.port, threaded=True)
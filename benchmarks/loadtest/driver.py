@@ -0,0 +1,165 @@
+"""
+Local load driver for the reference app.
+
+Starts benchmarks/loadtest/app.py on a free localhost port (unless --url is
+given), then for every render mode and concurrency level runs that many
+client threads for a fixed duration. Each thread keeps one HTTP/1.1
+connection open. Reports throughput and p50/p95/p99 latency.
+
+Usage:
+    python benchmarks/loadtest/driver.py
+    python benchmarks/loadtest/driver.py --modes readme,frozen --concurrency 1,16 --duration 10
+    python benchmarks/loadtest/driver.py --url http://127.0.0.1:5000 --output results.json
+"""
+import argparse
+import http.client
+import json
+import math
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+from urllib.parse import urlsplit
+
+APP = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'app.py')
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def _wait_until_ready(host, port, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection((host, port), timeout=1):
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f'the app did not start listening on {host}:{port}')
+
+
+def percentile(sorted_values, fraction):
+    """
+    Returns the nearest-rank percentile of an already sorted list.
+    """
+    if not sorted_values:
+        return 0.0
+    # The smallest value with at least `fraction` of the values at or below it.
+    index = min(len(sorted_values) - 1, max(0, math.ceil(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def _client(host, port, path, deadline, revalidate, latencies, errors):
+    connection = http.client.HTTPConnection(host, port, timeout=30)
+    etag = None
+    while time.monotonic() < deadline:
+        headers = {'If-None-Match': etag} if revalidate and etag else {}
+        start = time.perf_counter()
+        try:
+            connection.request('GET', path, headers=headers)
+            response = connection.getresponse()
+            response.read()
+        except (OSError, http.client.HTTPException):
+            errors.append(1)
+            connection.close()
+            connection = http.client.HTTPConnection(host, port, timeout=30)
+            continue
+        latencies.append(time.perf_counter() - start)
+        if response.status not in (200, 304):
+            errors.append(response.status)
+        etag = response.getheader('ETag') or etag
+    connection.close()
+
+
+def warm_up(host, port, path, requests):
+    """
+    Sends a fixed number of requests before the timed runs, so lazy initialisation is not measured.
+    """
+    connection = http.client.HTTPConnection(host, port, timeout=30)
+    try:
+        for _ in range(requests):
+            connection.request('GET', path)
+            response = connection.getresponse()
+            response.read()
+            if response.status != 200:
+                raise RuntimeError(f'warm-up request to {path} returned {response.status}')
+    finally:
+        connection.close()
+
+
+def run(host, port, mode, concurrency, duration, revalidate):
+    latencies, errors = [], []
+    deadline = time.monotonic() + duration
+    threads = [
+        threading.Thread(target=_client, args=(host, port, f'/{mode}', deadline, revalidate, latencies, errors))
+        for _ in range(concurrency)
+    ]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        'mode': mode,
+        'concurrency': concurrency,
+        'requests': len(latencies),
+        'errors': len(errors),
+        'throughput_rps': len(latencies) / elapsed,
+        'p50_ms': percentile(latencies, 0.50) * 1000,
+        'p95_ms': percentile(latencies, 0.95) * 1000,
+        'p99_ms': percentile(latencies, 0.99) * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', help='an already running app, e.g. http://127.0.0.1:5000')
+    parser.add_argument('--modes', default='readme,frozen,etag,cached', help='comma-separated render modes')
+    parser.add_argument('--concurrency', default='1,4,16', help='comma-separated numbers of client threads')
+    parser.add_argument('--duration', type=float, default=5.0, help='seconds per mode and concurrency level')
+    parser.add_argument('--no-revalidate', action='store_true', help='never send If-None-Match')
+    parser.add_argument('--warmup', type=int, default=3, help='untimed requests per mode before measuring')
+    parser.add_argument('--output', help='write the results to this JSON file')
+    args = parser.parse_args()
+
+    server = None
+    if args.url:
+        parts = urlsplit(args.url)
+        host, port = parts.hostname, parts.port or 80
+    else:
+        host, port = '127.0.0.1', _free_port()
+        server = subprocess.Popen(
+            [sys.executable, APP, '--port', str(port)],
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+    try:
+        _wait_until_ready(host, port)
+        results = []
+        for mode in args.modes.split(','):
+            warm_up(host, port, f'/{mode}', args.warmup)
+            for concurrency in (int(level) for level in args.concurrency.split(',')):
+                result = run(host, port, mode, concurrency, args.duration, not args.no_revalidate)
+                results.append(result)
+                print(f"{mode:<8} c={concurrency:<4} {result['throughput_rps']:9.1f} req/s  "
+                      f"p50 {result['p50_ms']:8.2f} ms  p95 {result['p95_ms']:8.2f} ms  "
+                      f"p99 {result['p99_ms']:8.2f} ms  errors {result['errors']}")
+                sys.stdout.flush()
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    if args.output:
+        with open(args.output, 'w') as output:
+            json.dump(results, output, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+"""
+Compares forked workers that build and render their pages cold with workers
+forked after PreloadRegistry.warmup().
+
+For each mode the script forks a number of workers. Every worker serves its
+"first request" (render every registered page) and reports the latency and
+its private dirty memory, i.e. the memory no longer shared with the master.
+
+Usage:
+    python benchmarks/preload_fork.py [--workers 4] [--pages 8] [--width 40]
+
+Linux only (reads /proc/self/smaps_rollup).
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from butterflask.preload import PreloadRegistry
+from butterflask.Widgets.Button import Button
+from butterflask.Widgets.Card import Card
+from butterflask.Widgets.Column import Column
+from butterflask.Widgets.Image import Image
+from butterflask.Widgets.Page import Page
+from butterflask.Widgets.Row import Row
+from butterflask.Widgets.Text import Text
+
+
+def build_page(index, width):
+    return Page(children=[
+        Column(children=[
+            Row(children=[
+                Card(children=[
+                    Text(f'Item {index}.{row}.{col}'),
+                    Image(f'/static/{index}/{row}/{col}.png', alt='thumbnail'),
+                    Button(f'Open {col}'),
+                ])
+                for col in range(width)
+            ])
+            for row in range(width)
+        ])
+    ])
+
+
+def private_dirty_kb():
+    with open('/proc/self/smaps_rollup') as smaps:
+        for line in smaps:
+            if line.startswith('Private_Dirty:'):
+                return int(line.split()[1])
+    return 0
+
+
+def run_mode(mode, workers, pages, width):
+    registry = PreloadRegistry()
+    for index in range(pages):
+        registry.page(f'/page/{index}')(lambda index=index: build_page(index, width))
+    if mode == 'warmup':
+        registry.warmup()
+
+    results = []
+    for _ in range(workers):
+        read_fd, write_fd = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            os.close(read_fd)
+            start = time.perf_counter()
+            for name, builder in registry.pages():
+                if mode == 'warmup':
+                    registry.get(name).render()
+                else:
+                    # What a worker does today: build the tree and render it.
+                    builder().render()
+            latency = time.perf_counter() - start
+            report = {'first_request_ms': latency * 1000, 'private_dirty_kb': private_dirty_kb()}
+            os.write(write_fd, json.dumps(report).encode())
+            os._exit(0)
+        os.close(write_fd)
+        with os.fdopen(read_fd) as pipe:
+            results.append(json.loads(pipe.read()))
+        os.waitpid(pid, 0)
+
+    if mode == 'warmup':
+        import gc
+        gc.unfreeze()
+    return {
+        'mode': mode,
+        'first_request_ms': sum(r['first_request_ms'] for r in results) / len(results),
+        'private_dirty_kb': sum(r['private_dirty_kb'] for r in results) / len(results),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--pages', type=int, default=8)
+    parser.add_argument('--width', type=int, default=40)
+    args = parser.parse_args()
+
+    for mode in ('cold', 'warmup'):
+        if os.fork() == 0:
+            # Each mode runs in its own master so the modes do not share memory.
+            result = run_mode(mode, args.workers, args.pages, args.width)
+            print(f"{result['mode']:>7}: first request {result['first_request_ms']:9.2f} ms, "
+                  f"private dirty {result['private_dirty_kb'] / 1024:8.2f} MiB per worker")
+            sys.stdout.flush()
+            os._exit(0)
+        os.wait()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+"""
+Synthetic widget trees for the benchmarks.
+
+Trees are built from every widget class with a given width (children per
+container), depth (container levels) and widget mix.
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from butterflask.Widgets.Button import Button
+from butterflask.Widgets.Card import Card
+from butterflask.Widgets.Center import Center
+from butterflask.Widgets.Column import Column
+from butterflask.Widgets.Image import Image
+from butterflask.Widgets.Page import Page
+from butterflask.Widgets.Row import Row
+from butterflask.Widgets.Text import Text
+
+CONTAINERS = {
+    'row': lambda children: Row(children=children, horizontal='space-between'),
+    'column': lambda children: Column(children=children),
+    'card': lambda children: Card(children=children),
+    'center': lambda children: Center(Column(children=children)),
+}
+
+LEAVES = {
+    'text': lambda index, js: Text(f'Item {index}', style={'color': '#333'}),
+    'button': lambda index, js: Button(f'Button {index}', id=f'button-{index}'),
+    'ajax_button': lambda index, js: Button(
+        f'Save {index}', id=f'save-{index}', js=js, route=f'/api/items/{index}',
+        func_name=f'save{index}', on_click=f'save{index}(event)', on_success='console.log(response);'
+    ),
+    'image': lambda index, js: Image(f'/static/img/{index}.png', alt=f'Image {index}'),
+}
+
+MIXES = {
+    'text': (('row', 'column'), ('text',)),
+    'mixed': (('row', 'column', 'card', 'center'), ('text', 'button', 'image')),
+    'ajax': (('row', 'card'), ('text', 'ajax_button', 'image')),
+}
+
+SHAPES = {
+    'wide': (50, 2),
+    'deep': (2, 10),
+    'balanced': (8, 4),
+    'page': (6, 3),
+}
+
+
+def build_tree(width: int, depth: int, mix: str = 'mixed', js=None):
+    """
+    Builds a synthetic widget tree wrapped in a Page.
+
+    Args:
+        width (int): The number of children of every container.
+        depth (int): The number of container levels.
+        mix (str): The name of the widget mix in MIXES.
+        js (list, optional): The JavaScript accumulator passed to AJAX widgets.
+
+    Returns:
+        Page: The root of the tree.
+    """
+    containers, leaves = MIXES[mix]
+    js = [' '] if js is None else js
+    counter = [0]
+
+    def build(level):
+        if level == depth:
+            index = counter[0]
+            counter[0] += 1
+            return LEAVES[leaves[index % len(leaves)]](index, js)
+        children = [build(level + 1) for _ in range(width)]
+        return CONTAINERS[containers[level % len(containers)]](children)
+
+    return Page(children=[build(0)])
+
+
+def count_widgets(widget) -> int:
+    return 1 + sum(count_widgets(child) for child in getattr(widget, 'children', None) or ())
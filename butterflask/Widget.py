@@ -13,4 +13,14 @@ class Widget:
 
     def render(self):
         rendered_children = ''.join(child.render() for child in self.children)
-        return rendered_children
\ No newline at end of file
+        return rendered_children
+
+    def freeze(self):
+        """
+        Builds an immutable, thread-safe copy of this widget tree.
+
+        Returns:
+            FrozenWidget: The frozen tree, safe to share between threads and requests.
+        """
+        from .frozen import freeze
+        return freeze(self)
\ No newline at end of file
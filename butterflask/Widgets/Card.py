@@ -1,84 +1,31 @@
-from typing import Dict, Optional, List
 from ..Widget import Widget
+from ..markup import escape
+from ..schema import AJAX, CHILDREN, CLASSES, DEFAULT, FUNC_NAME, ID, JS, METHOD, ON_CLICK, PREFETCH, STYLE, schema
 from ..style_formatter import format_style
 from ..class_formatter import format_class_attr
-from ..js_code_generator import generate_js_code
+from ..prefetch import format_prefetch_attrs
 
 
+@schema(
+    CHILDREN, STYLE, DEFAULT.replace(name='default_css'), ID, CLASSES, FUNC_NAME, METHOD, JS, ON_CLICK, *AJAX, PREFETCH,
+    default_style={
+        'display': 'inline-block',
+        'background-color': '#ffffff',
+        'box-shadow': '0 4px 6px rgba(0, 0, 0, 0.1)',
+        'border-radius': '4px',
+        'padding': '20px',
+        'margin': '10px',
+    },
+    default_flag='default_css'
+)
 class Card(Widget):
-    def __init__(
-        self,
-        children: List[Widget] = None,
-        style: Optional[Dict[str, str]] = None,
-        default_css: bool = True,
-        id: str = '',
-        classes: List[str] = None,
-        func_name: Optional[str] = None,
-        method: str = 'POST',
-        js: Optional[List[str]] = None,
-        on_click: Optional[str] = None,
-        route: Optional[str] = None,
-        request_data: str = '',
-        before_send: str = '',
-        data_type: str = 'json',
-        content_type: str = 'application/json',
-        on_success: str = '',
-        on_completed: str = '',
-        on_error: str = ''
-    ):
-
-        super().__init__(children)
-        self.style = style or {}
-        self.default_css = default_css
-        self.id = id
-        self.classes = classes or []
-        self.func_name = func_name
-        self.method = method
-        self.js = js or []
-        self.on_click = on_click
-        self.route = route
-        self.request_data = request_data
-        self.before_send = before_send
-        self.data_type = data_type
-        self.content_type = content_type
-        self.on_success = on_success
-        self.on_completed = on_completed
-        self.on_error = on_error
-
-        if default_css:
-            self._apply_default_style()
-
     def render(self) -> str:
         onclick = f"event.preventDefault(); {self.on_click}" if self.on_click else ""
-        if self.js and self.route:
-            js_code = generate_js_code(
-                self.func_name,
-                self.method,
-                self.route,
-                self.request_data,
-                self.data_type,
-                self.content_type,
-                self.before_send,
-                self.on_success,
-                self.on_error,
-                self.on_completed
-            )
-            self.js.append(js_code)
+        self._render_js()
         style_attr = format_style(self.style)
         class_attr = format_class_attr(self.classes)
         rendered_children = ''.join(child.render() for child in self.children)
-        return f'<div id="{self.id}" class="{class_attr}" style="{style_attr}" onclick="{onclick}">{rendered_children}</div>'
-
-    def _apply_default_style(self):
-        """
-        Applies default CSS styles to the column.
-        """
-        default_style = {
-            'display': 'inline-block',
-            'background-color': '#ffffff',
-            'box-shadow': '0 4px 6px rgba(0, 0, 0, 0.1)',
-            'border-radius': '4px',
-            'padding': '20px',
-            'margin': '10px',
-        }
-        self.style = {**default_style, **self.style}
+        prefetch_attrs = format_prefetch_attrs(
+            self.prefetch, self.method, self.route, self.request_data, self.data_type, self.content_type
+        )
+        return f'<div id="{escape(self.id)}" class="{class_attr}" style="{style_attr}" onclick="{escape(onclick)}"{prefetch_attrs}>{rendered_children}</div>'
@@ -1,11 +1,30 @@
 from ..Widget import Widget
+from ..markup import Markup, escape
+from ..schema import Field, schema
+from ..style_formatter import format_style
 
+# Already escaped: the quotes are entities so the value fits in the style attribute.
+_FONT_FAMILY = Markup(r'&quot;Lato&quot;, &quot;Corbel&quot;, &quot;Avenir&quot;, &quot;Lucida Grande&quot;, &quot;Lucida Sans&quot;, sans-serif')
+
+# The default style after the font size, formatted once.
+_DEFAULT_STYLE_TAIL = format_style({'line-height': '1.5em', 'font-family': _FONT_FAMILY}, ':')
+_DEFAULT_KEYS = frozenset(('font-size', 'line-height', 'font-family'))
+
+@schema(
+    Field('text', doc='The text content of the widget; it is escaped unless it is Markup.'),
+    Field('font_size', default='1.0rem', doc="The font size of the text in rem (e.g., '1.4rem')."),
+    Field('style', default=None, doc='Custom CSS style properties for the text widget.', value='{name} or {{}}'),
+    Field('id', default='', doc='The HTML id attribute for the text widget.'),
+    Field('classes', default='', doc='The CSS classes for the text widget.'),
+    Field('on_click', default=None, doc='The function to be called when the text widget is clicked.'),
+    default_flag=None
+)
 class Text(Widget):
     """
     A class representing a text widget.
 
     Attributes:
-        text (str): The text content of the widget.
+        text (str): The text content of the widget; it is escaped unless it is Markup.
         font_size (str): The font size of the text in rem (e.g., '1.4rem').
         style (dict): Custom CSS style properties for the text widget.
         id (str): The HTML id attribute for the text widget.
@@ -17,42 +36,27 @@ class Text(Widget):
         render(): Renders the text widget as HTML.
 
     """
-    def __init__(self, text, font_size='1.0rem', style=None, id='', classes='', on_click=None):
-        """
-        Initializes a Text widget.
-
-        Args:
-            text (str): The text content of the widget.
-            font_size (str): The font size of the text in rem (e.g., '1.4rem').
-            style (dict): Custom CSS style properties for the text widget.
-            id (str): The HTML id attribute for the text widget.
-            classes (str): The CSS classes for the text widget.
-            on_click (callable): The function to be called when the text widget is clicked.
-
-        """
-        self.text = text
-        self.font_size = font_size
-        self.style = style or {}
-        self.id = id
-        self.classes = classes
-        self.on_click = on_click
-
     def _format_style(self):
         """
-        Formats the style properties into a CSS string.
+        Formats the style properties into a CSS string, escaping keys and values.
 
         Returns:
             str: A string containing the formatted CSS style properties.
 
         """
+        if not self.style:
+            return f'font-size:{escape(self.font_size)}; {_DEFAULT_STYLE_TAIL}'
+        if _DEFAULT_KEYS.isdisjoint(self.style):
+            # Custom styles only add properties, so they follow the defaults.
+            return f'font-size:{escape(self.font_size)}; {_DEFAULT_STYLE_TAIL}; {format_style(self.style, ":")}'
         default_style = {
             'font-size': self.font_size,
             'line-height': '1.5em',
-            'font-family': r'&quot;Lato&quot;, &quot;Corbel&quot;, &quot;Avenir&quot;, &quot;Lucida Grande&quot;, &quot;Lucida Sans&quot;, sans-serif',
+            'font-family': _FONT_FAMILY,
     }
 
         merged_style = {**default_style, **self.style}
-        return '; '.join(f'{key}:{value}' for key, value in merged_style.items())
+        return format_style(merged_style, ':')
 
     def render(self):
         """
@@ -63,4 +67,4 @@ class Text(Widget):
 
         """
         style = self._format_style()
-        return f'<span id="{self.id}" class="{self.classes}" style="{style}">{self.text}</span>'
+        return f'<span id="{escape(self.id)}" class="{escape(self.classes)}" style="{style}">{escape(self.text)}</span>'
@@ -0,0 +1,76 @@
+"""
+ButterFlask-UI: build web interfaces from Python widgets.
+
+Every widget, formatter and integration is available from the top-level
+package and only loaded when first used, so `from butterflask import Text`
+imports nothing but the Text widget and the helpers it renders with:
+
+    from butterflask import Button, Row, freeze, render_document
+"""
+# Bound eagerly: importing any widget loads the `butterflask.Widget` module, which
+# would otherwise shadow the class of the same name. The module has no imports.
+from .Widget import Widget
+
+# Public name -> (module relative to this package, attribute in that module).
+_EXPORTS = {
+    'Button': ('.Widgets.Button', 'Button'),
+    'Card': ('.Widgets.Card', 'Card'),
+    'Center': ('.Widgets.Center', 'Center'),
+    'Column': ('.Widgets.Column', 'Column'),
+    'Image': ('.Widgets.Image', 'Image'),
+    'Page': ('.Widgets.Page', 'Page'),
+    'Row': ('.Widgets.Row', 'Row'),
+    'Text': ('.Widgets.Text', 'Text'),
+    'Markup': ('.markup', 'Markup'),
+    'escape': ('.markup', 'escape'),
+    'format_style': ('.style_formatter', 'format_style'),
+    'format_class_attr': ('.class_formatter', 'format_class_attr'),
+    'generate_js_code': ('.js_code_generator', 'generate_js_code'),
+    'generate_csrf_code': ('.js_code_generator', 'generate_csrf_code'),
+    'render_document': ('.document', 'render_document'),
+    'render_with_js': ('.document', 'render_with_js'),
+    'conditional_render': ('.fingerprint', 'conditional_render'),
+    'make_etag': ('.fingerprint', 'make_etag'),
+    'freeze': ('.frozen', 'freeze'),
+    'FrozenWidget': ('.frozen', 'FrozenWidget'),
+    'CachedFragment': ('.fragment_cache', 'CachedFragment'),
+    'MemoryFragmentCache': ('.fragment_cache', 'MemoryFragmentCache'),
+    'SQLiteFragmentCache': ('.fragment_cache', 'SQLiteFragmentCache'),
+    'RedisFragmentCache': ('.fragment_cache', 'RedisFragmentCache'),
+    'PreloadRegistry': ('.preload', 'PreloadRegistry'),
+    'lazy_sections': ('.sections', 'lazy_sections'),
+    'ImagePipeline': ('.images', 'ImagePipeline'),
+    'VariantsPending': ('.images', 'VariantsPending'),
+    'AssetInliner': ('.inlining', 'AssetInliner'),
+    'inline_assets': ('.inlining', 'inline_assets'),
+    'ServiceWorker': ('.service_worker', 'ServiceWorker'),
+    'DocumentBuilder': ('.document_builder', 'DocumentBuilder'),
+    'RenderPool': ('.offload', 'RenderPool'),
+    'profile_render': ('.profiling', 'profile_render'),
+    'ButterFlask': ('.integrations.flask', 'ButterFlask'),
+}
+
+# Submodules reachable as attributes, e.g. `butterflask.snapshot.load(...)`.
+_SUBMODULES = (
+    'document', 'document_builder', 'export', 'fingerprint', 'fragment_cache', 'frozen', 'images', 'inlining',
+    'integrations', 'markup', 'metrics', 'offload', 'prefetch', 'preload', 'profiling', 'sections', 'serializer',
+    'service_worker', 'snapshot', 'Widgets'
+)
+
+__all__ = ['Widget'] + list(_EXPORTS)
+
+
+def __getattr__(name: str):
+    if name in _EXPORTS:
+        module, attribute = _EXPORTS[name]
+        value = getattr(__import__(__name__ + module, fromlist=(attribute,)), attribute)
+    elif name in _SUBMODULES:
+        value = __import__(f'{__name__}.{name}', fromlist=('__name__',))
+    else:
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__) | set(_SUBMODULES))
@@ -1,5 +1,7 @@
 from typing import List
 
+from .markup import escape
+
 def format_class_attr(classes: List[str]) -> str:
     """
     Formats the classes as a string.
@@ -10,4 +12,6 @@ def format_class_attr(classes: List[str]) -> str:
     Returns:
         str: The formatted class attribute.
     """
-    return ' '.join(classes)
+    if not classes:
+        return ''
+    return ' '.join([escape(name) for name in classes])
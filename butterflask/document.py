@@ -0,0 +1,123 @@
+from typing import List, Sequence, Tuple
+
+from .inlining import inline_url
+from .markup import escape
+
+JQUERY_URL = 'https://code.jquery.com/jquery-3.7.0.min.js'
+
+BASE_CSS = 'body { margin: 0px; padding: 0%; }'
+
+
+def _js_lists(widget) -> List[List[str]]:
+    """
+    Collects the distinct `js` accumulator lists of a widget tree, in tree order.
+    """
+    seen = {}
+    pending = [widget]
+    while pending:
+        widget = pending.pop()
+        js = getattr(widget, 'js', None)
+        if isinstance(js, list) and id(js) not in seen:
+            seen[id(js)] = js
+        children = getattr(widget, 'children', None)
+        if children:
+            pending.extend(reversed(children))
+    return list(seen.values())
+
+
+def render_with_js(widget) -> Tuple[str, List[str]]:
+    """
+    Renders a widget tree and returns the JavaScript generated while rendering.
+
+    Widgets append their AJAX functions to the `js` lists they were given;
+    only the code appended by this render is returned. Code appended to
+    several lists, like the prefetch runtime, is returned once.
+
+    Args:
+        widget (Widget): The root of the widget tree, mutable or frozen.
+
+    Returns:
+        Tuple[str, List[str]]: The HTML and the generated JavaScript functions.
+    """
+    js_code = getattr(widget, 'js_code', None)
+    if callable(js_code):
+        return widget.render(), list(js_code())
+    lists = _js_lists(widget)
+    lengths = [len(js) for js in lists]
+    html = widget.render()
+    if len(lists) == 1:
+        return html, lists[0][lengths[0]:]
+    return html, list(dict.fromkeys(code for js, length in zip(lists, lengths) for code in js[length:]))
+
+
+def render_document(
+    body: str,
+    title: str = '',
+    js: str = '',
+    scripts: Sequence[str] = (JQUERY_URL,),
+    stylesheets: Sequence[str] = (),
+    head: str = ''
+) -> str:
+    """
+    Wraps rendered widgets in a complete HTML document.
+
+    The document matches the template from the README: a viewport meta tag,
+    jQuery, and the generated JavaScript after the body markup.
+
+    Args:
+        body (str): The rendered widget tree.
+        title (str, optional): The document title; it is escaped. Defaults to ''.
+        js (str, optional): Inline JavaScript to run after the body. Defaults to ''.
+        scripts (Sequence[str], optional): URLs of external scripts. Defaults to jQuery.
+            Inside an `inline_assets` block, small local ones are inlined as data URIs.
+        stylesheets (Sequence[str], optional): URLs of external stylesheets. Defaults to none.
+            Inside an `inline_assets` block, small local ones are inlined as data URIs.
+        head (str, optional): Extra markup for the head. Defaults to ''.
+
+    Returns:
+        str: The HTML document.
+    """
+    links = ''.join(f'<link rel="stylesheet" href="{escape(inline_url(href))}">' for href in stylesheets)
+    script_tags = ''.join(f'<script src="{escape(inline_url(src))}"></script>' for src in scripts)
+    body_style = '' if stylesheets else ' style="margin: 0px; padding: 0%;"'
+    inline_js = f'<script>{js}</script>' if js else ''
+    return (
+        '<!DOCTYPE html>\n<html>\n<head>\n'
+        '<meta charset="utf-8">\n'
+        '<meta name="viewport" content="width=device-width, initial-scale=1.0">\n'
+        f'{links}{script_tags}<title>{escape(title)}</title>{head}\n'
+        f'</head>\n<body{body_style}>\n{body}\n{inline_js}\n</body>\n</html>\n'
+    )
+
+
+_TITLE_MARKER = '\x00butterflask-title\x00'
+_BODY_MARKER = '\x00butterflask-body\x00'
+_JS_MARKER = '\x00butterflask-js\x00'
+
+
+def compile_document(
+    scripts: Sequence[str] = (JQUERY_URL,),
+    stylesheets: Sequence[str] = (),
+    head: str = ''
+) -> Tuple[str, str, str, str]:
+    """
+    Splits the document template into the static text around its variable parts.
+
+    Joining the parts with a title, a body and an inline script (in that
+    order) produces exactly what `render_document` returns, without
+    formatting the template again.
+
+    Args:
+        scripts (Sequence[str], optional): URLs of external scripts. Defaults to jQuery.
+        stylesheets (Sequence[str], optional): URLs of external stylesheets. Defaults to none.
+        head (str, optional): Extra markup for the head. Defaults to ''.
+
+    Returns:
+        Tuple[str, str, str, str]: The text before the title, between the title and the body,
+            between the body and the inline script, and after the inline script.
+    """
+    document = render_document(_BODY_MARKER, _TITLE_MARKER, _JS_MARKER, scripts, stylesheets, head)
+    before_title, rest = document.split(_TITLE_MARKER)
+    before_body, rest = rest.split(_BODY_MARKER)
+    before_js, after_js = rest.split(f'<script>{_JS_MARKER}</script>')
+    return before_title, before_body, before_js, after_js
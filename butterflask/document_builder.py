@@ -0,0 +1,512 @@
+"""
+Documents with critical CSS and resource hints.
+
+`render_document` links stylesheets and scripts in the head, so the browser
+downloads all of them before it paints anything, and only discovers the
+first images once it parses the body. A DocumentBuilder walks the widget
+tree before rendering it and plans the head around what is above the fold:
+everything up to and including the first `Page` section.
+
+- The rules of the local stylesheets that can match a widget above the fold
+  (by tag, class and id) are inlined as a critical `<style>` block, and the
+  full stylesheets are loaded without blocking rendering.
+- The first images above the fold, `background-image` URLs included, are
+  preloaded, as are the web fonts their text uses.
+- Scripts move to the end of the body, before the generated JavaScript, and
+  are preloaded from the head; cross-origin hosts get a `preconnect`.
+
+    builder = DocumentBuilder(stylesheets=['/static/site.css'], roots={'/static/': 'static'})
+    html = builder.render(ui, title='Home')
+    print(first_content_metrics(html, builder.resource_size))
+"""
+import os
+import re
+from html import unescape
+from html.parser import HTMLParser
+from typing import Callable, Dict, List, Optional, Sequence, Set, Tuple
+from urllib.parse import urljoin, urlsplit
+
+from .document import JQUERY_URL, render_with_js
+from .frozen import FrozenWidget
+from .inlining import AssetInliner, inline_url
+from .markup import escape
+from .Widgets.Text import _FONT_FAMILY as _TEXT_FONT_FAMILY
+
+# The element each widget renders as; the others render a div.
+_TAGS = {'Text': 'span', 'Button': 'button', 'Image': 'img'}
+
+_COMMENT = re.compile(r'/\*.*?\*/', re.S)
+_URL = re.compile(r'url\(\s*([\'"]?)(.*?)\1\s*\)')
+_PSEUDO = re.compile(r'::?[\w-]+(?:\([^)]*\))?')
+_ATTRIBUTE = re.compile(r'\[[^\]]*\]')
+_COMBINATOR = re.compile(r'\s*[>+~]\s*|\s+')
+_SIMPLE = re.compile(r'([.#]?)(-?[_a-zA-Z][\w-]*)')
+_SELECTOR_LIST = re.compile(r',(?![^(]*\))')
+_FONT_FAMILY = re.compile(r'font-family\s*:\s*([^;}]+)', re.I)
+_GROUPING_RULES = ('@media', '@supports', '@layer', '@container')
+
+# Elements that count as the first content; text counts too.
+_CONTENT_TAGS = frozenset(('img', 'svg', 'video', 'canvas', 'input', 'button', 'textarea', 'select', 'iframe'))
+_RAW_TAGS = frozenset(('script', 'style', 'title', 'noscript', 'template'))
+
+
+class AboveTheFold:
+    """
+    What the widgets up to and including the first Page section reference.
+
+    Attributes:
+        tags (Set[str]): The element names they render.
+        classes (Set[str]): Their classes.
+        ids (Set[str]): Their ids.
+        font_families (Set[str]): The font families of their inline styles, lowercased.
+        images (List[Tuple[str, str]]): Their image URLs, with the srcset of resized variants,
+            and background-image URLs, in document order.
+    """
+
+    def __init__(self):
+        self.tags: Set[str] = {'html', 'body'}
+        self.classes: Set[str] = set()
+        self.ids: Set[str] = set()
+        self.font_families: Set[str] = set()
+        self.images: List[Tuple[str, str]] = []
+
+    def add(self, widget) -> None:
+        name, values = _type(widget).__name__, _values(widget)
+        self.tags.add(_TAGS.get(name, 'div'))
+        classes = values.get('classes') or ()
+        self.classes.update(classes.split() if isinstance(classes, str) else classes)
+        if values.get('id'):
+            self.ids.add(str(values['id']))
+        if name == 'Image' and values.get('source'):
+            self.images.append(_image(values['source'], values.get('width')))
+        style = values.get('style') or {}
+        if name == 'Text' and 'font-family' not in style:
+            self.font_families.update(_TEXT_FAMILIES)
+        for key, value in style.items():
+            if key == 'font-family':
+                self.font_families.update(_families(value))
+            elif key.startswith('background'):
+                self.images.extend((url, '') for _, url in _URL.findall(str(value)))
+
+    def key(self) -> Tuple:
+        return frozenset(self.tags), frozenset(self.classes), frozenset(self.ids), frozenset(self.font_families)
+
+
+def _families(value: str) -> Set[str]:
+    return {family.strip().strip('"\'').lower() for family in unescape(str(value)).split(',') if family.strip()}
+
+
+# Text widgets use these fonts unless their style sets a font-family.
+_TEXT_FAMILIES = frozenset(_families(_TEXT_FONT_FAMILY))
+
+
+def _image(source: str, width: Optional[int]) -> Tuple[str, str]:
+    if width:
+        from . import images
+        if images.PIPELINE is not None:
+            resolved = images.PIPELINE.resolve(source, int(width))
+            if resolved is not None:
+                return resolved
+    return source, ''
+
+
+def above_the_fold(root) -> AboveTheFold:
+    """
+    Collects the widgets rendered up to and including the first Page section.
+
+    The whole tree is above the fold if it has no Page.
+
+    Args:
+        root (Widget): The root of the widget tree, mutable or frozen.
+
+    Returns:
+        AboveTheFold: What those widgets reference.
+    """
+    fold = AboveTheFold()
+    pending = [root]
+    page_found = False
+    while pending:
+        widget = pending.pop()
+        fold.add(widget)
+        children = reversed(getattr(widget, 'children', None) or ())
+        if not page_found and _is_page(widget):
+            # Only this section's subtree remains above the fold; a lazy section fetches it later.
+            page_found = True
+            pending = [] if _values(widget).get('lazy') else list(children)
+        else:
+            pending.extend(children)
+    return fold
+
+
+def _type(widget) -> type:
+    return widget.widget_type if isinstance(widget, FrozenWidget) else type(widget)
+
+
+def _values(widget) -> Dict:
+    return widget._values if isinstance(widget, FrozenWidget) else vars(widget)
+
+
+def _is_page(widget) -> bool:
+    return _type(widget).__name__ == 'Page'
+
+
+def _split_rules(css: str) -> List[Tuple[str, Optional[str]]]:
+    """
+    Splits a stylesheet into its top-level (prelude, block) pairs; statements like @import have no block.
+    """
+    rules = []
+    start = depth = 0
+    block_start = None
+    quote = None
+    index = 0
+    while index < len(css):
+        char = css[index]
+        if quote:
+            if char == '\\':
+                index += 1
+            elif char == quote:
+                quote = None
+        elif char in '"\'':
+            quote = char
+        elif char == '{':
+            if depth == 0:
+                block_start = index
+            depth += 1
+        elif char == '}' and depth:
+            depth -= 1
+            if depth == 0:
+                rules.append((css[start:block_start].strip(), css[block_start + 1:index]))
+                start = index + 1
+        elif char == ';' and depth == 0:
+            rules.append((css[start:index].strip(), None))
+            start = index + 1
+        index += 1
+    return [(prelude, block) for prelude, block in rules if prelude]
+
+
+def _selector_may_match(selector: str, fold: AboveTheFold) -> bool:
+    """
+    Whether a selector can match above the fold; pseudo-classes and attributes are assumed to match.
+    """
+    selector = _ATTRIBUTE.sub('', _PSEUDO.sub('', selector)).strip()
+    for compound in _COMBINATOR.split(selector):
+        for prefix, name in _SIMPLE.findall(compound):
+            if prefix == '.':
+                if name not in fold.classes:
+                    return False
+            elif prefix == '#':
+                if name not in fold.ids:
+                    return False
+            elif name.lower() not in fold.tags:
+                return False
+    return True
+
+
+def _critical_rules(rules: List[Tuple[str, Optional[str]]], fold: AboveTheFold, base: str) -> Tuple[List[str], Set[str]]:
+    """
+    Selects the rules that can apply above the fold.
+
+    Returns:
+        Tuple[List[str], Set[str]]: The rules, with URLs made absolute, and the font families they use.
+    """
+    critical = []
+    families = set()
+    for prelude, block in rules:
+        if block is None:
+            continue
+        if prelude.startswith('@'):
+            if prelude.split(None, 1)[0].lower() in _GROUPING_RULES:
+                inner, inner_families = _critical_rules(_split_rules(block), fold, base)
+                if inner:
+                    critical.append(f"{prelude}{{{''.join(inner)}}}")
+                    families |= inner_families
+            continue
+        selectors = [selector.strip() for selector in _SELECTOR_LIST.split(prelude)]
+        matching = [selector for selector in selectors if _selector_may_match(selector, fold)]
+        if matching:
+            critical.append(f"{','.join(matching)}{{{_absolute_urls(block.strip(), base)}}}")
+            for value in _FONT_FAMILY.findall(block):
+                families |= _families(value)
+    return critical, families
+
+
+def _font_faces(rules: List[Tuple[str, Optional[str]]], families: Set[str], base: str) -> Tuple[List[str], List[str]]:
+    """
+    Selects the @font-face rules of the used families.
+
+    Returns:
+        Tuple[List[str], List[str]]: The rules, and the URL of each face's first source.
+    """
+    faces = []
+    fonts = []
+    for prelude, block in rules:
+        if block is None or prelude.lower() != '@font-face':
+            continue
+        family = _FONT_FAMILY.search(block)
+        if family is None or not _families(family.group(1)) & families:
+            continue
+        faces.append(f'@font-face{{{_absolute_urls(block.strip(), base)}}}')
+        sources = [url for _, url in _URL.findall(block) if not url.startswith('data:')]
+        woff2 = [url for url in sources if url.split('?', 1)[0].endswith('.woff2')]
+        if woff2 or sources:
+            fonts.append(urljoin(base, (woff2 or sources)[0]))
+    return faces, fonts
+
+
+def _absolute_urls(css: str, base: str) -> str:
+    # Inlined rules resolve relative URLs against the document instead of the stylesheet.
+    return _URL.sub(lambda match: f'url("{urljoin(base, match.group(2))}")', css)
+
+
+def _origin(url: str) -> Optional[str]:
+    parts = urlsplit(url)
+    if parts.scheme in ('http', 'https') and parts.netloc:
+        return f'{parts.scheme}://{parts.netloc}'
+    return None
+
+
+class DocumentBuilder:
+    """
+    Renders widget trees as documents whose head is planned from the tree.
+
+    Attributes:
+        scripts (Tuple[str, ...]): URLs of external scripts. Defaults to jQuery.
+        stylesheets (Tuple[str, ...]): URLs of stylesheets. Local ones are split into critical
+            and deferred CSS; others stay render-blocking links.
+        head (str): Extra markup for the head.
+        preload_images (int): The number of above-the-fold images to preload.
+        defer_scripts (bool): Whether scripts move to the end of the body.
+    """
+
+    def __init__(
+        self,
+        scripts: Sequence[str] = (JQUERY_URL,),
+        stylesheets: Sequence[str] = (),
+        head: str = '',
+        roots: Optional[Dict[str, str]] = None,
+        preload_images: int = 2,
+        defer_scripts: bool = True
+    ):
+        """
+        Initializes a DocumentBuilder.
+
+        Args:
+            scripts (Sequence[str], optional): URLs of external scripts. Defaults to jQuery.
+            stylesheets (Sequence[str], optional): URLs of stylesheets. Defaults to none.
+            head (str, optional): Extra markup for the head. Defaults to ''.
+            roots (Dict[str, str], optional): URL prefixes and the directories they are served
+                from, for reading local stylesheets. Defaults to none.
+            preload_images (int, optional): The number of above-the-fold images to preload. Defaults to 2.
+            defer_scripts (bool, optional): Whether scripts move to the end of the body. Defaults to True.
+        """
+        self.scripts = tuple(scripts)
+        self.stylesheets = tuple(stylesheets)
+        self.head = head
+        self.preload_images = preload_images
+        self.defer_scripts = defer_scripts
+        self._files = AssetInliner(roots or {})
+        self._rules: Dict[str, Tuple[int, int, List]] = {}
+        self._critical: Dict[Tuple, Tuple[str, Tuple[str, ...]]] = {}
+
+    def resource_size(self, url: str) -> Optional[int]:
+        """
+        Returns the size of a local file, for `first_content_metrics`.
+
+        Args:
+            url (str): The resource URL.
+
+        Returns:
+            int: The file size, or None if the URL is not local.
+        """
+        path = self._files.path(url)
+        try:
+            return os.path.getsize(path) if path is not None else None
+        except OSError:
+            return None
+
+    def _stylesheet_rules(self, href: str) -> Optional[List]:
+        """
+        Parses a local stylesheet, memoized by its modification time and size.
+        """
+        path = self._files.path(href)
+        if path is None:
+            return None
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        memo = self._rules.get(path)
+        if memo is None or memo[0] != stat.st_mtime_ns or memo[1] != stat.st_size:
+            with open(path, encoding='utf-8') as stylesheet:
+                memo = (stat.st_mtime_ns, stat.st_size, _split_rules(_COMMENT.sub('', stylesheet.read())))
+            self._rules[path] = memo
+            self._critical.clear()
+        return memo[2]
+
+    def _critical_css(self, fold: AboveTheFold, local: List[str]) -> Tuple[str, Tuple[str, ...]]:
+        """
+        Returns the critical CSS of the local stylesheets and the fonts to preload, memoized per fold.
+        """
+        key = (tuple(local), fold.key())
+        cached = self._critical.get(key)
+        if cached is not None:
+            return cached
+        css = []
+        fonts = []
+        for href in local:
+            rules = self._stylesheet_rules(href)
+            critical, families = _critical_rules(rules, fold, href)
+            faces, face_fonts = _font_faces(rules, families | fold.font_families, href)
+            css += faces + critical
+            fonts += face_fonts
+        # A CSS escape, so the block cannot end the style element early.
+        cached = (''.join(css).replace('</', '<\\/'), tuple(dict.fromkeys(fonts)))
+        if len(self._critical) >= 256:
+            self._critical.clear()
+        self._critical[key] = cached
+        return cached
+
+    def render_head(self, root) -> Tuple[str, str]:
+        """
+        Plans the head of a document for a widget tree, without rendering the tree.
+
+        Args:
+            root (Widget): The root of the widget tree, mutable or frozen.
+
+        Returns:
+            Tuple[str, str]: The head markup (hints, critical CSS and stylesheets) and the
+            script tags, which belong at the end of the body when scripts are deferred.
+        """
+        fold = above_the_fold(root)
+        local = [href for href in self.stylesheets if self._stylesheet_rules(href) is not None]
+        critical, fonts = self._critical_css(fold, local) if local else ('', ())
+        images = [image for image in dict.fromkeys(fold.images) if not image[0].startswith('data:')][:self.preload_images]
+        scripts = [inline_url(src) for src in self.scripts]
+
+        origins = {}
+        for url in [*scripts, *self.stylesheets, *(src for src, _ in images)]:
+            origin = _origin(url)
+            if origin is not None:
+                origins.setdefault(origin, '')
+        for url in fonts:
+            origin = _origin(url)
+            if origin is not None:
+                origins[origin] = ' crossorigin'
+        hints = [f'<link rel="preconnect" href="{escape(origin)}"{crossorigin}>' for origin, crossorigin in origins.items()]
+        hints += [f'<link rel="preload" href="{escape(url)}" as="font" crossorigin>' for url in fonts]
+        hints += [
+            f'<link rel="preload" href="{escape(src)}" as="image"' + (f' imagesrcset="{escape(srcset)}">' if srcset else '>')
+            for src, srcset in images
+        ]
+        if self.defer_scripts:
+            hints += [f'<link rel="preload" href="{escape(src)}" as="script">' for src in scripts if not src.startswith('data:')]
+
+        styles = [f'<style>{critical}</style>'] if critical else []
+        for href in self.stylesheets:
+            if href in local:
+                styles.append(
+                    f'<link rel="preload" href="{escape(href)}" as="style" onload="this.onload=null;this.rel=\'stylesheet\'">'
+                    f'<noscript><link rel="stylesheet" href="{escape(href)}"></noscript>'
+                )
+            else:
+                styles.append(f'<link rel="stylesheet" href="{escape(inline_url(href))}">')
+        script_tags = ''.join(f'<script src="{escape(src)}"></script>' for src in scripts)
+        return ''.join(hints + styles), script_tags
+
+    def render(self, root, title: str = '') -> str:
+        """
+        Renders a widget tree as a complete HTML document.
+
+        Args:
+            root (Widget): The root of the widget tree, mutable or frozen.
+            title (str, optional): The document title; it is escaped. Defaults to ''.
+
+        Returns:
+            str: The HTML document.
+        """
+        head, script_tags = self.render_head(root)
+        body, js = render_with_js(root)
+        code = '\n'.join(js)
+        inline_js = f'<script>{code}</script>' if code else ''
+        head_scripts, body_scripts = ('', script_tags) if self.defer_scripts else (script_tags, '')
+        body_style = '' if self.stylesheets else ' style="margin: 0px; padding: 0%;"'
+        return (
+            '<!DOCTYPE html>\n<html>\n<head>\n'
+            '<meta charset="utf-8">\n'
+            '<meta name="viewport" content="width=device-width, initial-scale=1.0">\n'
+            f'{head}{head_scripts}<title>{escape(title)}</title>{self.head}\n'
+            f'</head>\n<body{body_style}>\n{body}\n{body_scripts}{inline_js}\n</body>\n</html>\n'
+        )
+
+
+class _FirstContentParser(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.position: Optional[Tuple[int, int]] = None
+        self.blocking: List[str] = []
+        self._raw = 0
+        self._in_body = False
+
+    def handle_starttag(self, tag, attrs):
+        if self.position is not None:
+            return
+        attributes = dict(attrs)
+        if tag == 'body':
+            self._in_body = True
+        elif tag in _RAW_TAGS:
+            if tag == 'script' and not self._raw and attributes.get('src') and not (
+                    'async' in attributes or 'defer' in attributes or attributes.get('type') == 'module'):
+                self.blocking.append(attributes['src'])
+            self._raw += 1
+        elif tag == 'link' and not self._raw:
+            rel = (attributes.get('rel') or '').lower().split()
+            if 'stylesheet' in rel and (attributes.get('media') or 'all') in ('all', 'screen') and attributes.get('href'):
+                self.blocking.append(attributes['href'])
+        elif tag in _CONTENT_TAGS and self._in_body and not self._raw:
+            self.position = self.getpos()
+
+    def handle_endtag(self, tag):
+        if tag in _RAW_TAGS and self._raw:
+            self._raw -= 1
+
+    def handle_data(self, data):
+        if self.position is None and self._in_body and not self._raw and data.strip():
+            self.position = self.getpos()
+
+
+def first_content_metrics(document: str, resource_size: Optional[Callable[[str], Optional[int]]] = None) -> Dict[str, int]:
+    """
+    Measures what a browser must download before it can paint the first content.
+
+    The first content is the first text or image-like element in the body.
+    Everything before it in the document, and every render-blocking script
+    and stylesheet referenced before it, has to arrive first.
+
+    Args:
+        document (str): The HTML document.
+        resource_size (Callable[[str], Optional[int]], optional): Returns the size of a resource
+            URL, or None if unknown. Data URIs are counted as part of the document.
+
+    Returns:
+        Dict[str, int]: 'html_bytes' before the first content, 'blocking_requests' and
+        'blocking_bytes' (of known sizes) of the render-blocking resources, and their sum
+        'bytes_before_first_content'.
+    """
+    parser = _FirstContentParser()
+    parser.feed(document)
+    parser.close()
+    if parser.position is None:
+        offset = len(document)
+    else:
+        line, column = parser.position
+        lines = document.split('\n', line - 1)
+        offset = sum(len(text) + 1 for text in lines[:line - 1]) + column
+    html_bytes = len(document[:offset].encode('utf-8'))
+    requests = [url for url in parser.blocking if not url.startswith('data:')]
+    blocking_bytes = sum((resource_size(url) or 0) if resource_size else 0 for url in requests)
+    return {
+        'html_bytes': html_bytes,
+        'blocking_requests': len(requests),
+        'blocking_bytes': blocking_bytes,
+        'bytes_before_first_content': html_bytes + blocking_bytes,
+    }
@@ -0,0 +1,280 @@
+"""
+Static site export.
+
+Renders every page of a PreloadRegistry to HTML files that a web server such
+as nginx can serve directly. Pages are rendered in parallel with a process
+pool, and only pages whose tree fingerprint changed since the last export are
+re-rendered. Generated JavaScript and the base stylesheet are written as
+content-hashed bundles, and every file gets a precompressed `.gz` variant
+(plus `.br` when the `brotli` package is installed). With `--inline-bytes`,
+small local scripts, stylesheets and images are inlined as data URIs, and
+the manifest records the requests and bytes this saved on every page. With
+`--service-worker`, a service worker precaching the bundles is written and
+registered by every page.
+
+Usage:
+    python -m butterflask.export myapp.pages:registry ./public [-j 8] [--force]
+        [--inline-bytes 4096 --static-dir ./static] [--service-worker]
+"""
+import argparse
+import gzip
+import hashlib
+import importlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+from .document import BASE_CSS, JQUERY_URL, render_document, render_with_js
+from .fingerprint import fingerprint
+from .inlining import AssetInliner, inline_assets
+from .preload import PreloadRegistry
+from .service_worker import ServiceWorker, get_routes
+
+MANIFEST_NAME = '.butterflask-manifest.json'
+ASSETS_DIR = 'assets'
+
+# The registry the pool workers build pages from and the inliner they render
+# with, inherited through the pool initializer.
+_registry: Optional[PreloadRegistry] = None
+_inliner: Optional[AssetInliner] = None
+
+
+def _init_worker(registry: PreloadRegistry, inliner: Optional[AssetInliner] = None) -> None:
+    global _registry, _inliner
+    _registry = registry
+    _inliner = inliner
+
+
+def _write(path: str, data: bytes, compress: bool) -> List[str]:
+    """
+    Atomically writes a file and its precompressed variants.
+
+    Returns:
+        List[str]: The paths written.
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    variants = [(path, data)]
+    if compress:
+        variants.append((path + '.gz', gzip.compress(data, compresslevel=9, mtime=0)))
+        if brotli is not None:
+            variants.append((path + '.br', brotli.compress(data)))
+    for target, content in variants:
+        temporary = f'{target}.{os.getpid()}.tmp'
+        with open(temporary, 'wb') as output:
+            output.write(content)
+        os.replace(temporary, target)
+    return [target for target, _ in variants]
+
+
+def _content_hash(data: bytes) -> str:
+    return hashlib.blake2b(data, digest_size=8).hexdigest()
+
+
+def route_to_path(route: str) -> str:
+    """
+    Maps a route to the HTML file that serves it.
+
+    Args:
+        route (str): The URL route, e.g. '/' or '/about'.
+
+    Returns:
+        str: The relative file path, e.g. 'index.html' or 'about/index.html'.
+    """
+    route = route.strip('/')
+    if not route:
+        return 'index.html'
+    if route.endswith('.html'):
+        return route
+    return f'{route}/index.html'
+
+
+def _export_page(
+    name: str,
+    previous: Optional[str],
+    out_dir: str,
+    stylesheet: str,
+    title: str,
+    compress: bool,
+    head: str = ''
+) -> Tuple[str, str, Optional[Dict]]:
+    """
+    Builds one page and renders it if its fingerprint changed.
+
+    Runs inside a pool worker.
+
+    Returns:
+        Tuple[str, str, Optional[Dict]]: The page name, its fingerprint and its
+        manifest entry, or None if the page was unchanged.
+    """
+    tree = _registry.builder(name)()
+    digest = fingerprint(tree)
+    if digest == previous:
+        return name, digest, None
+    with inline_assets(_inliner) if _inliner is not None else nullcontext() as inlined:
+        html, js = render_with_js(tree)
+        scripts = [JQUERY_URL]
+        bundle = None
+        js_code = '\n'.join(code for code in js if code.strip())
+        if js_code:
+            data = js_code.encode('utf-8')
+            bundle = f'{ASSETS_DIR}/{_content_hash(data)}.js'
+            if not os.path.exists(os.path.join(out_dir, bundle)):
+                _write(os.path.join(out_dir, bundle), data, compress)
+            scripts.append(f'/{bundle}')
+        document = render_document(html, title=title, scripts=scripts, stylesheets=[f'/{stylesheet}'], head=head)
+    page = route_to_path(name)
+    _write(os.path.join(out_dir, page), document.encode('utf-8'), compress)
+    entry = {'fingerprint': digest, 'file': page, 'js': bundle}
+    if head:
+        entry['routes'] = get_routes(tree)
+    if inlined is not None:
+        entry['inlined'] = inlined.as_dict()
+    return name, digest, entry
+
+
+def _write_service_worker(out_dir: str, stylesheet: str, pages: Dict[str, Dict], compress: bool) -> None:
+    """
+    Writes the service worker for the exported pages, precaching jQuery and every bundle.
+    """
+    precache = [JQUERY_URL, f'/{stylesheet}'] + [f"/{entry['js']}" for entry in pages.values() if entry['js']]
+    paths = []
+    routes = set()
+    for name, entry in pages.items():
+        if name.startswith('/'):
+            paths.append(name)
+            # Web servers serve 'about/index.html' at '/about/' as well.
+            if entry['file'].endswith('/index.html'):
+                paths.append(name.rstrip('/') + '/')
+        routes.update(entry.get('routes', ()))
+    worker = ServiceWorker(precache, paths, routes)
+    _write(os.path.join(out_dir, worker.url.lstrip('/')), worker.script().encode('utf-8'), compress)
+
+
+def export_site(
+    registry: PreloadRegistry,
+    out_dir: str,
+    processes: Optional[int] = None,
+    title: str = '',
+    compress: bool = True,
+    force: bool = False,
+    inliner: Optional[AssetInliner] = None,
+    service_worker: bool = False
+) -> Dict:
+    """
+    Renders every registered page to static HTML files.
+
+    Page builders run in a process pool. With the default fork start method
+    the registry is inherited by the workers; with spawn it is pickled, so the
+    builders must then be module-level functions.
+
+    Args:
+        registry (PreloadRegistry): The registry of routes and their page builders.
+        out_dir (str): The directory to write the site to.
+        processes (int, optional): The number of worker processes. Defaults to the CPU count.
+        title (str, optional): The title of every page. Defaults to ''.
+        compress (bool, optional): Whether to write precompressed variants. Defaults to True.
+        force (bool, optional): Whether to re-render unchanged pages. Defaults to False.
+        inliner (AssetInliner, optional): Inlines small local assets as data URIs. Its roots may
+            include '/' mapped to `out_dir` to inline the bundles. Pages are not re-rendered when
+            only an inlined file changed; use `force`. Defaults to None.
+        service_worker (bool, optional): Whether to write a service worker that precaches the
+            bundles and serves the pages and their GET routes stale-while-revalidate, and to
+            register it on every page. Defaults to False.
+
+    Returns:
+        Dict: The names of the 'rendered' and 'skipped' pages, and under 'inlined' the
+        requests and bytes saved on each rendered page that inlined assets.
+    """
+    manifest_path = os.path.join(out_dir, MANIFEST_NAME)
+    manifest = {'pages': {}}
+    if not force and os.path.exists(manifest_path):
+        with open(manifest_path) as manifest_file:
+            manifest = json.load(manifest_file)
+    previous_pages = manifest.get('pages', {})
+
+    css = BASE_CSS.encode('utf-8')
+    stylesheet = f'{ASSETS_DIR}/{_content_hash(css)}.css'
+    if not os.path.exists(os.path.join(out_dir, stylesheet)):
+        _write(os.path.join(out_dir, stylesheet), css, compress)
+    settings = {'stylesheet': stylesheet, 'title': title, 'compress': compress,
+                'inline': [inliner.max_bytes, inliner.roots] if inliner is not None else None,
+                'service_worker': service_worker}
+    if manifest.get('settings') != settings:
+        # The shell around every page changed, so nothing can be reused.
+        previous_pages = {}
+
+    def previous_fingerprint(name):
+        entry = previous_pages.get(name)
+        if entry is None or not os.path.exists(os.path.join(out_dir, entry['file'])):
+            return None
+        return entry['fingerprint']
+
+    head = ServiceWorker().registration() if service_worker else ''
+    names = [name for name, _ in registry.pages()]
+    report = {'rendered': [], 'skipped': [], 'inlined': {}}
+    pages = {}
+    with ProcessPoolExecutor(processes, initializer=_init_worker, initargs=(registry, inliner)) as pool:
+        futures = [
+            pool.submit(_export_page, name, previous_fingerprint(name), out_dir, stylesheet, title, compress, head)
+            for name in names
+        ]
+        for future in futures:
+            name, digest, entry = future.result()
+            if entry is None:
+                pages[name] = previous_pages[name]
+                report['skipped'].append(name)
+            else:
+                pages[name] = entry
+                report['rendered'].append(name)
+                if entry.get('inlined', {}).get('requests_saved'):
+                    report['inlined'][name] = entry['inlined']
+
+    if service_worker:
+        _write_service_worker(out_dir, stylesheet, pages, compress)
+    manifest = {'settings': settings, 'pages': pages}
+    _write(manifest_path, json.dumps(manifest, indent=2, sort_keys=True).encode('utf-8'), False)
+    return report
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog='python -m butterflask.export',
+        description='Render the pages of a PreloadRegistry to static HTML files.'
+    )
+    parser.add_argument('registry', help="the registry to export, as 'module:attribute'")
+    parser.add_argument('out_dir', help='the directory to write the site to')
+    parser.add_argument('-j', '--processes', type=int, default=None, help='number of worker processes')
+    parser.add_argument('--title', default='', help='the title of every page')
+    parser.add_argument('--force', action='store_true', help='re-render pages even if unchanged')
+    parser.add_argument('--no-compress', action='store_true', help='skip precompressed variants')
+    parser.add_argument('--inline-bytes', type=int, default=0,
+                        help='inline local assets up to this size as data URIs')
+    parser.add_argument('--static-dir', help="the directory served at '/static/', for inlining")
+    parser.add_argument('--service-worker', action='store_true', help='write and register a service worker')
+    args = parser.parse_args(argv)
+
+    module_name, _, attribute = args.registry.partition(':')
+    registry = getattr(importlib.import_module(module_name), attribute or 'registry')
+    inliner = None
+    if args.inline_bytes:
+        roots = {'/': args.out_dir}
+        if args.static_dir:
+            roots['/static/'] = args.static_dir
+        inliner = AssetInliner(roots, args.inline_bytes)
+    report = export_site(registry, args.out_dir, args.processes, args.title, not args.no_compress, args.force,
+                         inliner, args.service_worker)
+    print(f"rendered {len(report['rendered'])} page(s), skipped {len(report['skipped'])} unchanged")
+    for name, inlined in report['inlined'].items():
+        print(f"{name}: inlined {inlined['requests_saved']} request(s), "
+              f"{inlined['bytes_saved']} bytes as {inlined['bytes_inlined']} bytes of data URIs")
+
+
+if __name__ == '__main__':
+    main()
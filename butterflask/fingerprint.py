@@ -0,0 +1,312 @@
+import hashlib
+import marshal
+from operator import itemgetter
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .inlining import _ACTIVE
+
+# Attributes that do not affect the rendered markup of a widget. `js` is the
+# shared accumulator that widgets append generated code to while rendering.
+_IGNORED_ATTRS = frozenset(('children', 'js'))
+
+
+def _freeze_value(value: Any) -> Any:
+    """
+    Converts a widget attribute into a hashable, comparable value.
+
+    Styles map strings to strings and classes are lists of strings, so one
+    level of conversion is enough.
+
+    Args:
+        value (Any): The attribute value.
+
+    Returns:
+        Any: A tuple-based equivalent of the value.
+    """
+    value_type = type(value)
+    if value_type is dict:
+        return tuple(value.items())
+    if value_type is list:
+        return tuple(value)
+    return value
+
+
+def _own_state(attrs: Dict[str, Any]) -> Tuple:
+    """
+    Collects the attributes of a single widget, excluding its children.
+
+    Args:
+        attrs (Dict[str, Any]): The widget's instance attributes.
+
+    Returns:
+        Tuple: The widget's own state as a tuple of (name, value) pairs.
+    """
+    return tuple([
+        (key, value if type(value) is str else _freeze_value(value))
+        for key, value in attrs.items()
+        if key[0] != '_' and key not in _IGNORED_ATTRS
+    ])
+
+
+def _own_attrs(attrs: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Copies a widget's instance attributes, dropping children, js and private attributes.
+
+    Args:
+        attrs (Dict[str, Any]): The widget's instance attributes.
+
+    Returns:
+        Dict[str, Any]: The attributes that affect the widget's own markup.
+    """
+    own = attrs.copy()
+    own.pop('children', None)
+    own.pop('js', None)
+    for key in [key for key in own if key[0] == '_']:
+        del own[key]
+    return own
+
+
+# State outside a widget's attributes that its markup depends on, by widget class.
+# Each function takes the widget's attributes and returns a marshal-able value;
+# ImagePipeline.install() registers one for Image.
+_EXTERNAL_STATE: Dict[type, Callable[[Dict[str, Any]], Any]] = {}
+
+# (widget class, attribute names) -> (class name, own attribute names, getter of their values).
+_LAYOUTS: Dict[Tuple[type, Tuple[str, ...]], Tuple[str, Tuple[str, ...], Callable]] = {}
+_MAX_LAYOUTS = 4096
+
+# Marks a frozen subtree, which contributes its own fingerprint.
+_FROZEN = '\x00frozen'
+
+
+def _stable(value: Any) -> Any:
+    """
+    Converts a value marshal cannot store into one it can, keeping what
+    affects rendering and nothing that differs between processes.
+
+    Raises:
+        TypeError: For values without a stable representation.
+    """
+    value_type = type(value)
+    if value_type in (str, int, float, bool, type(None)):
+        return value
+    if isinstance(value, str):
+        # Trusted markup renders differently from the same text.
+        return ('\x00html', str(value)) if hasattr(value, '__html__') else str(value)
+    if isinstance(value, dict):
+        return {_stable(key): _stable(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_stable(item) for item in value]
+    if isinstance(value, (set, frozenset)):
+        return sorted(_stable(item) for item in value)
+    if callable(value) and hasattr(value, '__qualname__'):
+        return ('\x00callable', getattr(value, '__module__', None), value.__qualname__)
+    raise TypeError(f'cannot fingerprint a value of type {value_type.__name__}')
+
+
+def _layout(widget_type: type, names: Tuple[str, ...]) -> Tuple[str, Tuple[str, ...], Callable]:
+    """
+    Returns the class name, own attribute names and a getter of their values
+    for widgets of a class with the given attribute names.
+    """
+    own = tuple(name for name in names if name[0] != '_' and name not in _IGNORED_ATTRS)
+    if len(own) > 1:
+        getter = itemgetter(*own)
+    elif own:
+        name = own[0]
+        getter = lambda attrs: (attrs[name],)
+    else:
+        getter = lambda attrs: ()
+    layout = (f'{widget_type.__module__}.{widget_type.__qualname__}', own, getter)
+    if len(_LAYOUTS) >= _MAX_LAYOUTS:
+        _LAYOUTS.clear()
+    _LAYOUTS[widget_type, names] = layout
+    return layout
+
+
+def _append_state(parts: List[Any], seen: Dict[Tuple, Tuple[int, Callable]], widget_type: type,
+                  attrs: Dict[str, Any]) -> None:
+    """
+    Appends the class and own attribute values of one widget to a flat list.
+
+    The class and attribute names of each layout are written once per list
+    and referred to by number afterwards, so they are not hashed per widget.
+    """
+    key = (widget_type, tuple(attrs))
+    entry = seen.get(key)
+    if entry is None:
+        name, own, getter = _LAYOUTS.get(key) or _layout(*key)
+        entry = seen[key] = (len(seen), getter)
+        parts.append(name)
+        parts.append(own)
+    parts.append(entry[0])
+    parts.append(entry[1](attrs))
+    external = _EXTERNAL_STATE.get(widget_type)
+    if external is not None:
+        parts.append(external(attrs))
+
+
+def _encode(parts: List[Any]) -> bytes:
+    try:
+        # Format version 0 never depends on string interning or reference
+        # counts, so equal states always serialize to equal bytes.
+        return marshal.dumps(parts, 0)
+    except ValueError:
+        # Markup, callables and other values marshal does not store.
+        return marshal.dumps(_stable(parts), 0)
+
+
+def serialize_state(widget_type: type, attrs: Dict[str, Any], child_digests: Tuple[str, ...]) -> bytes:
+    """
+    Flattens the state of one widget whose children are summarized by their fingerprints.
+
+    Args:
+        widget_type (type): The widget class.
+        attrs (Dict[str, Any]): The widget's attributes; children, js and private ones are skipped.
+        child_digests (Tuple[str, ...]): The fingerprints of the widget's children.
+
+    Returns:
+        bytes: The state in the form fingerprint() hashes, so a frozen widget
+        and a mutable one with the same frozen children get the same digest.
+    """
+    parts: List[Any] = []
+    _append_state(parts, {}, widget_type, attrs)
+    parts.append(len(child_digests))
+    for digest in child_digests:
+        parts.append(_FROZEN)
+        parts.append(digest)
+    return _encode(parts)
+
+
+def hash_state(data: bytes) -> str:
+    """
+    Hashes serialized state into a fingerprint.
+
+    Args:
+        data (bytes): The serialized state.
+
+    Returns:
+        str: A hex digest of the state.
+    """
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def fingerprint(widget) -> str:
+    """
+    Computes a fingerprint of a widget tree without rendering it.
+
+    The fingerprint covers the type, attributes, styles and children of every
+    widget. The tree is flattened into one list in a single walk and hashed
+    once, so a freshly built tree costs less to fingerprint than to render.
+    Frozen subtrees carry their fingerprint and contribute it as it is.
+
+    Args:
+        widget (Widget): The root of the widget tree, mutable or frozen.
+
+    Returns:
+        str: A hex digest that changes whenever the rendered output would.
+
+    Raises:
+        TypeError: If an attribute holds a value without a stable representation.
+    """
+    if not hasattr(widget, '__dict__'):
+        # Frozen trees are immutable and carry their digest with them.
+        return widget._fingerprint
+    parts: List[Any] = []
+    append = parts.append
+    seen: Dict[Tuple, Tuple[int, Callable]] = {}
+    pending = [widget]
+    while pending:
+        widget = pending.pop()
+        try:
+            attrs = widget.__dict__
+        except AttributeError:
+            append(_FROZEN)
+            append(widget._fingerprint)
+            continue
+        # _append_state, inlined: this loop runs once per widget of the tree.
+        widget_type = type(widget)
+        key = (widget_type, tuple(attrs))
+        entry = seen.get(key)
+        if entry is None:
+            name, own, getter = _LAYOUTS.get(key) or _layout(*key)
+            entry = seen[key] = (len(seen), getter)
+            append(name)
+            append(own)
+        append(entry[0])
+        append(entry[1](attrs))
+        external = _EXTERNAL_STATE.get(widget_type)
+        if external is not None:
+            append(external(attrs))
+        children = attrs.get('children')
+        if children:
+            append(len(children))
+            pending.extend(reversed(children))
+        else:
+            append(0)
+    return hash_state(_encode(parts))
+
+
+def make_etag(widget) -> str:
+    """
+    Builds a strong ETag header value from the fingerprint of a widget tree.
+
+    Args:
+        widget (Widget): The root of the widget tree.
+
+    Returns:
+        str: The quoted ETag value.
+    """
+    return f'"{fingerprint(widget)}"'
+
+
+def etag_matches(etag: str, if_none_match: Optional[str]) -> bool:
+    """
+    Checks whether an ETag satisfies the client's If-None-Match header.
+
+    Args:
+        etag (str): The quoted ETag of the current response.
+        if_none_match (str, optional): The raw If-None-Match header value.
+
+    Returns:
+        bool: True if the client already holds the current representation.
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == '*':
+        return True
+    for candidate in if_none_match.split(','):
+        candidate = candidate.strip()
+        if candidate.startswith('W/'):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+def conditional_render(widget, if_none_match: Optional[str] = None) -> Tuple[int, str, str]:
+    """
+    Renders a widget tree unless the client's cached copy is still current.
+
+    The ETag is computed from the tree fingerprint, so a matching
+    If-None-Match header short-circuits before render() is called. Lazy
+    sections are registered either way, as the client fetches them. Inside
+    an `inline_assets` block, whose files the fingerprint does not cover,
+    the tree is always rendered and the ETag is empty.
+
+    Args:
+        widget (Widget): The root of the widget tree.
+        if_none_match (str, optional): The raw If-None-Match header value.
+
+    Returns:
+        Tuple[int, str, str]: The status code (200 or 304), the rendered HTML
+        (empty for 304) and the ETag, if any.
+    """
+    if _ACTIVE.get() is not None:
+        return 200, widget.render(), ''
+    etag = make_etag(widget)
+    if etag_matches(etag, if_none_match):
+        from .sections import register_sections
+        register_sections(widget)
+        return 304, '', etag
+    return 200, widget.render(), etag
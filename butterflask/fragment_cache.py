@@ -0,0 +1,340 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Dict, Optional, Tuple
+
+from .Widget import Widget
+from .fingerprint import fingerprint
+from .inlining import _ACTIVE
+
+if TYPE_CHECKING:
+    import sqlite3
+
+# The number of least recently used fragments SQLiteFragmentCache inspects per eviction statement.
+_EVICTION_BATCH = 64
+
+# SQLiteFragmentCache records a read of a fragment at most this often, in seconds,
+# so a fragment read on every request costs one write per interval, not one per hit.
+_TOUCH_INTERVAL = 60.0
+
+
+def _generates_js(widget) -> bool:
+    """
+    Checks whether rendering a subtree appends generated JavaScript.
+
+    Such subtrees have side effects on their `js` lists and are therefore
+    always rendered directly instead of being served from a cache.
+
+    Args:
+        widget (Widget): The root of the subtree.
+
+    Returns:
+        bool: True if any widget in the subtree generates AJAX code.
+    """
+    if getattr(widget, 'js', None) and getattr(widget, 'route', None):
+        return True
+    return any(_generates_js(child) for child in getattr(widget, 'children', None) or ())
+
+
+class FragmentCache:
+    """
+    Base class for caches of rendered widget subtrees.
+
+    Entries are content-addressed: the key is the fingerprint of the subtree,
+    so a stored fragment never goes stale and never needs invalidation.
+
+    Attributes:
+        hits (int): Number of lookups that found a fragment.
+        misses (int): Number of lookups that did not find a fragment.
+        evictions (int): Number of fragments dropped to stay within the size limit.
+
+    Methods:
+        get(key): Returns the fragment stored under a key, or None.
+        set(key, value): Stores a fragment under a key.
+        render(widget): Renders a subtree through the cache.
+    """
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._stats_lock = threading.Lock()
+
+    def _record(self, counter: str, amount: int = 1) -> None:
+        """
+        Increments one of the hit, miss and eviction counters, thread-safely.
+        """
+        with self._stats_lock:
+            setattr(self, counter, getattr(self, counter) + amount)
+
+    def get(self, key: str) -> Optional[str]:
+        raise NotImplementedError
+
+    def set(self, key: str, value: str) -> None:
+        raise NotImplementedError
+
+    def render(self, widget) -> str:
+        """
+        Renders a subtree, reusing a cached fragment when one exists.
+
+        Inside an `inline_assets` block the subtree is rendered directly: its
+        fingerprint does not cover the files that are inlined.
+
+        Args:
+            widget (Widget): The root of the subtree.
+
+        Returns:
+            str: The HTML representation of the subtree.
+        """
+        if _ACTIVE.get() is not None or _generates_js(widget):
+            return widget.render()
+        key = fingerprint(widget)
+        html = self.get(key)
+        if html is not None:
+            self._record('hits')
+            return html
+        self._record('misses')
+        html = widget.render()
+        self.set(key, html)
+        return html
+
+
+class MemoryFragmentCache(FragmentCache):
+    """
+    A size-bounded, least-recently-used fragment cache local to one process.
+
+    Attributes:
+        max_bytes (int): The maximum total size of the stored fragments.
+    """
+
+    def __init__(self, max_bytes: int = 16 * 1024 * 1024):
+        super().__init__()
+        self.max_bytes = max_bytes
+        self._entries: 'OrderedDict[str, str]' = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: str) -> None:
+        with self._lock:
+            if key in self._entries:
+                return
+            self._entries[key] = value
+            self._size += len(value)
+            while self._size > self.max_bytes and self._entries:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+                self._record('evictions')
+
+
+class SQLiteFragmentCache(FragmentCache):
+    """
+    A fragment cache shared by every worker process on one host.
+
+    The store is a SQLite database in write-ahead-log mode, so readers never
+    block each other or the writer. Like the memory and Redis caches, it
+    evicts the least recently used fragments: a read records its time, at
+    most once per fragment every `_TOUCH_INTERVAL` seconds. The total UTF-8
+    size of the fragments is kept in a metadata row; when it exceeds
+    `max_bytes`, the fragments read longest ago are evicted.
+
+    Attributes:
+        path (str): The path of the database file.
+        max_bytes (int): The maximum total size of the stored fragments.
+    """
+
+    def __init__(self, path: str, max_bytes: int = 64 * 1024 * 1024):
+        super().__init__()
+        self.path = path
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        connection = self._connection()
+        with connection:
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS fragments ('
+                'key TEXT PRIMARY KEY, value TEXT NOT NULL, '
+                'size INTEGER NOT NULL, created REAL NOT NULL, accessed REAL NOT NULL DEFAULT 0)'
+            )
+            columns = [row[1] for row in connection.execute('PRAGMA table_info(fragments)')]
+            if 'accessed' not in columns:
+                # Databases written before reads were recorded start from their creation times.
+                connection.execute('ALTER TABLE fragments ADD COLUMN accessed REAL NOT NULL DEFAULT 0')
+                connection.execute('UPDATE fragments SET accessed = created')
+            connection.execute('DROP INDEX IF EXISTS fragments_created')
+            connection.execute('CREATE INDEX IF NOT EXISTS fragments_accessed ON fragments (accessed)')
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS fragments_meta (name TEXT PRIMARY KEY, value INTEGER NOT NULL)'
+            )
+            connection.execute(
+                "INSERT OR IGNORE INTO fragments_meta (name, value) "
+                "SELECT 'bytes', COALESCE(SUM(size), 0) FROM fragments"
+            )
+
+    def _connection(self) -> 'sqlite3.Connection':
+        """
+        Returns a connection owned by the current thread and process.
+
+        Connections are never shared across threads or inherited across fork.
+        """
+        connection = getattr(self._local, 'connection', None)
+        if connection is None or self._local.pid != os.getpid():
+            import sqlite3
+
+            connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+    def get(self, key: str) -> Optional[str]:
+        connection = self._connection()
+        row = connection.execute('SELECT value, accessed FROM fragments WHERE key = ?', (key,)).fetchone()
+        if row is None:
+            return None
+        now = time.time()
+        if now - row[1] >= _TOUCH_INTERVAL:
+            connection.execute('UPDATE fragments SET accessed = ? WHERE key = ?', (now, key))
+        return row[0]
+
+    def set(self, key: str, value: str) -> None:
+        size = len(value.encode('utf-8'))
+        connection = self._connection()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            now = time.time()
+            inserted = connection.execute(
+                'INSERT OR IGNORE INTO fragments (key, value, size, created, accessed) VALUES (?, ?, ?, ?, ?)',
+                (key, value, size, now, now)
+            ).rowcount
+            if inserted:
+                connection.execute("UPDATE fragments_meta SET value = value + ? WHERE name = 'bytes'", (size,))
+                total = connection.execute("SELECT value FROM fragments_meta WHERE name = 'bytes'").fetchone()[0]
+                if total > self.max_bytes:
+                    self._evict(connection, total)
+            connection.execute('COMMIT')
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+
+    def _evict(self, connection: 'sqlite3.Connection', total: int) -> None:
+        """
+        Deletes the least recently used fragments until the store fits within `max_bytes`.
+
+        Their sizes are read in small batches through the index on `accessed`,
+        and each batch is deleted with one statement.
+        """
+        while total > self.max_bytes:
+            sizes = [size for size, in connection.execute(
+                'SELECT size FROM fragments ORDER BY accessed, rowid LIMIT ?', (_EVICTION_BATCH,)
+            )]
+            if not sizes:
+                break
+            count = freed = 0
+            for size in sizes:
+                if total - freed <= self.max_bytes:
+                    break
+                count += 1
+                freed += size
+            connection.execute(
+                'DELETE FROM fragments WHERE key IN (SELECT key FROM fragments ORDER BY accessed, rowid LIMIT ?)',
+                (count,)
+            )
+            total -= freed
+            connection.execute("UPDATE fragments_meta SET value = ? WHERE name = 'bytes'", (total,))
+            self._record('evictions', count)
+
+
+class RedisFragmentCache(FragmentCache):
+    """
+    A fragment cache stored in Redis or any server speaking its protocol.
+
+    Size bounds are enforced by the server's `maxmemory` policy; `ttl` lets
+    unused fragments expire on their own.
+
+    Attributes:
+        client: A client exposing `get(key)` and `set(key, value, ex=None)`, such as `redis.Redis`.
+        prefix (str): The prefix prepended to every key.
+        ttl (int, optional): The lifetime of a fragment in seconds.
+    """
+
+    def __init__(self, client, prefix: str = 'butterflask:fragment:', ttl: Optional[int] = None):
+        super().__init__()
+        self.client = client
+        self.prefix = prefix
+        self.ttl = ttl
+
+    def get(self, key: str) -> Optional[str]:
+        value = self.client.get(self.prefix + key)
+        if value is None:
+            return None
+        return value.decode('utf-8') if isinstance(value, bytes) else value
+
+    def set(self, key: str, value: str) -> None:
+        self.client.set(self.prefix + key, value.encode('utf-8'), ex=self.ttl)
+
+
+class LocalRedis:
+    """
+    An in-process stand-in for a Redis client, for tests and local development.
+
+    Only the commands used by RedisFragmentCache are implemented.
+    """
+
+    def __init__(self):
+        self._data: Dict[str, Tuple[bytes, Optional[float]]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            value, expires = entry
+            if expires is not None and expires <= time.monotonic():
+                del self._data[key]
+                return None
+            return value
+
+    def set(self, key: str, value: bytes, ex: Optional[int] = None) -> bool:
+        with self._lock:
+            expires = time.monotonic() + ex if ex else None
+            self._data[key] = (value, expires)
+            return True
+
+    def delete(self, *keys: str) -> int:
+        with self._lock:
+            return sum(self._data.pop(key, None) is not None for key in keys)
+
+
+class CachedFragment(Widget):
+    """
+    A widget that renders its child through a fragment cache.
+
+    Wrap static subtrees that are expensive to render and shared between pages
+    or requests. Subtrees that generate AJAX code are always rendered directly.
+
+    Attributes:
+        child (Widget): The subtree to cache.
+        cache (FragmentCache): The cache to render through.
+    """
+
+    def __init__(self, child: Widget, cache: FragmentCache):
+        super().__init__(children=[child])
+        self._cache = cache
+
+    def render(self) -> str:
+        """
+        Renders the child, reusing a cached fragment when one exists.
+
+        Returns:
+            str: The HTML representation of the child.
+        """
+        return self._cache.render(self.children[0])
@@ -0,0 +1,273 @@
+from typing import Any, Dict, Iterable, Tuple
+
+from . import images
+from .fingerprint import _own_attrs, _own_state, hash_state, serialize_state
+from .inlining import _ACTIVE, InlineReport
+
+# Placeholder rendered in place of the children while capturing a widget's own markup.
+_CHILDREN_MARKER = '\x00butterflask:children\x00'
+
+
+class _ChildrenMarker:
+    def render(self) -> str:
+        return _CHILDREN_MARKER
+
+
+class _AssetProbe:
+    """
+    Stands in for an AssetInliner while markup is captured: it inlines
+    nothing and notes whether the markup references an asset URL.
+    """
+
+    # Nothing is linked instead of inlined.
+    _repeated = frozenset()
+
+    def __init__(self):
+        self.referenced = False
+
+    def data_uri(self, url: str) -> Tuple[None, int]:
+        self.referenced = True
+        return None, 0
+
+
+def _copy_value(value: Any) -> Any:
+    """
+    Copies dict and list attributes so a frozen node never aliases caller state.
+    """
+    if isinstance(value, dict):
+        return {key: _copy_value(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_copy_value(item) for item in value]
+    return value
+
+
+def _render_shell(
+    widget_type: type,
+    values: Dict[str, Any],
+    generates_js: bool,
+    inline: bool = False
+) -> Tuple[str, str, Tuple[str, ...], bool]:
+    """
+    Renders a throwaway copy of a widget to capture its own markup.
+
+    The copy is never shared, so the widget's mutating render() is safe here.
+    Widgets only append to `js` while rendering, which the copy owns.
+
+    Args:
+        widget_type (type): The widget class.
+        values (Dict[str, Any]): The widget's attributes, excluding children and js.
+        generates_js (bool): Whether the widget emits AJAX code when rendered.
+        inline (bool, optional): Whether to inline assets as the current `inline_assets`
+            block does. Defaults to False, which captures the markup with asset URLs.
+
+    Returns:
+        Tuple[str, str, Tuple[str, ...], bool]: The markup before and after the
+        children, the JavaScript generated by the widget itself, and whether
+        the markup references assets that an `inline_assets` block could inline.
+    """
+    shell = object.__new__(widget_type)
+    shell.__dict__.update(values)
+    shell.children = [_ChildrenMarker()]
+    shell.js = [' '] if generates_js else []
+    probe = None
+    if not inline:
+        probe = _AssetProbe()
+        token = _ACTIVE.set((probe, InlineReport()))
+    try:
+        html = shell.render()
+    finally:
+        if probe is not None:
+            _ACTIVE.reset(token)
+    prefix, _, suffix = html.partition(_CHILDREN_MARKER)
+    return prefix, suffix, tuple(shell.js[1:]), probe is not None and probe.referenced
+
+
+class FrozenWidget:
+    """
+    An immutable, hashable snapshot of a widget tree.
+
+    A frozen tree never changes after it is built, so it can be shared between
+    threads and requests. Each node stores its own markup and JavaScript once;
+    render() only concatenates them and memoizes the result. The markup holds
+    asset URLs; inside an `inline_assets` block, the nodes referencing assets
+    render their markup again.
+
+    Attributes:
+        widget_type (type): The class of the original widget.
+        attrs (Tuple): The original widget's attributes as (name, value) pairs.
+        children (Tuple[FrozenWidget, ...]): The frozen child widgets.
+        fingerprint (str): The fingerprint of the tree, computed once when it is frozen.
+
+    Methods:
+        render(): Renders the tree as HTML.
+        js_code(): Returns the JavaScript generated by the tree.
+        with_children(children): Returns a copy with different children.
+        with_style(style): Returns a copy with extra CSS styles.
+    """
+
+    __slots__ = (
+        'widget_type', 'attrs', 'children', '_values', '_generates_js',
+        '_prefix', '_suffix', '_js', '_assets', '_inlines', '_fingerprint', '_html', '_js_code'
+    )
+
+    def __init__(
+        self,
+        widget_type: type,
+        values: Dict[str, Any],
+        children: Tuple['FrozenWidget', ...],
+        generates_js: bool,
+        markup: Tuple[str, str, Tuple[str, ...], bool] = None
+    ):
+        """
+        Initializes a FrozenWidget node.
+
+        Args:
+            widget_type (type): The class of the original widget.
+            values (Dict[str, Any]): The widget's attributes, excluding children and js.
+            children (Tuple[FrozenWidget, ...]): The frozen child widgets.
+            generates_js (bool): Whether the widget emits AJAX code when rendered.
+            markup (Tuple, optional): Previously captured markup to reuse instead of re-rendering.
+        """
+        attrs = _own_state(values)
+        prefix, suffix, js, assets = markup or _render_shell(widget_type, values, generates_js)
+        state = serialize_state(widget_type, values, tuple(child.fingerprint for child in children))
+        for name, value in (
+            ('widget_type', widget_type),
+            ('attrs', attrs),
+            ('children', children),
+            ('_values', values),
+            ('_generates_js', generates_js),
+            ('_prefix', prefix),
+            ('_suffix', suffix),
+            ('_js', js),
+            ('_assets', assets),
+            ('_inlines', assets or any(child._inlines for child in children)),
+            ('_fingerprint', hash_state(state)),
+            ('_html', None),
+            ('_js_code', None),
+        ):
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"'{type(self).__name__}' object is immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"'{type(self).__name__}' object is immutable")
+
+    def __hash__(self) -> int:
+        return hash(self._fingerprint)
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, FrozenWidget):
+            return NotImplemented
+        return self._fingerprint == other._fingerprint
+
+    def __repr__(self) -> str:
+        return f'<FrozenWidget {self.widget_type.__name__} {self._fingerprint}>'
+
+    @property
+    def fingerprint(self) -> str:
+        return self._fingerprint
+
+    def render(self) -> str:
+        """
+        Renders the frozen tree as HTML.
+
+        Returns:
+            str: The HTML representation of the tree.
+        """
+        if self._inlines and _ACTIVE.get() is not None:
+            prefix, suffix = self._prefix, self._suffix
+            if self._assets:
+                prefix, suffix, _, _ = _render_shell(self.widget_type, self._values, False, inline=True)
+            return prefix + ''.join(child.render() for child in self.children) + suffix
+        html = self._html
+        if html is None:
+            html = self._prefix + ''.join(child.render() for child in self.children) + self._suffix
+            object.__setattr__(self, '_html', html)
+        return html
+
+    def js_code(self) -> Tuple[str, ...]:
+        """
+        Returns the JavaScript generated by the tree, in render order.
+
+        Returns:
+            Tuple[str, ...]: The generated AJAX functions. Code generated by
+            several nodes, like the prefetch runtime, appears once.
+        """
+        js_code = self._js_code
+        if js_code is None:
+            codes = self._js + tuple(code for child in self.children for code in child.js_code())
+            js_code = tuple(dict.fromkeys(codes))
+            object.__setattr__(self, '_js_code', js_code)
+        return js_code
+
+    def with_children(self, children: Iterable) -> 'FrozenWidget':
+        """
+        Returns a copy of this node with different children.
+
+        The node's own markup and every untouched subtree are shared, not copied.
+
+        Args:
+            children (Iterable): The new children, frozen or not.
+
+        Returns:
+            FrozenWidget: The derived node.
+        """
+        return FrozenWidget(
+            self.widget_type,
+            self._values,
+            tuple(freeze(child) for child in children),
+            self._generates_js,
+            (self._prefix, self._suffix, self._js, self._assets)
+        )
+
+    def with_style(self, style: Dict[str, str]) -> 'FrozenWidget':
+        """
+        Returns a copy of this node with extra CSS styles applied.
+
+        Only this node's markup is re-rendered; its children are shared.
+
+        Args:
+            style (Dict[str, str]): The CSS styles to add or override.
+
+        Returns:
+            FrozenWidget: The derived node.
+        """
+        values = dict(self._values)
+        values['style'] = {**values.get('style', {}), **style}
+        return FrozenWidget(self.widget_type, values, self.children, self._generates_js)
+
+
+def freeze(widget) -> FrozenWidget:
+    """
+    Builds an immutable, thread-safe copy of a widget tree.
+
+    The original tree is left untouched and may be discarded afterwards.
+    Frozen markup never changes, so Images with a display width first wait
+    for the installed ImagePipeline to generate their variants; see
+    `ImagePipeline.prepare()`.
+
+    Args:
+        widget (Widget): The root of the widget tree.
+
+    Returns:
+        FrozenWidget: The frozen tree.
+
+    Raises:
+        TypeError: For lazy Page sections.
+        VariantsPending: For Images whose variants are still being generated after the pipeline's timeout.
+    """
+    if isinstance(widget, FrozenWidget):
+        return widget
+    if getattr(widget, 'lazy', False):
+        raise TypeError('lazy Page sections cannot be frozen; freeze their children instead')
+    pipeline = images.PIPELINE
+    if pipeline is not None and getattr(widget, 'width', None) and type(widget).__name__ == 'Image':
+        if not pipeline.settle(widget.source, widget.width):
+            raise images.VariantsPending(f'the variants of {widget.source!r} are still being generated; '
+                                         'freeze the tree once ImagePipeline.prepare() has run')
+    children = tuple(freeze(child) for child in getattr(widget, 'children', None) or ())
+    generates_js = bool(getattr(widget, 'js', None) and getattr(widget, 'route', None))
+    values = {key: _copy_value(value) for key, value in _own_attrs(vars(widget)).items()}
+    return FrozenWidget(type(widget), values, children, generates_js)
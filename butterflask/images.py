@@ -0,0 +1,527 @@
+"""
+Resized image variants.
+
+An ImagePipeline serves local images as resized and re-encoded variants
+instead of their full-resolution originals. An Image created with a display
+`width` then references the smallest variant that covers that width, plus a
+2x variant for high-density screens:
+
+    pipeline = ImagePipeline('static', cache_dir='.butterflask-images', widths=(320, 640, 1280))
+    pipeline.install()
+    pipeline.prepare()  # optional: generate every variant up front
+
+    Image('/static/products/1.png', width=300)
+    # <img ... src="/_butterflask/image/1-5f2c...-320w.webp" srcset="... 1x, ...-640w.webp 2x" width="300" ...>
+
+Variants are encoded by Pillow in a process pool and stored under names
+containing a hash of the original's content, so they can be cached by
+browsers indefinitely. The cache directory is bounded in size; the least
+recently used variants are removed first and generated again on request.
+Until a variant is ready, and whenever Pillow is not installed, the
+original URL is rendered.
+
+The Flask extension registers the image route when given the pipeline with
+`ButterFlask(app, image_pipeline=...)`; Django projects
+include `butterflask.integrations.django.urls`.
+"""
+import hashlib
+import importlib.util
+import math
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor, wait
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .markup import escape
+
+IMAGE_ROUTE = '/_butterflask/image/'
+
+FORMATS = {'webp': 'webp', 'jpeg': 'jpg', 'png': 'png'}
+
+# Animated formats such as GIF are served as they are.
+SOURCE_EXTENSIONS = frozenset(('.png', '.jpg', '.jpeg', '.webp', '.bmp', '.tif', '.tiff'))
+
+_VARIANT_NAME = re.compile(r'^[\w-]+-[0-9a-f]{16}-\d+w\.(?:webp|jpg|png)$')
+_UNSAFE = re.compile(r'[^\w-]+')
+
+# Formatted attributes of at most this many (source, width) pairs are memoized.
+_MAX_RESOLVED = 4096
+
+# Content hashes of at most this many image files are memoized.
+_MAX_DIGESTS = 4096
+
+# At most this many variant names are remembered with their original, for regenerating
+# evicted variants; forgotten names are learnt again when a page renders them.
+_MAX_SOURCES = 16384
+
+# The pipeline Image widgets use, set by ImagePipeline.install().
+PIPELINE: Optional['ImagePipeline'] = None
+
+
+class VariantsPending(RuntimeError):
+    """
+    Raised by `freeze()` for an Image whose variants are still being generated
+    after the pipeline's timeout. Run `ImagePipeline.prepare()` first.
+    """
+
+
+def _encode_variant(source: str, target: str, width: int, format: str, quality: int) -> int:
+    """
+    Writes one variant of an image.
+
+    Runs inside a pool worker. Images narrower than `width` are re-encoded without being enlarged.
+
+    Returns:
+        int: The size of the written file in bytes.
+    """
+    from PIL import Image as PILImage, ImageOps
+
+    with PILImage.open(source) as original:
+        image = ImageOps.exif_transpose(original)
+        if image.width > width:
+            image = image.resize((width, max(1, round(image.height * width / image.width))), PILImage.LANCZOS)
+        if format == 'jpeg' and image.mode != 'RGB':
+            rgba = image.convert('RGBA')
+            image = PILImage.new('RGB', rgba.size, (255, 255, 255))
+            image.paste(rgba, mask=rgba.getchannel('A'))
+        temporary = f'{target}.{os.getpid()}.tmp'
+        image.save(temporary, format=format.upper(), quality=quality, optimize=True)
+    os.replace(temporary, target)
+    return os.path.getsize(target)
+
+
+class ImagePipeline:
+    """
+    Generates and caches resized variants of the images in a static directory.
+
+    Attributes:
+        static_dir (str): The directory the static URLs are served from.
+        static_url (str): The URL prefix of the static directory.
+        cache_dir (str): The directory the variants are written to.
+        widths (Tuple[int, ...]): The widths variants are generated at, in pixels.
+        densities (Tuple[int, ...]): The pixel densities of the srcset candidates.
+        format (str): The encoding of the variants: 'webp', 'jpeg' or 'png'.
+        quality (int): The encoder quality, 1-100.
+        max_bytes (int): The maximum total size of the cache directory.
+        route (str): The URL prefix the variants are served from.
+        recheck (float): Seconds before a resolved image is checked for changes again.
+        timeout (float): Seconds a request for a missing variant waits for it to be generated.
+    """
+
+    def __init__(
+        self,
+        static_dir: str,
+        static_url: str = '/static/',
+        cache_dir: str = '.butterflask-images',
+        widths: Sequence[int] = (320, 640, 960, 1280, 1920),
+        densities: Sequence[int] = (1, 2),
+        format: str = 'webp',
+        quality: int = 80,
+        max_bytes: int = 256 * 1024 * 1024,
+        processes: Optional[int] = None,
+        route: str = IMAGE_ROUTE,
+        recheck: float = 5.0,
+        timeout: float = 30.0
+    ):
+        if format not in FORMATS:
+            raise ValueError(f"format must be one of {', '.join(FORMATS)}, not {format!r}")
+        self.static_dir = os.path.abspath(static_dir)
+        self.static_url = static_url
+        self.cache_dir = os.path.abspath(cache_dir)
+        self.widths = tuple(sorted(set(widths)))
+        self.densities = tuple(densities)
+        self.format = format
+        self.quality = quality
+        self.max_bytes = max_bytes
+        self.processes = processes
+        self.route = route
+        self.recheck = recheck
+        self.timeout = timeout
+        self.available = importlib.util.find_spec('PIL') is not None
+        self._lock = threading.Lock()
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._pending: Dict[str, Future] = {}
+        self._failed = set()
+        self._digests: Dict[str, Tuple[int, int, str]] = {}
+        # (source, width) -> (formatted attributes, expiry time).
+        self._resolved: Dict[Tuple[str, int], Tuple[str, float]] = {}
+        # Variant name -> (source path, width), for regenerating evicted variants.
+        self._sources: Dict[str, Tuple[str, int]] = {}
+        # Variant name -> size in bytes, least recently used first.
+        self._sizes: 'OrderedDict[str, int]' = OrderedDict()
+        self._total = 0
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._scan()
+
+    def install(self) -> 'ImagePipeline':
+        """
+        Makes this the pipeline Image widgets resolve their variants with.
+
+        Returns:
+            ImagePipeline: The pipeline itself.
+        """
+        global PIPELINE
+        PIPELINE = self
+        from .Widgets.Image import Image
+        from .fingerprint import _EXTERNAL_STATE
+        _EXTERNAL_STATE[Image] = _image_state
+        return self
+
+    def source_path(self, source: str) -> Optional[str]:
+        """
+        Maps a static URL to the file it serves.
+
+        Args:
+            source (str): The image URL.
+
+        Returns:
+            str: The path of a local image file, or None for other URLs.
+        """
+        if not source.startswith(self.static_url):
+            return None
+        relative = source[len(self.static_url):].split('?', 1)[0].split('#', 1)[0]
+        path = os.path.normpath(os.path.join(self.static_dir, relative))
+        if not path.startswith(self.static_dir + os.sep):
+            return None
+        if os.path.splitext(path)[1].lower() not in SOURCE_EXTENSIONS:
+            return None
+        return path
+
+    def variant_widths(self, width: int) -> List[Tuple[int, int]]:
+        """
+        Chooses the variants covering a display width at each pixel density.
+
+        Args:
+            width (int): The display width in CSS pixels.
+
+        Returns:
+            List[Tuple[int, int]]: (variant width, density) pairs, without repeated widths.
+        """
+        chosen = []
+        for density in self.densities:
+            needed = math.ceil(width * density)
+            variant = next((candidate for candidate in self.widths if candidate >= needed), self.widths[-1])
+            if not any(variant == previous for previous, _ in chosen):
+                chosen.append((variant, density))
+        return chosen
+
+    def attrs(self, source: str, width: int) -> str:
+        """
+        Formats the `src`, `srcset` and `width` attributes of an image displayed at a width.
+
+        The attributes are memoized for `recheck` seconds, or until a variant is generated or evicted.
+
+        Args:
+            source (str): The image URL.
+            width (int): The display width in CSS pixels.
+
+        Returns:
+            str: The attributes, referencing the variants if they are ready and the original otherwise.
+        """
+        key = (source, width)
+        entry = self._resolved.get(key)
+        now = time.monotonic()
+        if entry is not None and entry[1] > now:
+            return entry[0]
+        resolved = self.resolve(source, width)
+        if resolved is None:
+            attrs = f'src="{escape(source)}" width="{width}"'
+        else:
+            src, srcset = resolved
+            srcset_attr = f' srcset="{escape(srcset)}"' if srcset else ''
+            attrs = f'src="{escape(src)}"{srcset_attr} width="{width}"'
+        if len(self._resolved) >= _MAX_RESOLVED:
+            self._resolved.clear()
+        self._resolved[key] = (attrs, now + self.recheck)
+        return attrs
+
+    def resolve(self, source: str, width: int) -> Optional[Tuple[str, str]]:
+        """
+        Returns the variant URLs of an image displayed at a width.
+
+        Missing variants are queued for generation, and the original is used until they are ready.
+
+        Args:
+            source (str): The image URL.
+            width (int): The display width in CSS pixels.
+
+        Returns:
+            Tuple[str, str]: The `src` and `srcset` values, or None to render the original.
+        """
+        variants = self._variants(source, width)
+        if variants is None:
+            return None
+        urls = []
+        ready = True
+        for name, density, path, variant in variants:
+            with self._lock:
+                if name in self._failed:
+                    return None
+                cached = name in self._sizes
+                if cached:
+                    self._sizes.move_to_end(name)
+            if not cached and not self._adopt(name):
+                self._submit(name, path, variant)
+                ready = False
+            urls.append((f'{self.route}{name}', density))
+        if not ready:
+            return None
+        srcset = ', '.join(f'{url} {density}x' for url, density in urls) if len(urls) > 1 else ''
+        return urls[0][0], srcset
+
+    def settle(self, source: str, width: int, timeout: Optional[float] = None) -> bool:
+        """
+        Waits until the attributes of an image displayed at a width no longer change.
+
+        That is when its variants are ready, or when it is served as the
+        original for good because it cannot be resized or encoding failed.
+
+        Args:
+            source (str): The image URL.
+            width (int): The display width in CSS pixels.
+            timeout (float, optional): Seconds to wait for missing variants. Defaults to `timeout`.
+
+        Returns:
+            bool: False if variants are still being generated after the timeout.
+        """
+        if self.resolve(source, width) is not None:
+            return True
+        variants = self._variants(source, width)
+        if variants is None:
+            return True
+        with self._lock:
+            pending = {name: self._pending[name] for name, *_ in variants if name in self._pending}
+        _, not_done = wait(pending.values(), self.timeout if timeout is None else timeout)
+        if not_done:
+            return False
+        for name, future in pending.items():
+            # Done callbacks may not have run yet; recording the result again is harmless.
+            self._finished(name, future)
+        return self.resolve(source, width) is not None or any(name in self._failed for name, *_ in variants)
+
+    def fetch(self, name: str) -> Optional[str]:
+        """
+        Returns the file of a variant, generating it now if it was evicted.
+
+        Args:
+            name (str): The variant file name.
+
+        Returns:
+            str: The path of the variant, or None for an unknown name.
+        """
+        if _VARIANT_NAME.match(name) is None:
+            return None
+        path = os.path.join(self.cache_dir, name)
+        with self._lock:
+            cached = name in self._sizes
+            if cached:
+                self._sizes.move_to_end(name)
+            source = self._sources.get(name)
+        if cached or self._adopt(name):
+            return path
+        if source is None or not self.available:
+            return None
+        try:
+            self._submit(name, *source).result(self.timeout)
+        except Exception:
+            return None
+        return path if os.path.exists(path) else None
+
+    def prepare(self, sources: Optional[Sequence[str]] = None) -> int:
+        """
+        Generates every configured width of the static images and waits for them.
+
+        Frozen markup never changes, so `freeze()` waits up to `timeout` for the
+        variants of each Image with a display width and raises VariantsPending if
+        they are still missing. Preparing the images before freezing trees, or
+        before `PreloadRegistry.warmup()`, makes freezing independent of timing.
+
+        Args:
+            sources (Sequence[str], optional): Image URLs to prepare. Defaults to every image in the static directory.
+
+        Returns:
+            int: The number of variants generated.
+
+        Raises:
+            RuntimeError: If Pillow is not installed.
+        """
+        if not self.available:
+            raise RuntimeError('generating image variants requires Pillow')
+        if sources is None:
+            sources = []
+            for directory, _, files in os.walk(self.static_dir):
+                for file in sorted(files):
+                    relative = os.path.relpath(os.path.join(directory, file), self.static_dir)
+                    sources.append(self.static_url + relative.replace(os.sep, '/'))
+        futures = []
+        for source in sources:
+            path = self.source_path(source)
+            digest = self._digest(path) if path is not None else None
+            if digest is None:
+                continue
+            stem = _UNSAFE.sub('-', os.path.splitext(os.path.basename(path))[0])
+            for width in self.widths:
+                name = f'{stem}-{digest}-{width}w.{FORMATS[self.format]}'
+                self._remember(name, path, width)
+                with self._lock:
+                    cached = name in self._sizes
+                if not cached and not self._adopt(name):
+                    futures.append(self._submit(name, path, width))
+        wait(futures)
+        return sum(1 for future in futures if future.exception() is None)
+
+    def close(self) -> None:
+        """
+        Shuts the worker processes down.
+        """
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown()
+
+    def _variants(self, source: str, width: int) -> Optional[List[Tuple[str, int, str, int]]]:
+        """
+        Names the variants of an image displayed at a width, with their pixel densities,
+        the path of the original and the variant widths.
+
+        Returns None for images that are served as the original.
+        """
+        if not self.available:
+            return None
+        path = self.source_path(source)
+        digest = self._digest(path) if path is not None else None
+        if digest is None:
+            return None
+        stem = _UNSAFE.sub('-', os.path.splitext(os.path.basename(path))[0])
+        variants = []
+        for variant, density in self.variant_widths(width):
+            name = f'{stem}-{digest}-{variant}w.{FORMATS[self.format]}'
+            self._remember(name, path, variant)
+            variants.append((name, density, path, variant))
+        return variants
+
+    def _remember(self, name: str, path: str, width: int) -> None:
+        """
+        Records the original and width of a variant, so it can be regenerated after eviction.
+        """
+        if self._sources.get(name) == (path, width):
+            return
+        with self._lock:
+            if len(self._sources) >= _MAX_SOURCES:
+                self._sources.clear()
+            self._sources[name] = (path, width)
+
+    def _digest(self, path: str) -> Optional[str]:
+        """
+        Hashes an image's content and the encoder settings, memoized by the file's mtime and size.
+        """
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        memo = self._digests.get(path)
+        if memo is not None and memo[0] == stat.st_mtime_ns and memo[1] == stat.st_size:
+            return memo[2]
+        digest = hashlib.blake2b(f'{self.format}:{self.quality}:'.encode('ascii'), digest_size=8)
+        with open(path, 'rb') as image:
+            for block in iter(lambda: image.read(1 << 16), b''):
+                digest.update(block)
+        if len(self._digests) >= _MAX_DIGESTS:
+            self._digests.clear()
+        self._digests[path] = (stat.st_mtime_ns, stat.st_size, digest.hexdigest())
+        return digest.hexdigest()
+
+    def _submit(self, name: str, path: str, width: int) -> Future:
+        with self._lock:
+            future = self._pending.get(name)
+            if future is not None:
+                return future
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(self.processes)
+            target = os.path.join(self.cache_dir, name)
+            future = self._executor.submit(_encode_variant, path, target, width, self.format, self.quality)
+            self._pending[name] = future
+        future.add_done_callback(lambda done: self._finished(name, done))
+        return future
+
+    def _finished(self, name: str, future: Future) -> None:
+        failed = future.cancelled() or future.exception() is not None
+        with self._lock:
+            self._pending.pop(name, None)
+            if failed:
+                self._failed.add(name)
+        if not failed:
+            self._add(name, future.result())
+        # Pages rendered from now on pick the variant up.
+        self._resolved.clear()
+
+    def _adopt(self, name: str) -> bool:
+        """
+        Records a variant another process wrote to the shared cache directory.
+        """
+        try:
+            size = os.path.getsize(os.path.join(self.cache_dir, name))
+        except OSError:
+            return False
+        self._add(name, size)
+        return True
+
+    def _add(self, name: str, size: int) -> None:
+        evicted = []
+        with self._lock:
+            self._total += size - self._sizes.pop(name, 0)
+            self._sizes[name] = size
+            while self._total > self.max_bytes and len(self._sizes) > 1:
+                oldest, oldest_size = self._sizes.popitem(last=False)
+                self._total -= oldest_size
+                evicted.append(oldest)
+        for oldest in evicted:
+            try:
+                os.remove(os.path.join(self.cache_dir, oldest))
+            except OSError:
+                pass
+        if evicted:
+            self._resolved.clear()
+
+    def _scan(self) -> None:
+        """
+        Loads the variants left in the cache directory, oldest first.
+        """
+        entries = []
+        for entry in os.scandir(self.cache_dir):
+            if _VARIANT_NAME.match(entry.name) is not None and entry.is_file():
+                stat = entry.stat()
+                entries.append((stat.st_mtime, entry.name, stat.st_size))
+        for _, name, size in sorted(entries):
+            self._add(name, size)
+
+
+def _image_state(attrs) -> Optional[str]:
+    """
+    Returns the variant attributes an Image renders, which change once its
+    variants are generated although none of its own attributes do.
+    """
+    width = attrs.get('width')
+    if PIPELINE is None or not width:
+        return None
+    return PIPELINE.attrs(attrs['source'], int(width))
+
+
+def image_attrs(source: str, width: int) -> str:
+    """
+    Formats the `src`, `srcset` and `width` attributes of an image displayed at a width.
+
+    Args:
+        source (str): The image URL.
+        width (int): The display width in CSS pixels.
+
+    Returns:
+        str: The attributes, referencing variants of the installed pipeline when they are ready.
+    """
+    width = int(width)
+    if PIPELINE is None:
+        return f'src="{escape(source)}" width="{width}"'
+    return PIPELINE.attrs(source, width)
@@ -0,0 +1,226 @@
+"""
+Inlining of small local assets.
+
+Every icon, logo and small script a page references costs a request of its
+own. Inside an `inline_assets` block, local files up to a size threshold are
+embedded in the rendered HTML as base64 data URIs instead: Image sources and
+the scripts and stylesheets of `render_document`.
+
+    inliner = AssetInliner({'/static/': 'static'}, max_bytes=4096)
+    with inline_assets(inliner) as report:
+        html = render_document(tree.render(), scripts=['/static/app.js'])
+    print(report.requests_saved, report.bytes_saved)
+
+Encoded files are memoized by path, modification time and size, so renders
+only stat the files they reference. A data URI is a copy of the file in the
+page, so an asset referenced more than once on a page is linked from its
+second reference on, and no longer inlined by that inliner.
+
+Fingerprints do not cover inlined files, so fragment caches, ETags and
+the markup of frozen trees are bypassed inside an `inline_assets` block.
+"""
+import os
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, Optional, Set, Tuple
+
+from .markup import Markup
+
+# The inliner and report of the current inline_assets block.
+_ACTIVE: ContextVar[Optional[Tuple['AssetInliner', 'InlineReport']]] = ContextVar('butterflask_inline', default=None)
+
+# URLs mapped to files, encoded files and repeated URLs are memoized up to this many entries each.
+_MAX_PATHS = 4096
+
+
+class InlineReport:
+    """
+    The assets inlined while rendering one page.
+
+    Attributes:
+        assets (Dict[str, int]): The file size of each inlined URL.
+        repeated (Set[str]): Inlined URLs referenced again, which were linked from their second reference on.
+        bytes_inlined (int): The size of the data URIs added to the page.
+    """
+
+    def __init__(self):
+        self.assets: Dict[str, int] = {}
+        self.repeated: Set[str] = set()
+        self.bytes_inlined = 0
+
+    @property
+    def requests_saved(self) -> int:
+        return sum(1 for url in self.assets if url not in self.repeated)
+
+    @property
+    def bytes_saved(self) -> int:
+        """
+        The size of the files that no longer need requests of their own.
+        """
+        return sum(size for url, size in self.assets.items() if url not in self.repeated)
+
+    def record(self, url: str, size: int, data_uri: str) -> None:
+        """
+        Counts the inlined reference to an asset.
+
+        Args:
+            url (str): The URL of the asset.
+            size (int): The size of the file.
+            data_uri (str): The data URI that replaced the URL.
+        """
+        self.assets[url] = size
+        self.bytes_inlined += len(data_uri)
+
+    def as_dict(self) -> Dict[str, int]:
+        return {
+            'requests_saved': self.requests_saved,
+            'bytes_saved': self.bytes_saved,
+            'bytes_inlined': self.bytes_inlined,
+        }
+
+
+class AssetInliner:
+    """
+    Encodes small local files as data URIs.
+
+    Attributes:
+        roots (Dict[str, str]): URL prefixes and the directories they are served from.
+        max_bytes (int): The largest file size that is inlined.
+    """
+
+    def __init__(self, roots: Dict[str, str], max_bytes: int = 4096):
+        # Longest prefixes first, so '/static/' wins over '/'.
+        self.roots = {prefix: os.path.abspath(directory)
+                      for prefix, directory in sorted(roots.items(), key=lambda root: -len(root[0]))}
+        self.max_bytes = max_bytes
+        self._paths: Dict[str, Optional[str]] = {}
+        self._encoded: Dict[str, Tuple[int, int, Optional[str]]] = {}
+        # URLs referenced more than once on a page, which are always linked.
+        self._repeated: Set[str] = set()
+
+    def path(self, url: str) -> Optional[str]:
+        """
+        Maps a URL to the local file it serves.
+
+        Args:
+            url (str): The asset URL.
+
+        Returns:
+            str: The file path, or None for URLs outside the roots.
+        """
+        try:
+            return self._paths[url]
+        except KeyError:
+            pass
+        path = None
+        for prefix, directory in self.roots.items():
+            if url.startswith(prefix):
+                relative = url[len(prefix):].split('?', 1)[0].split('#', 1)[0]
+                candidate = os.path.normpath(os.path.join(directory, relative))
+                if candidate.startswith(directory + os.sep):
+                    path = candidate
+                break
+        if len(self._paths) >= _MAX_PATHS:
+            self._paths.clear()
+        self._paths[url] = path
+        return path
+
+    def data_uri(self, url: str) -> Tuple[Optional[str], int]:
+        """
+        Encodes the file served at a URL if it is small enough.
+
+        Args:
+            url (str): The asset URL.
+
+        Returns:
+            Tuple[str, int]: The data URI, or None if the file is missing, too large or
+            of an unknown type, and the file size.
+        """
+        path = self.path(url)
+        if path is None:
+            return None, 0
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None, 0
+        memo = self._encoded.get(path)
+        if memo is not None and memo[0] == stat.st_mtime_ns and memo[1] == stat.st_size:
+            return memo[2], stat.st_size
+        data_uri = None
+        if stat.st_size <= self.max_bytes:
+            # Imported here so that renders without inlining do not load them.
+            import base64
+            import mimetypes
+            mimetype = mimetypes.guess_type(path)[0]
+            if mimetype is not None:
+                with open(path, 'rb') as asset:
+                    encoded = base64.b64encode(asset.read()).decode('ascii')
+                # Nothing in a base64 data URI needs escaping, so skip scanning it on every render.
+                data_uri = Markup(f'data:{mimetype};base64,{encoded}')
+        if len(self._encoded) >= _MAX_PATHS:
+            self._encoded.clear()
+        self._encoded[path] = (stat.st_mtime_ns, stat.st_size, data_uri)
+        return data_uri, stat.st_size
+
+    def repeat(self, url: str) -> None:
+        """
+        Stops inlining an asset that was referenced more than once on a page.
+
+        Args:
+            url (str): The asset URL.
+        """
+        if len(self._repeated) >= _MAX_PATHS:
+            self._repeated.clear()
+        self._repeated.add(url)
+
+
+@contextmanager
+def inline_assets(inliner: AssetInliner) -> Iterator[InlineReport]:
+    """
+    Inlines small local assets in everything rendered inside the `with` block.
+
+    The setting is local to the current thread or task, so concurrent
+    requests can render with and without inlining.
+
+    Args:
+        inliner (AssetInliner): The inliner encoding the assets.
+
+    Yields:
+        InlineReport: The requests and bytes saved by this block.
+    """
+    report = InlineReport()
+    token = _ACTIVE.set((inliner, report))
+    try:
+        yield report
+    finally:
+        _ACTIVE.reset(token)
+
+
+def inline_url(url: str) -> str:
+    """
+    Returns the data URI of a small local asset inside an `inline_assets` block, and the URL otherwise.
+
+    An asset referenced more than once on a page is linked from its second
+    reference on, and by the same inliner from then on.
+
+    Args:
+        url (str): The asset URL.
+
+    Returns:
+        str: The data URI or the URL itself.
+    """
+    active = _ACTIVE.get()
+    if active is None:
+        return url
+    inliner, report = active
+    if url in inliner._repeated:
+        return url
+    if url in report.assets:
+        report.repeated.add(url)
+        inliner.repeat(url)
+        return url
+    data_uri, size = inliner.data_uri(url)
+    if data_uri is None:
+        return url
+    report.record(url, size, data_uri)
+    return data_uri
@@ -0,0 +1,19 @@
+"""
+Django app rendering ButterFlask-UI widget trees.
+
+Add 'butterflask.integrations.django' to INSTALLED_APPS, then either use
+the template tags:
+
+    {% load butterflask %}
+    {% butterflask ui request.LANGUAGE_CODE %}
+
+or return `butterflask.integrations.django.shortcuts.render_page(request, ui)`
+from a view. Rendered fragments are cached through Django's cache framework.
+Lazily loaded Page sections and resized image variants are served by
+
+    path('_butterflask/', include('butterflask.integrations.django.urls'))
+
+Settings:
+    BUTTERFLASK_CACHE: The cache alias to store fragments in, or None to disable caching. Defaults to 'default'.
+    BUTTERFLASK_CACHE_TIMEOUT: The lifetime of a fragment in seconds. Defaults to the cache's own timeout.
+"""
@@ -0,0 +1,7 @@
+from django.apps import AppConfig
+
+
+class ButterFlaskConfig(AppConfig):
+    name = 'butterflask.integrations.django'
+    label = 'butterflask'
+    verbose_name = 'ButterFlask-UI'
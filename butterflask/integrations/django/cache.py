@@ -0,0 +1,125 @@
+from typing import List, Optional, Sequence, Tuple
+
+from django.conf import settings
+from django.core.cache import DEFAULT_CACHE_ALIAS, caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+
+from ...document import render_with_js
+from ...fingerprint import fingerprint, hash_state
+from ...fragment_cache import FragmentCache, _generates_js
+from ...frozen import FrozenWidget
+from ...inlining import _ACTIVE
+
+
+def _emits_js(widget) -> bool:
+    """
+    Checks whether rendering a tree generates JavaScript, which its fingerprint does not cover.
+    """
+    if isinstance(widget, FrozenWidget):
+        return bool(widget.js_code())
+    return _generates_js(widget)
+
+
+class DjangoFragmentCache(FragmentCache):
+    """
+    A fragment cache stored in one of the caches configured in Django's CACHES setting.
+
+    Any backend works, including the local-memory and file-based ones. Entries
+    hold the HTML together with the JavaScript generated while rendering it,
+    so trees with AJAX buttons are cached as well when rendered through
+    `render_with_js`. Every key is the prefix, the tree fingerprint, the
+    vary-on values and whether the tree generates JavaScript; `get` and `set`
+    take the fingerprint and add the prefix themselves.
+
+    Attributes:
+        alias (str): The cache alias. Defaults to 'default'.
+        timeout (int, optional): The lifetime of a fragment in seconds. Defaults to the cache's own timeout.
+        prefix (str): The prefix prepended to every key.
+    """
+
+    def __init__(self, alias: str = DEFAULT_CACHE_ALIAS, timeout=DEFAULT_TIMEOUT, prefix: str = 'butterflask:fragment:'):
+        super().__init__()
+        self.alias = alias
+        self.timeout = timeout
+        self.prefix = prefix
+
+    @property
+    def backend(self):
+        # Django hands out one backend instance per thread.
+        return caches[self.alias]
+
+    def make_key(self, widget, vary_on: Sequence = ()) -> str:
+        """
+        Builds the key a widget tree is stored under in the Django cache.
+
+        Trees that generate JavaScript get keys of their own: the fingerprint
+        does not cover the `js` lists, and the same tree with empty ones
+        generates none.
+
+        Args:
+            widget (Widget): The root of the tree, mutable or frozen.
+            vary_on (Sequence, optional): Extra values the fragment depends on, such as the language.
+
+        Returns:
+            str: The cache key.
+        """
+        key = self.prefix + fingerprint(widget)
+        if vary_on:
+            key += ':' + hash_state(repr(tuple(str(value) for value in vary_on)).encode('utf-8'))
+        if _emits_js(widget):
+            key += ':js'
+        return key
+
+    def get(self, key: str) -> Optional[str]:
+        # `FragmentCache.render` only caches trees without JavaScript, keyed by their fingerprint,
+        # so this is the entry `render_with_js` stores for the same tree without vary-on values.
+        entry = self.backend.get(self.prefix + key)
+        return entry[0] if entry is not None else None
+
+    def set(self, key: str, value: str) -> None:
+        self.backend.set(self.prefix + key, (value, ()), self.timeout)
+
+    def render_with_js(self, widget, vary_on: Sequence = ()) -> Tuple[str, List[str]]:
+        """
+        Renders a widget tree and its JavaScript, reusing a cached entry when one exists.
+
+        On a hit the tree is not rendered, so nothing is appended to its `js` lists;
+        use the returned JavaScript instead. Inside an `inline_assets` block the
+        tree is always rendered, since its fingerprint does not cover inlined files.
+
+        Args:
+            widget (Widget): The root of the tree, mutable or frozen.
+            vary_on (Sequence, optional): Extra values the fragment depends on.
+
+        Returns:
+            Tuple[str, List[str]]: The HTML and the generated JavaScript functions.
+        """
+        if _ACTIVE.get() is not None:
+            return render_with_js(widget)
+        key = self.make_key(widget, vary_on)
+        entry = self.backend.get(key)
+        if entry is not None:
+            self._record('hits')
+            return entry[0], list(entry[1])
+        self._record('misses')
+        html, js = render_with_js(widget)
+        self.backend.set(key, (html, tuple(js)), self.timeout)
+        return html, js
+
+
+_caches = {}
+
+
+def get_fragment_cache() -> Optional[DjangoFragmentCache]:
+    """
+    Returns the fragment cache configured by the BUTTERFLASK_CACHE settings, or None when caching is disabled.
+    """
+    alias = getattr(settings, 'BUTTERFLASK_CACHE', DEFAULT_CACHE_ALIAS)
+    if alias is None:
+        return None
+    timeout = getattr(settings, 'BUTTERFLASK_CACHE_TIMEOUT', DEFAULT_TIMEOUT)
+    cache = _caches.get((alias, timeout))
+    if cache is None:
+        cache = _caches[(alias, timeout)] = DjangoFragmentCache(alias, timeout)
+    return cache
+
@@ -0,0 +1,132 @@
+from functools import lru_cache
+from typing import Optional, Sequence
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.middleware.csrf import get_token
+from django.shortcuts import render
+from django.utils.safestring import SafeString, mark_safe
+
+from ...document import JQUERY_URL, compile_document, render_with_js
+from ...js_code_generator import generate_csrf_code
+from ...markup import escape
+from .cache import get_fragment_cache
+
+
+def csrf_code(request=None) -> str:
+    """
+    Generates the JavaScript sending Django's CSRF token with every unsafe AJAX request.
+
+    The cookie and header names come from the CSRF settings. The token is
+    embedded in the page only when scripts cannot read it from the cookie.
+
+    Args:
+        request (HttpRequest, optional): The current request.
+
+    Returns:
+        str: The JavaScript code.
+    """
+    token = ''
+    if request is not None:
+        # Also makes sure the CSRF cookie is sent with the response.
+        token = get_token(request)
+        if not (settings.CSRF_USE_SESSIONS or settings.CSRF_COOKIE_HTTPONLY):
+            token = ''
+    header = settings.CSRF_HEADER_NAME
+    if header.startswith('HTTP_'):
+        header = header[5:]
+    return generate_csrf_code(settings.CSRF_COOKIE_NAME, header.replace('_', '-'), token)
+
+
+def render_ui(root, request=None, vary_on: Sequence = (), cache: bool = True):
+    """
+    Renders a widget tree and the JavaScript it needs, including the CSRF handling.
+
+    Args:
+        root (Widget): The root of the widget tree, mutable or frozen.
+        request (HttpRequest, optional): The current request.
+        vary_on (Sequence, optional): Extra values the rendered tree depends on.
+        cache (bool, optional): Whether to use the fragment cache. Defaults to True.
+
+    Returns:
+        Tuple[str, str]: The HTML and the inline JavaScript, which is empty when the tree generates none.
+    """
+    fragment_cache = get_fragment_cache() if cache else None
+    if fragment_cache is not None:
+        body, js = fragment_cache.render_with_js(root, vary_on)
+    else:
+        body, js = render_with_js(root)
+    if not js:
+        return body, ''
+    return body, csrf_code(request) + '\n'.join(js)
+
+
+def render_fragment(root, request=None, vary_on: Sequence = (), cache: bool = True) -> SafeString:
+    """
+    Renders a widget tree followed by a script tag with its JavaScript.
+
+    Args:
+        root (Widget): The root of the widget tree, mutable or frozen.
+        request (HttpRequest, optional): The current request.
+        vary_on (Sequence, optional): Extra values the rendered tree depends on.
+        cache (bool, optional): Whether to use the fragment cache. Defaults to True.
+
+    Returns:
+        SafeString: The markup.
+    """
+    body, js = render_ui(root, request, vary_on, cache)
+    return mark_safe(f'{body}<script>{js}</script>' if js else body)
+
+
+@lru_cache(maxsize=None)
+def _shell(scripts, stylesheets, head):
+    return compile_document(scripts, stylesheets, head)
+
+
+def render_page(
+    request,
+    root,
+    title: str = '',
+    template_name: Optional[str] = None,
+    context: Optional[dict] = None,
+    status: int = 200,
+    vary_on: Sequence = (),
+    cache: bool = True,
+    scripts: Sequence[str] = (JQUERY_URL,),
+    stylesheets: Sequence[str] = (),
+    head: str = ''
+) -> HttpResponse:
+    """
+    Renders a widget tree as a complete HTML document.
+
+    Without a template the document is built from the same shell as the README
+    template, without the CSRF boilerplate. With a template, the tree and its
+    JavaScript are passed in as the `ui` and `js` variables, which are already
+    safe. Add `ConditionalGetMiddleware` to answer repeated requests with 304.
+
+    Args:
+        request (HttpRequest): The current request.
+        root (Widget): The root of the widget tree, mutable or frozen.
+        title (str, optional): The document title; it is escaped. Defaults to ''.
+        template_name (str, optional): A template to render instead of the built-in shell.
+        context (dict, optional): Extra template variables.
+        status (int, optional): The response status. Defaults to 200.
+        vary_on (Sequence, optional): Extra values the rendered tree depends on.
+        cache (bool, optional): Whether to use the fragment cache. Defaults to True.
+        scripts (Sequence[str], optional): URLs of external scripts. Defaults to jQuery.
+        stylesheets (Sequence[str], optional): URLs of external stylesheets. Defaults to none.
+        head (str, optional): Extra markup for the head. Defaults to ''.
+
+    Returns:
+        HttpResponse: The document response.
+    """
+    body, js = render_ui(root, request, vary_on, cache)
+    if template_name is not None:
+        context = {**(context or {}), 'ui': mark_safe(body), 'js': mark_safe(js), 'title': title}
+        return render(request, template_name, context, status=status)
+    before_title, before_body, before_js, after_js = _shell(tuple(scripts), tuple(stylesheets), head)
+    document = (
+        f"{before_title}{escape(title)}{before_body}{body}{before_js}"
+        f"{f'<script>{js}</script>' if js else ''}{after_js}"
+    )
+    return HttpResponse(document, status=status)
@@ -0,0 +1,27 @@
+from django import template
+from django.utils.safestring import mark_safe
+
+from ..shortcuts import csrf_code, render_fragment
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def butterflask(context, root, *vary_on, cache=True):
+    """
+    Renders a widget tree followed by its JavaScript.
+
+    Usage: `{% butterflask ui %}`, `{% butterflask ui request.LANGUAGE_CODE cache=False %}`.
+    Positional arguments after the tree are vary-on values of the cache key.
+    """
+    return render_fragment(root, context.get('request'), vary_on, cache)
+
+
+@register.simple_tag(takes_context=True)
+def butterflask_csrf(context):
+    """
+    Renders a script tag adding the CSRF token to hand-written AJAX requests.
+
+    Pages using `{% butterflask %}` with AJAX widgets get this automatically.
+    """
+    return mark_safe(f"<script>{csrf_code(context.get('request'))}</script>")
@@ -0,0 +1,10 @@
+from django.urls import path
+
+from . import views
+
+# Mount at the prefix of butterflask.sections.SECTION_ROUTE and butterflask.images.IMAGE_ROUTE:
+# path('_butterflask/', include(...)).
+urlpatterns = [
+    path('section/<str:key>', views.section, name='butterflask-section'),
+    path('image/<str:name>', views.image, name='butterflask-image'),
+]
@@ -0,0 +1,32 @@
+from django.http import FileResponse, HttpResponse, HttpResponseNotFound
+
+from ... import images, sections
+
+
+def section(request, key):
+    """
+    Serves a lazily loaded Page section.
+
+    Sections are content-addressed, so responses never change and may be cached indefinitely.
+    """
+    payload = sections.SECTIONS.fetch(key)
+    if payload is None:
+        return HttpResponseNotFound()
+    response = HttpResponse(payload, content_type='application/json')
+    response['Cache-Control'] = 'public, max-age=31536000, immutable'
+    return response
+
+
+def image(request, name):
+    """
+    Serves a resized image variant of the installed ImagePipeline.
+
+    Variant names contain a hash of the original image, so responses may be cached indefinitely.
+    """
+    pipeline = images.PIPELINE
+    path = pipeline.fetch(name) if pipeline is not None else None
+    if path is None:
+        return HttpResponseNotFound()
+    response = FileResponse(open(path, 'rb'))
+    response['Cache-Control'] = 'public, max-age=31536000, immutable'
+    return response
@@ -0,0 +1,303 @@
+"""
+Flask extension rendering complete documents without a Jinja template.
+
+Usage:
+    from flask import Flask
+    from butterflask.integrations.flask import ButterFlask
+
+    app = Flask(__name__)
+    butterflask = ButterFlask(app)
+
+    @app.route('/')
+    def home():
+        js = [' ']
+        return butterflask.render_page(Row(children=[Button('Save', js=js, route='/save')]), title='Home')
+"""
+from contextvars import copy_context
+from typing import TYPE_CHECKING, Callable, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from flask import Response, current_app, request, send_file, stream_with_context
+
+from ..document import JQUERY_URL, compile_document, render_with_js
+from ..fingerprint import etag_matches, fingerprint, hash_state
+from ..inlining import _ACTIVE
+from ..markup import escape
+
+if TYPE_CHECKING:
+    from ..images import ImagePipeline
+    from ..offload import RenderPool
+    from ..sections import SectionStore
+    from ..service_worker import ServiceWorker
+
+
+def _streamed(chunks: Iterator[str]) -> Iterable[str]:
+    """
+    Streams chunks that are generated after the view returns, inside the
+    request context and the context variables of the view, such as an
+    enclosing `inline_assets` block.
+    """
+    context = copy_context()
+
+    def generate() -> Iterator[str]:
+        while True:
+            try:
+                chunk = context.run(next, chunks)
+            except StopIteration:
+                return
+            yield chunk
+    return stream_with_context(generate())
+
+
+class ButterFlask:
+    """
+    Renders widget trees as complete HTML documents.
+
+    The document shell (the viewport meta tag, scripts, stylesheets and the
+    body wrapper from the README template) is split into static parts once;
+    each page is the concatenation of those parts with the title, the rendered
+    tree and the JavaScript generated by this render.
+
+    Attributes:
+        scripts (Sequence[str]): URLs of external scripts. Defaults to jQuery.
+        stylesheets (Sequence[str]): URLs of external stylesheets. Defaults to none.
+        head (str): Extra markup for the head. Defaults to ''.
+        service_worker (ServiceWorker): The service worker registered by every page, if any.
+        render_pool (RenderPool): The pool building or rendering large trees in worker processes, if any.
+        section_store (SectionStore): The store serving lazily loaded Page sections, if any.
+        image_pipeline (ImagePipeline): The pipeline serving resized image variants, if any.
+        cache_control (str): The default Cache-Control header. Defaults to 'no-cache',
+            which lets browsers keep pages but revalidate them with their ETag.
+
+    Methods:
+        init_app(app): Registers the extension and its routes on an application.
+        render_page(root, title, ...): Renders a widget tree as a document response.
+        render_call(builder, *args, ...): Builds and renders a widget tree, in a worker process
+            of the render pool if there is one, as a document response.
+    """
+
+    def __init__(
+        self,
+        app=None,
+        scripts: Sequence[str] = (JQUERY_URL,),
+        stylesheets: Sequence[str] = (),
+        head: str = '',
+        cache_control: str = 'no-cache',
+        service_worker: Optional['ServiceWorker'] = None,
+        render_pool: Optional['RenderPool'] = None,
+        section_store: Optional['SectionStore'] = None,
+        image_pipeline: Optional['ImagePipeline'] = None
+    ):
+        self.scripts = tuple(scripts)
+        self.stylesheets = tuple(stylesheets)
+        self.head = head
+        self.cache_control = cache_control
+        self.service_worker = service_worker
+        self.render_pool = render_pool
+        self.section_store = section_store
+        self.image_pipeline = image_pipeline
+        if service_worker is not None:
+            head += service_worker.registration()
+        self._shell = compile_document(self.scripts, self.stylesheets, head)
+        self._shell_key = hash_state(''.join(self._shell).encode('utf-8'))
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app) -> None:
+        """
+        Registers the extension, so `render_page` can find it through `current_app`.
+
+        The routes serving lazily loaded Page sections, image variants and the
+        service worker are registered for the features the extension was given;
+        its section store and image pipeline are installed.
+
+        Args:
+            app (Flask): The application.
+        """
+        app.extensions['butterflask'] = self
+        if self.section_store is not None:
+            self.section_store.install()
+            app.add_url_rule(f'{self.section_store.route}<key>', 'butterflask_section', section)
+        if self.image_pipeline is not None:
+            self.image_pipeline.install()
+            app.add_url_rule(f'{self.image_pipeline.route}<name>', 'butterflask_image', image)
+        if self.service_worker is not None:
+            app.add_url_rule(self.service_worker.url, 'butterflask_service_worker', service_worker)
+
+    def make_etag(self, root, title: str = '') -> str:
+        """
+        Computes the ETag of the document for a widget tree without rendering it.
+
+        Args:
+            root (Widget): The root of the widget tree, mutable or frozen.
+            title (str, optional): The document title. Defaults to ''.
+
+        Returns:
+            str: A quoted entity tag.
+        """
+        key = f'{fingerprint(root)}\x00{title}\x00{self._shell_key}'
+        return f'"{hash_state(key.encode("utf-8"))}"'
+
+    def _chunks(self, render: Callable[[], Tuple[str, List[str]]], title: str) -> Iterator[str]:
+        """
+        Yields the document in the order a browser can use it: the head first,
+        so external scripts start loading while the tree renders.
+        """
+        before_title, before_body, before_js, after_js = self._shell
+        yield f'{before_title}{escape(title)}{before_body}'
+        body, js = render()
+        code = '\n'.join(js)
+        yield f"{body}{before_js}{f'<script>{code}</script>' if code else ''}{after_js}"
+
+    def render_page(
+        self,
+        root,
+        title: str = '',
+        status: int = 200,
+        stream: bool = False,
+        etag: bool = True,
+        cache_control: Optional[str] = None
+    ) -> Response:
+        """
+        Renders a widget tree as a complete HTML document.
+
+        When the request's If-None-Match header matches the document's ETag,
+        the tree is not rendered and an empty 304 response is returned. Its
+        lazy sections are registered all the same, since the browser's copy
+        of the page still fetches them. Inside an `inline_assets` block there
+        is no ETag, because the fingerprint does not cover inlined files.
+        A streamed tree renders after the view returns, in the request context
+        and the context variables the view had when it called `render_page`.
+
+        Args:
+            root (Widget): The root of the widget tree, mutable or frozen.
+            title (str, optional): The document title; it is escaped. Defaults to ''.
+            status (int, optional): The response status. Defaults to 200.
+            stream (bool, optional): Whether to send the head before rendering the tree. Defaults to False.
+            etag (bool, optional): Whether to set an ETag and answer conditional requests. Defaults to True.
+            cache_control (str, optional): The Cache-Control header. Defaults to the extension's.
+
+        Returns:
+            Response: The document response.
+        """
+        headers = {'Cache-Control': cache_control or self.cache_control}
+        if etag and _ACTIVE.get() is None:
+            tag = self.make_etag(root, title)
+            headers['ETag'] = tag
+            if status == 200 and etag_matches(tag, request.headers.get('If-None-Match')):
+                if self.section_store is not None:
+                    from ..sections import register_sections
+                    register_sections(root)
+                return Response(status=304, headers=headers)
+        if self.render_pool is not None:
+            render = lambda: self.render_pool.render_with_js(root)
+        else:
+            render = lambda: render_with_js(root)
+        chunks = self._chunks(render, title)
+        body = _streamed(chunks) if stream else ''.join(chunks)
+        return Response(body, status=status, headers=headers, mimetype='text/html')
+
+    def render_call(
+        self,
+        builder: Callable,
+        *args,
+        title: str = '',
+        status: int = 200,
+        stream: bool = False,
+        cache_control: Optional[str] = None,
+        **kwargs
+    ) -> Response:
+        """
+        Builds a widget tree with `builder(*args, **kwargs)` and renders it as a complete HTML document.
+
+        With a render pool, a worker process builds and renders the tree, and
+        only the builder and its arguments leave the request thread. The tree
+        is not built here, so the response has no ETag.
+
+        Args:
+            builder (Callable): A picklable function returning the root of a widget tree.
+            *args: Positional arguments of the builder.
+            title (str, optional): The document title; it is escaped. Defaults to ''.
+            status (int, optional): The response status. Defaults to 200.
+            stream (bool, optional): Whether to send the head before rendering the tree. Defaults to False.
+            cache_control (str, optional): The Cache-Control header. Defaults to the extension's.
+            **kwargs: Keyword arguments of the builder.
+
+        Returns:
+            Response: The document response.
+        """
+        if self.render_pool is not None:
+            render = lambda: self.render_pool.render_call(builder, *args, **kwargs)
+        else:
+            render = lambda: render_with_js(builder(*args, **kwargs))
+        chunks = self._chunks(render, title)
+        body = _streamed(chunks) if stream else ''.join(chunks)
+        return Response(body, status=status, headers={'Cache-Control': cache_control or self.cache_control},
+                        mimetype='text/html')
+
+
+def render_page(root, title: str = '', **options) -> Response:
+    """
+    Renders a widget tree with the ButterFlask extension of the current application.
+
+    Args:
+        root (Widget): The root of the widget tree, mutable or frozen.
+        title (str, optional): The document title. Defaults to ''.
+        **options: Passed on to `ButterFlask.render_page`.
+
+    Returns:
+        Response: The document response.
+    """
+    return current_app.extensions['butterflask'].render_page(root, title, **options)
+
+
+def render_call(builder: Callable, *args, **kwargs) -> Response:
+    """
+    Builds and renders a widget tree with the ButterFlask extension of the current application.
+
+    Args:
+        builder (Callable): A picklable function returning the root of a widget tree.
+        *args: Positional arguments of the builder.
+        **kwargs: Passed on to `ButterFlask.render_call`.
+
+    Returns:
+        Response: The document response.
+    """
+    return current_app.extensions['butterflask'].render_call(builder, *args, **kwargs)
+
+
+def section(key: str) -> Response:
+    """
+    Serves a lazily loaded Page section.
+
+    Sections are content-addressed, so responses never change and may be cached indefinitely.
+    """
+    from ..sections import SECTIONS
+    payload = SECTIONS.fetch(key)
+    if payload is None:
+        return Response(status=404)
+    return Response(payload, mimetype='application/json', headers={'Cache-Control': 'public, max-age=31536000, immutable'})
+
+
+def image(name: str) -> Response:
+    """
+    Serves a resized image variant of the installed ImagePipeline.
+
+    Variant names contain a hash of the original image, so responses may be cached indefinitely.
+    """
+    from ..images import PIPELINE
+    path = PIPELINE.fetch(name) if PIPELINE is not None else None
+    if path is None:
+        return Response(status=404)
+    response = send_file(path, max_age=31536000)
+    response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+    return response
+
+
+def service_worker() -> Response:
+    """
+    Serves the service worker script of the ButterFlask extension.
+
+    Browsers check the script for updates on navigation; `no-cache` makes them revalidate it.
+    """
+    script = current_app.extensions['butterflask'].service_worker.script()
+    return Response(script, mimetype='text/javascript', headers={'Cache-Control': 'no-cache'})
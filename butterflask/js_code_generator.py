@@ -1,3 +1,6 @@
+import json
+
+
 def generate_js_code(
     func_name: str,
     method: str,
@@ -8,7 +11,8 @@ def generate_js_code(
     before_send: str,
     on_success: str,
     on_error: str,
-    on_completed: str
+    on_completed: str,
+    prefetch: bool = False
 ) -> str:
     """
     Generates the JavaScript code for AJAX requests.
@@ -24,10 +28,37 @@ def generate_js_code(
         on_success (str): JavaScript code to handle a successful response.
         on_error (str): JavaScript code to handle an error response.
         on_completed (str): JavaScript code to be executed when the request is completed.
+        prefetch (bool, optional): Whether to use a response prefetched by the prefetch runtime. Defaults to False.
 
     Returns:
         str: The JavaScript code for AJAX requests.
     """
+    if prefetch:
+        return f"""
+        function {func_name}(event) {{
+            var request = window.butterflaskPrefetch ? butterflaskPrefetch.take('{route}', '{request_data}') : null;
+            if (!request || request.state() === 'rejected') {{
+                request = $.ajax({{
+                    type: '{method}',
+                    url: '{route}',
+                    data: '{request_data}',
+                    dataType: '{data_type}',
+                    contentType: '{content_type}',
+                    beforeSend: function(xhr) {{
+                        {before_send}
+                    }}
+                }});
+            }}
+            request.done(function(response) {{
+                {on_success}
+            }}).fail(function(xhr, status, error) {{
+                console.log(error);
+                {on_error}
+            }}).always(function() {{
+                {on_completed}
+            }});
+        }}
+    """
     js_code = f"""
         function {func_name}(event) {{
             $.ajax({{
@@ -53,3 +84,46 @@ def generate_js_code(
         }}
     """
     return js_code
+
+
+def generate_csrf_code(cookie_name: str = 'csrftoken', header_name: str = 'X-CSRFToken', token: str = '') -> str:
+    """
+    Generates JavaScript that adds a CSRF token to every unsafe same-origin AJAX request.
+
+    The token is read from the CSRF cookie when the request is sent, so cached
+    pages keep working after the token rotates. The code installs itself once
+    per page, however often it is included.
+
+    Args:
+        cookie_name (str, optional): The name of the CSRF cookie. Defaults to 'csrftoken'.
+        header_name (str, optional): The request header carrying the token. Defaults to 'X-CSRFToken'.
+        token (str, optional): The token to send when the cookie is not readable. Defaults to ''.
+
+    Returns:
+        str: The JavaScript code.
+    """
+    prefix = json.dumps(cookie_name + '=')
+    js_code = f"""
+        (function() {{
+            if (window.butterflaskCsrf) {{
+                return;
+            }}
+            window.butterflaskCsrf = true;
+            function csrfToken() {{
+                var cookies = document.cookie ? document.cookie.split(';') : [];
+                for (var i = 0; i < cookies.length; i++) {{
+                    var cookie = cookies[i].trim();
+                    if (cookie.substring(0, {len(cookie_name) + 1}) === {prefix}) {{
+                        return decodeURIComponent(cookie.substring({len(cookie_name) + 1}));
+                    }}
+                }}
+                return {json.dumps(token)};
+            }}
+            $.ajaxPrefilter(function(options, originalOptions, xhr) {{
+                if (!options.crossDomain && !/^(GET|HEAD|OPTIONS|TRACE)$/i.test(options.type)) {{
+                    xhr.setRequestHeader({json.dumps(header_name)}, csrfToken());
+                }}
+            }});
+        }})();
+    """
+    return js_code
@@ -0,0 +1,69 @@
+"""
+HTML escaping of widget output.
+
+Widgets escape every text and attribute value when they render, so strings
+from users can be put into a tree as they are. Markup that is already
+escaped or otherwise trusted is wrapped in `Markup` and inserted unchanged:
+
+    Text('Fish & Chips')                   # Fish &amp; Chips
+    Text(Markup('<b>Fish</b> &amp; Chips'))  # inserted as written
+
+Any object with an `__html__` method, such as markupsafe's `Markup` or
+Django's `SafeString`, is trusted in the same way.
+"""
+import re
+from functools import lru_cache
+from html import escape as _escape
+
+_NEEDS_ESCAPE = re.compile('[&<>"\']')
+
+# Values up to this length are memoized; longer ones are rarely static.
+_CACHED_LENGTH = 256
+
+
+class Markup(str):
+    """
+    A string of trusted HTML that widgets insert without escaping it.
+
+    Operations inherited from str return plain strings, which are escaped
+    again, so combining trusted and untrusted text stays safe.
+    """
+
+    __slots__ = ()
+
+    def __html__(self) -> 'Markup':
+        return self
+
+    def __repr__(self) -> str:
+        return f'Markup({str.__repr__(self)})'
+
+
+@lru_cache(maxsize=8192)
+def _escape_cached(value: str) -> Markup:
+    return Markup(_escape(value))
+
+
+def escape(value) -> str:
+    """
+    Escapes a value for use as HTML text or as a double-quoted attribute value.
+
+    Strings without special characters, which are most of them, are returned
+    as they are after a single scan. Escaped results of short strings are
+    memoized, so static values with entities are only escaped once per process.
+
+    Args:
+        value (Any): The value; anything that is not a string is converted with str().
+
+    Returns:
+        str: The escaped value, or the value itself if it is already markup.
+    """
+    if type(value) is str:
+        if _NEEDS_ESCAPE.search(value) is None:
+            return value
+        return _escape_cached(value) if len(value) <= _CACHED_LENGTH else Markup(_escape(value))
+    if type(value) is Markup:
+        return value
+    html = getattr(value, '__html__', None)
+    if html is not None:
+        return Markup(html())
+    return escape(str(value))
@@ -0,0 +1,249 @@
+import bisect
+import threading
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .document import render_with_js
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+SIZE_BUCKETS = (1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+
+def _escape_label(value: str) -> str:
+    return str(value).replace('\\', r'\\').replace('\n', r'\n').replace('"', r'\"')
+
+
+def _format_labels(labels: Tuple[Tuple[str, str], ...]) -> str:
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{key}="{_escape_label(value)}"' for key, value in labels) + '}'
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """
+    A monotonically increasing, thread-safe counter with optional labels.
+
+    Attributes:
+        name (str): The metric name.
+        help (str): The description shown in the exposition.
+    """
+
+    kind = 'counter'
+
+    def __init__(self, name: str, help: str):
+        self.name = name
+        self.help = help
+        self._values: Dict[Tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        """
+        Increments the counter.
+
+        Args:
+            amount (float, optional): The amount to add. Defaults to 1.
+            **labels (str): The label values of the series to increment.
+        """
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(tuple(sorted(labels.items())), 0)
+
+    def samples(self) -> List[Tuple[str, Tuple, float]]:
+        with self._lock:
+            return [(self.name, key, value) for key, value in self._values.items()]
+
+
+class Histogram:
+    """
+    A thread-safe histogram with cumulative buckets and optional labels.
+
+    Attributes:
+        name (str): The metric name.
+        help (str): The description shown in the exposition.
+        buckets (Tuple[float, ...]): The upper bounds of the buckets.
+    """
+
+    kind = 'histogram'
+
+    def __init__(self, name: str, help: str, buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.buckets = tuple(sorted(buckets))
+        self._values: Dict[Tuple, List] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: str) -> None:
+        """
+        Records one observation.
+
+        Args:
+            value (float): The observed value.
+            **labels (str): The label values of the series.
+        """
+        key = tuple(sorted(labels.items()))
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                # Per-bucket counts (the last one is +Inf), then the sum.
+                series = self._values[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    def samples(self) -> List[Tuple[str, Tuple, float]]:
+        samples = []
+        with self._lock:
+            items = [(key, list(series)) for key, series in self._values.items()]
+        for key, series in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), series):
+                cumulative += count
+                samples.append((f'{self.name}_bucket', key + (('le', _format_value(bound)),), cumulative))
+            samples.append((f'{self.name}_sum', key, series[-1]))
+            samples.append((f'{self.name}_count', key, cumulative))
+        return samples
+
+
+class MetricsRegistry:
+    """
+    A dependency-free collection of metrics exposed in the Prometheus text format.
+
+    Methods:
+        counter(name, help): Returns the counter with a name, creating it if needed.
+        histogram(name, help, buckets): Returns the histogram with a name, creating it if needed.
+        register_cache(name, cache): Exposes the hit, miss and eviction counts of a cache.
+        exposition(): Renders every metric in the Prometheus text format.
+    """
+
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+        self._caches: Dict[str, object] = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, name: str, factory):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = factory()
+            return metric
+
+    def counter(self, name: str, help: str = '') -> Counter:
+        return self._get_or_create(name, lambda: Counter(name, help))
+
+    def histogram(self, name: str, help: str = '', buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self._get_or_create(name, lambda: Histogram(name, help, buckets))
+
+    def register_cache(self, name: str, cache) -> None:
+        """
+        Exposes the counters of a render cache.
+
+        Args:
+            name (str): The value of the `cache` label.
+            cache: Any object with `hits`, `misses` and `evictions` attributes, such as a FragmentCache.
+        """
+        with self._lock:
+            self._caches[name] = cache
+
+    def exposition(self) -> str:
+        """
+        Renders every metric in the Prometheus text exposition format.
+
+        Returns:
+            str: The exposition document.
+        """
+        lines = []
+        with self._lock:
+            metrics = list(self._metrics.values())
+            caches = list(self._caches.items())
+        for metric in metrics:
+            lines.append(f'# HELP {metric.name} {metric.help}')
+            lines.append(f'# TYPE {metric.name} {metric.kind}')
+            for name, labels, value in metric.samples():
+                lines.append(f'{name}{_format_labels(labels)} {_format_value(value)}')
+        for counter in ('hits', 'misses', 'evictions'):
+            if not caches:
+                break
+            name = f'butterflask_cache_{counter}_total'
+            lines.append(f'# HELP {name} Render cache {counter}.')
+            lines.append(f'# TYPE {name} counter')
+            for cache_name, cache in caches:
+                lines.append(f'{name}{_format_labels((("cache", cache_name),))} {getattr(cache, counter, 0)}')
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = MetricsRegistry()
+
+
+def _count_widgets(widget) -> int:
+    return 1 + sum(_count_widgets(child) for child in getattr(widget, 'children', None) or ())
+
+
+def observe_render(widget, page: Optional[str] = None, registry: Optional[MetricsRegistry] = None) -> Tuple[str, List[str]]:
+    """
+    Renders a widget tree and records its render metrics.
+
+    Records the render latency, the output size, the number of widgets
+    rendered and the number of JavaScript handlers generated.
+
+    Args:
+        widget (Widget): The root of the widget tree, mutable or frozen.
+        page (str, optional): The `page` label. Defaults to the root widget's class name.
+        registry (MetricsRegistry, optional): The registry to record into. Defaults to REGISTRY.
+
+    Returns:
+        Tuple[str, List[str]]: The HTML and the generated JavaScript functions.
+    """
+    registry = registry or REGISTRY
+    if page is None:
+        page = getattr(widget, 'widget_type', type(widget)).__name__
+    start = time.perf_counter()
+    html, js = render_with_js(widget)
+    elapsed = time.perf_counter() - start
+    registry.histogram('butterflask_render_seconds', 'Time spent rendering a widget tree.').observe(elapsed, page=page)
+    registry.histogram(
+        'butterflask_render_output_bytes', 'Size of the rendered HTML.', SIZE_BUCKETS
+    ).observe(len(html.encode('utf-8')), page=page)
+    registry.counter('butterflask_widgets_rendered_total', 'Widgets rendered.').inc(_count_widgets(widget), page=page)
+    registry.counter('butterflask_js_handlers_total', 'JavaScript handlers generated.').inc(len(js), page=page)
+    return html, js
+
+
+def flask_view(registry: Optional[MetricsRegistry] = None):
+    """
+    Builds a Flask view function serving the metrics.
+
+    Usage: `app.add_url_rule('/metrics', view_func=flask_view())`.
+
+    Args:
+        registry (MetricsRegistry, optional): The registry to expose. Defaults to REGISTRY.
+
+    Returns:
+        Callable: The view function.
+    """
+    from flask import Response
+
+    def metrics():
+        return Response((registry or REGISTRY).exposition(), content_type=CONTENT_TYPE)
+    return metrics
+
+
+def django_view(request):
+    """
+    A Django view serving the metrics of REGISTRY.
+
+    Usage: `path('metrics', butterflask.metrics.django_view)`.
+    """
+    from django.http import HttpResponse
+
+    return HttpResponse(REGISTRY.exposition(), content_type=CONTENT_TYPE)
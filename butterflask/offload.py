@@ -0,0 +1,336 @@
+"""
+Building and rendering large trees in worker processes.
+
+Building and rendering a tree of tens of thousands of widgets holds the GIL
+for a long time, which stalls every other request of a threaded WSGI server.
+A RenderPool runs that work in a bounded pool of processes instead, and the
+request thread waits without holding the GIL. The worker returns the HTML
+and the generated JavaScript.
+
+Pages built for one request are best built by the worker too: only the
+function that builds the tree and its arguments are sent.
+
+    def build_report(year):
+        return Page(children=[...])
+
+    pool = RenderPool(processes=2, threshold=5000).start()
+    html, js = pool.render_call(build_report, 2024)
+
+The builder must be picklable (a module-level function) and so must its
+arguments. Calls whose tree had fewer than `threshold` widgets before run
+in the calling thread from then on, where sending the result back would
+cost more than it saves.
+
+Trees that are already built are sent as a compact snapshot, if they have
+at least `threshold` widgets:
+
+    html, js = pool.render_with_js(ui)
+
+Renders happen in the calling thread when the tree depends on state of this
+process (resized image variants, lazy Page sections without a shared
+SectionStore), inside an `inline_assets` block, when a worker process dies,
+and when no slot frees up within `queue_timeout` because `max_pending` renders
+are already in flight. A render still queued after `timeout` seconds is
+cancelled and done in the calling thread; one that is running raises
+TimeoutError, since it cannot be stopped. Errors raised by a builder or a
+render in the worker are raised in the calling thread.
+"""
+import os
+import threading
+from concurrent.futures import BrokenExecutor, ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from . import images, sections, snapshot
+from .document import render_with_js
+from .frozen import FrozenWidget
+from .inlining import _ACTIVE
+
+# Builder calls are remembered with the size of their tree up to this many entries.
+_MAX_CALLS = 4096
+
+
+def _inspect(root) -> Tuple[bool, int, List[List[str]]]:
+    """
+    Checks whether a tree renders the same in a worker as in the process serving it.
+
+    Resized image variants, and lazy Page sections unless the installed
+    SectionStore is shared, are registered in the process that renders
+    them, so another process would not serve them.
+
+    Returns:
+        Tuple[bool, int, List[List[str]]]: Whether the tree can be rendered elsewhere,
+        its number of widgets, and its distinct shared `js` lists. Like snapshots,
+        it tells a shared accumulator from a widget's own list by its contents.
+    """
+    pipeline = images.PIPELINE is not None
+    shared_sections = sections.SECTIONS.shared
+    lists = {}
+    count = 0
+    pending = [root]
+    while pending:
+        widget = pending.pop()
+        count += 1
+        attrs = vars(widget)
+        if attrs.get('lazy') and not shared_sections:
+            return False, count, []
+        if pipeline and attrs.get('width') and type(widget).__name__ == 'Image':
+            return False, count, []
+        js = attrs.get('js')
+        if js and isinstance(js, list):
+            lists.setdefault(id(js), js)
+        children = attrs.get('children')
+        if children:
+            pending.extend(children)
+    return True, count, list(lists.values())
+
+
+def _render_snapshot(data: bytes) -> Tuple[str, List[str]]:
+    return render_with_js(snapshot.loads(data))
+
+
+def _render_call(builder: Callable, args: Tuple, kwargs: Dict[str, Any]) -> Tuple[Optional[str], List[str], int]:
+    root = builder(*args, **kwargs)
+    portable, count, _ = _inspect(root)
+    if not portable:
+        return None, [], count
+    html, js = render_with_js(root)
+    return html, js, count
+
+
+def _noop() -> None:
+    pass
+
+
+def _call_key(builder: Callable, args: Tuple, kwargs: Dict[str, Any]) -> Optional[Tuple]:
+    """
+    Identifies a builder call by the builder and its arguments, or returns None for unhashable arguments.
+    """
+    key = (builder, args, tuple(sorted(kwargs.items()))) if kwargs else (builder, args)
+    try:
+        hash(key)
+    except TypeError:
+        return None
+    return key
+
+
+class RenderPool:
+    """
+    Builds and renders large widget trees in a bounded pool of worker processes.
+
+    Attributes:
+        processes (int): The number of worker processes.
+        threshold (int): The number of widgets from which trees are offloaded.
+        timeout (float): Seconds to wait for a worker.
+        max_pending (int): The maximum number of offloaded renders in flight.
+        queue_timeout (float): Seconds to wait for a free slot before rendering in the calling thread.
+        offloaded (int): Renders done by a worker.
+        local (int): Renders done in the calling thread because the tree was small or depends on
+            state of this process.
+        fallbacks (int): Renders done in the calling thread because a worker died or the render
+            was still queued after `timeout`.
+        timeouts (int): Renders still running in a worker after `timeout`, which raised TimeoutError.
+        saturated (int): Renders done in the calling thread because no slot was free.
+    """
+
+    def __init__(
+        self,
+        processes: Optional[int] = None,
+        threshold: int = 5000,
+        timeout: float = 10.0,
+        max_pending: Optional[int] = None,
+        queue_timeout: float = 0.0,
+        mp_context=None
+    ):
+        """
+        Initializes a RenderPool. Worker processes start on first use or with `start()`.
+
+        Args:
+            processes (int, optional): The number of worker processes. Defaults to the number of CPUs.
+            threshold (int, optional): The number of widgets from which trees are offloaded. Defaults to 5000.
+            timeout (float, optional): Seconds to wait for a worker. Defaults to 10.
+            max_pending (int, optional): The maximum number of offloaded renders in flight.
+                Defaults to twice the number of processes.
+            queue_timeout (float, optional): Seconds to wait for a free slot. Defaults to 0.
+            mp_context (optional): The multiprocessing context of the pool. Defaults to the platform default.
+        """
+        self.processes = processes or os.cpu_count() or 1
+        self.threshold = threshold
+        self.timeout = timeout
+        self.max_pending = max_pending or 2 * self.processes
+        self.queue_timeout = queue_timeout
+        self.mp_context = mp_context
+        self.offloaded = 0
+        self.local = 0
+        self.fallbacks = 0
+        self.timeouts = 0
+        self.saturated = 0
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        # (builder, arguments) -> number of widgets of the tree the call built in a worker.
+        self._sizes: Dict[Tuple, int] = {}
+
+    def _record(self, counter: str) -> None:
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def _executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(self.processes, mp_context=self.mp_context)
+            return self._pool
+
+    def start(self) -> 'RenderPool':
+        """
+        Starts the worker processes now, before the server starts its request threads.
+
+        Returns:
+            RenderPool: The pool itself.
+        """
+        pool = self._executor()
+        for future in [pool.submit(_noop) for _ in range(self.processes)]:
+            future.result()
+        return self
+
+    def _offload(self, function: Callable, *args) -> Tuple[bool, Any]:
+        """
+        Runs a function in a worker process.
+
+        Returns:
+            Tuple[bool, Any]: Whether the worker ran it, and its result. False means the
+            work is to be done in the calling thread, where it has not run yet.
+
+        Raises:
+            TimeoutError: If the worker is still running the function after `timeout`.
+            Exception: Whatever the function raised in the worker.
+        """
+        if not self._slots.acquire(timeout=self.queue_timeout):
+            self._record('saturated')
+            return False, None
+        try:
+            future = self._executor().submit(function, *args)
+        except BrokenExecutor:
+            self._slots.release()
+            self.close(wait=False)
+            self._record('fallbacks')
+            return False, None
+        # The slot stays taken until the worker is done, even after a timeout.
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            return True, future.result(self.timeout)
+        except FutureTimeoutError:
+            if future.cancel():
+                # It never started, so it runs only once, here.
+                self._record('fallbacks')
+                return False, None
+            self._record('timeouts')
+            raise TimeoutError(f'the render did not finish within {self.timeout} seconds') from None
+        except BrokenExecutor:
+            # A worker died, so the work did not finish anywhere.
+            self.close(wait=False)
+            self._record('fallbacks')
+            return False, None
+
+    def render_call(self, builder: Callable, *args, **kwargs) -> Tuple[str, List[str]]:
+        """
+        Builds a widget tree with `builder(*args, **kwargs)` and renders it in a worker process.
+
+        Only the builder and its arguments are sent to the worker. When the
+        render happens in the calling thread, the tree is built there. It does
+        for calls with the same arguments as one whose tree had fewer than
+        `threshold` widgets.
+
+        Args:
+            builder (Callable): A picklable function returning the root of a widget tree.
+            *args: Picklable positional arguments of the builder.
+            **kwargs: Picklable keyword arguments of the builder.
+
+        Returns:
+            Tuple[str, List[str]]: The HTML and the generated JavaScript functions,
+            like `render_with_js` from `butterflask.document`.
+
+        Raises:
+            TimeoutError: If the worker is still rendering after `timeout`.
+        """
+        key = _call_key(builder, args, kwargs)
+        size = self._sizes.get(key) if key is not None else None
+        if _ACTIVE.get() is not None or (size is not None and size < self.threshold):
+            self._record('local')
+            return render_with_js(builder(*args, **kwargs))
+        done, result = self._offload(_render_call, builder, args, kwargs)
+        if not done:
+            return render_with_js(builder(*args, **kwargs))
+        html, js, count = result
+        if key is not None:
+            if len(self._sizes) >= _MAX_CALLS:
+                self._sizes.clear()
+            self._sizes[key] = count
+        if html is None:
+            self._record('local')
+            return render_with_js(builder(*args, **kwargs))
+        self._record('offloaded')
+        return html, js
+
+    def render_with_js(self, root) -> Tuple[str, List[str]]:
+        """
+        Renders a widget tree and returns the JavaScript generated while rendering,
+        like `render_with_js` from `butterflask.document`.
+
+        Trees of at least `threshold` widgets are sent to a worker as a snapshot.
+        Their widgets then do not append to their `js` lists; the returned code is
+        appended to the tree's shared accumulator instead if it has exactly one.
+
+        Args:
+            root (Widget): The root of the widget tree, mutable or frozen.
+
+        Returns:
+            Tuple[str, List[str]]: The HTML and the generated JavaScript functions.
+
+        Raises:
+            TimeoutError: If the worker is still rendering after `timeout`.
+        """
+        if isinstance(root, FrozenWidget) or _ACTIVE.get() is not None:
+            self._record('local')
+            return render_with_js(root)
+        portable, count, lists = _inspect(root)
+        if not portable or count < self.threshold:
+            self._record('local')
+            return render_with_js(root)
+        try:
+            data = snapshot.dumps(root, None)
+        except TypeError:
+            self._record('local')
+            return render_with_js(root)
+        done, result = self._offload(_render_snapshot, data)
+        if not done:
+            return render_with_js(root)
+        html, js = result
+        self._record('offloaded')
+        if len(lists) == 1:
+            lists[0].extend(js)
+        return html, js
+
+    def render(self, root) -> str:
+        """
+        Renders a widget tree as HTML.
+
+        Args:
+            root (Widget): The root of the widget tree, mutable or frozen.
+
+        Returns:
+            str: The HTML.
+        """
+        return self.render_with_js(root)[0]
+
+    def close(self, wait: bool = True) -> None:
+        """
+        Shuts the worker processes down. A later offloaded render starts new ones.
+
+        Args:
+            wait (bool, optional): Whether to wait until the workers have exited. Defaults to True.
+        """
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=wait, cancel_futures=True)
@@ -0,0 +1,153 @@
+"""
+Speculative prefetching of the GET routes of Button, Card and Image widgets.
+
+A widget created with `prefetch='hover'` requests its route as soon as the
+pointer moves over it or it receives focus; with `prefetch='visible'` as soon
+as it scrolls into view. The response is kept in a small client-side cache
+(`butterflaskPrefetch.ttl` milliseconds, at most `butterflaskPrefetch.maxEntries`
+entries) and the click handler uses it instead of starting a new request.
+Only GET and HEAD routes can be prefetched, and not by widgets that set
+`before_send`, since the prefetch request could not run it.
+"""
+from typing import Optional
+
+from .markup import escape
+
+PREFETCH_MODES = ('hover', 'visible')
+
+SAFE_METHODS = frozenset(('GET', 'HEAD'))
+
+PREFETCH_JS = """
+        (function() {
+            if (window.butterflaskPrefetch) {
+                return;
+            }
+            var entries = new Map();
+            var prefetch = window.butterflaskPrefetch = {
+                ttl: 10000,
+                maxEntries: 32,
+                take: function(url, data) {
+                    var key = url + '\\n' + (data || '');
+                    var entry = entries.get(key);
+                    if (!entry) {
+                        return null;
+                    }
+                    entries.delete(key);
+                    return entry.expires > Date.now() ? entry.request : null;
+                },
+                fetch: function(element) {
+                    var method = (element.getAttribute('data-prefetch-method') || '').toUpperCase();
+                    if ((method !== 'GET' && method !== 'HEAD') || (navigator.connection && navigator.connection.saveData)) {
+                        return;
+                    }
+                    var url = element.getAttribute('data-prefetch-url');
+                    var data = element.getAttribute('data-prefetch-data');
+                    var key = url + '\\n' + (data || '');
+                    var entry = entries.get(key);
+                    if (entry && entry.expires > Date.now()) {
+                        return;
+                    }
+                    var request = $.ajax({
+                        type: method,
+                        url: url,
+                        data: data,
+                        dataType: element.getAttribute('data-prefetch-type'),
+                        contentType: element.getAttribute('data-prefetch-content-type')
+                    });
+                    entries.delete(key);
+                    entries.set(key, {request: request, expires: Date.now() + prefetch.ttl});
+                    request.fail(function() {
+                        if (entries.has(key) && entries.get(key).request === request) {
+                            entries.delete(key);
+                        }
+                    });
+                    while (entries.size > prefetch.maxEntries) {
+                        entries.delete(entries.keys().next().value);
+                    }
+                }
+            };
+            function onIntent(event) {
+                var element = event.target.closest ? event.target.closest('[data-prefetch]') : null;
+                if (element) {
+                    prefetch.fetch(element);
+                }
+            }
+            document.addEventListener('pointerover', onIntent, {passive: true});
+            document.addEventListener('focusin', onIntent);
+            if ('IntersectionObserver' in window) {
+                var observer = new IntersectionObserver(function(items) {
+                    items.forEach(function(item) {
+                        if (item.isIntersecting) {
+                            observer.unobserve(item.target);
+                            prefetch.fetch(item.target);
+                        }
+                    });
+                });
+                var observe = function(root) {
+                    if (root.matches && root.matches('[data-prefetch="visible"]')) {
+                        observer.observe(root);
+                    }
+                    if (root.querySelectorAll) {
+                        root.querySelectorAll('[data-prefetch="visible"]').forEach(function(element) {
+                            observer.observe(element);
+                        });
+                    }
+                };
+                observe(document);
+                new MutationObserver(function(mutations) {
+                    mutations.forEach(function(mutation) {
+                        mutation.addedNodes.forEach(observe);
+                    });
+                }).observe(document.documentElement, {childList: true, subtree: true});
+            }
+        })();
+    """
+
+
+def check_prefetch(prefetch: Optional[str], method: str, route: Optional[str], before_send: str = '') -> None:
+    """
+    Validates the prefetch option of a widget.
+
+    Args:
+        prefetch (str, optional): 'hover', 'visible' or None.
+        method (str): The HTTP method of the widget's route.
+        route (str, optional): The widget's route.
+        before_send (str, optional): The widget's `beforeSend` code. Defaults to ''.
+
+    Raises:
+        ValueError: If the mode is unknown, there is no route, the method is not safe to repeat,
+            or the widget sets `before_send`, which the prefetch request could not run.
+    """
+    if not prefetch:
+        return
+    if prefetch not in PREFETCH_MODES:
+        raise ValueError(f"prefetch must be one of {', '.join(PREFETCH_MODES)}, not {prefetch!r}")
+    if not route:
+        raise ValueError('prefetch requires a route')
+    if method.upper() not in SAFE_METHODS:
+        raise ValueError(f'only GET and HEAD routes can be prefetched, not {method}')
+    if before_send:
+        raise ValueError('prefetch cannot be combined with before_send; the prefetch request would be sent without it')
+
+
+def format_prefetch_attrs(
+    prefetch: Optional[str],
+    method: str,
+    route: Optional[str],
+    request_data: str,
+    data_type: str,
+    content_type: str
+) -> str:
+    """
+    Formats the data attributes read by the prefetch runtime.
+
+    Returns:
+        str: The attributes with a leading space, or '' if the widget does not prefetch.
+    """
+    if not prefetch:
+        return ''
+    return (
+        f' data-prefetch="{prefetch}" data-prefetch-method="{escape(method.upper())}" data-prefetch-url="{escape(route)}"'
+        f' data-prefetch-data="{escape(request_data)}" data-prefetch-type="{escape(data_type)}"'
+        f' data-prefetch-content-type="{escape(content_type)}"'
+    )
@@ -0,0 +1,120 @@
+import gc
+import time
+from typing import Callable, Dict, Iterator, Optional, Tuple
+
+from .frozen import FrozenWidget, freeze
+
+
+class PreloadRegistry:
+    """
+    A registry of page builders and static subtrees that can be warmed up before fork.
+
+    Under a pre-forking server (e.g. gunicorn with `preload_app = True`) call
+    warmup() in the master process. Every registered tree is then built,
+    frozen and rendered once, and the resulting objects are moved out of the
+    garbage collector's reach with gc.freeze(), so workers share them
+    copy-on-write instead of rebuilding them cold.
+
+    Methods:
+        page(name): Decorator registering a page builder.
+        static(name, builder): Registers a static subtree.
+        warmup(): Prebuilds and pre-renders every registered tree.
+        builder(name): Returns the builder registered under a name.
+        get(name): Returns the frozen tree registered under a name.
+    """
+
+    def __init__(self):
+        self._builders: Dict[str, Callable] = {}
+        self._kinds: Dict[str, str] = {}
+        self._frozen: Dict[str, FrozenWidget] = {}
+
+    def _register(self, name: str, builder: Callable, kind: str) -> None:
+        if name in self._builders:
+            raise ValueError(f"'{name}' is already registered")
+        self._builders[name] = builder
+        self._kinds[name] = kind
+
+    def page(self, name: Optional[str] = None) -> Callable:
+        """
+        Registers a page builder.
+
+        Args:
+            name (str, optional): The name (usually the route) of the page. Defaults to the builder's name.
+
+        Returns:
+            Callable: A decorator that registers and returns the builder unchanged.
+        """
+        def decorator(builder: Callable) -> Callable:
+            self._register(name or builder.__name__, builder, 'page')
+            return builder
+        return decorator
+
+    def static(self, name: str, builder: Callable) -> None:
+        """
+        Registers a static subtree shared by several pages.
+
+        Args:
+            name (str): The name of the subtree.
+            builder (Callable): A function without arguments returning the widget tree.
+        """
+        self._register(name, builder, 'static')
+
+    def pages(self) -> Iterator[Tuple[str, Callable]]:
+        """
+        Iterates over the registered page builders.
+
+        Returns:
+            Iterator[Tuple[str, Callable]]: The (name, builder) pairs of every page.
+        """
+        return ((name, builder) for name, builder in self._builders.items() if self._kinds[name] == 'page')
+
+    def builder(self, name: str) -> Callable:
+        """
+        Returns the builder registered under a name.
+
+        Args:
+            name (str): The name of the page or subtree.
+
+        Returns:
+            Callable: The builder.
+        """
+        return self._builders[name]
+
+    def get(self, name: str) -> FrozenWidget:
+        """
+        Returns the frozen tree registered under a name, building it on first use.
+
+        Args:
+            name (str): The name of the page or subtree.
+
+        Returns:
+            FrozenWidget: The frozen tree.
+        """
+        tree = self._frozen.get(name)
+        if tree is None:
+            tree = freeze(self._builders[name]())
+            self._frozen[name] = tree
+        return tree
+
+    def warmup(self, freeze_gc: bool = True) -> Dict[str, float]:
+        """
+        Builds, freezes and pre-renders every registered tree.
+
+        Args:
+            freeze_gc (bool, optional): Whether to call gc.freeze() afterwards, so
+                the warmed objects stay shared between forked workers. Defaults to True.
+
+        Returns:
+            Dict[str, float]: The warmup time of each tree in seconds.
+        """
+        timings = {}
+        for name in self._builders:
+            start = time.perf_counter()
+            tree = self.get(name)
+            tree.render()
+            tree.js_code()
+            timings[name] = time.perf_counter() - start
+        if freeze_gc:
+            gc.collect()
+            gc.freeze()
+        return timings
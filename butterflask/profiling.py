@@ -0,0 +1,221 @@
+import json
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterator, List, Optional
+
+from .Widget import Widget
+from .frozen import FrozenWidget
+
+
+class RenderSpan:
+    """
+    The timing of one widget's render() call.
+
+    Attributes:
+        widget_type (str): The class name of the widget.
+        id (str): The HTML id of the widget, or ''.
+        stack (List[str]): The labels of the enclosing widgets, root first, ending with this one.
+        thread_id (int): The thread that rendered the widget.
+        start (float): The start time in seconds, relative to the profile start.
+        cumulative_time (float): The duration of the call in seconds, children included.
+        self_time (float): The duration of the call in seconds, children excluded.
+        output_bytes (int): The size of the rendered HTML.
+        js_bytes (int): The size of the JavaScript generated by the widget itself.
+    """
+
+    __slots__ = (
+        'widget_type', 'id', 'stack', 'thread_id', 'start',
+        'cumulative_time', 'self_time', 'output_bytes', 'js_bytes', '_child_time', '_child_js_bytes'
+    )
+
+    def __init__(self, widget, stack: List[str], start: float):
+        if isinstance(widget, FrozenWidget):
+            self.widget_type = widget.widget_type.__name__
+            self.id = widget._values.get('id') or ''
+        else:
+            self.widget_type = type(widget).__name__
+            self.id = getattr(widget, 'id', '') or ''
+        self.stack = stack
+        self.thread_id = threading.get_ident()
+        self.start = start
+        self.cumulative_time = 0.0
+        self.self_time = 0.0
+        self.output_bytes = 0
+        self.js_bytes = 0
+        self._child_time = 0.0
+        self._child_js_bytes = 0
+
+    @property
+    def label(self) -> str:
+        return f'{self.widget_type}#{self.id}' if self.id else self.widget_type
+
+
+class RenderProfile:
+    """
+    The per-widget spans recorded while profiling was enabled.
+
+    Methods:
+        to_collapsed(): Exports the spans as flame-graph collapsed stacks.
+        to_chrome_trace(): Exports the spans as Chrome trace events.
+    """
+
+    def __init__(self):
+        self.spans: List[RenderSpan] = []
+        self._origin = time.perf_counter()
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def _stack(self) -> List:
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def to_collapsed(self) -> str:
+        """
+        Exports the spans in the collapsed-stack format read by flamegraph.pl and speedscope.
+
+        Returns:
+            str: One line per distinct stack with its self time in microseconds.
+        """
+        totals: Dict[str, int] = {}
+        for span in self.spans:
+            key = ';'.join(span.stack)
+            totals[key] = totals.get(key, 0) + round(span.self_time * 1e6)
+        return ''.join(f'{stack} {weight}\n' for stack, weight in totals.items())
+
+    def to_chrome_trace(self) -> str:
+        """
+        Exports the spans as Chrome trace-event JSON, viewable in chrome://tracing or Perfetto.
+
+        Returns:
+            str: The trace as a JSON document.
+        """
+        events = [
+            {
+                'name': span.label,
+                'cat': 'render',
+                'ph': 'X',
+                'ts': span.start * 1e6,
+                'dur': span.cumulative_time * 1e6,
+                'pid': 1,
+                'tid': span.thread_id,
+                'args': {
+                    'type': span.widget_type,
+                    'id': span.id,
+                    'self_us': span.self_time * 1e6,
+                    'output_bytes': span.output_bytes,
+                    'js_bytes': span.js_bytes,
+                },
+            }
+            for span in self.spans
+        ]
+        return json.dumps({'traceEvents': events, 'displayTimeUnit': 'ms'})
+
+
+# The profile of the current thread or task, if it is inside a profile_render block.
+_active: ContextVar[Optional[RenderProfile]] = ContextVar('butterflask_profile', default=None)
+
+# The original render() methods while at least one profile_render block is open anywhere.
+_originals: Dict[type, Callable] = {}
+_open_profiles = 0
+_install_lock = threading.Lock()
+
+
+def _js_size(widget, start: int) -> int:
+    js = getattr(widget, 'js', None)
+    if not isinstance(js, list):
+        return 0
+    return sum(len(code.encode('utf-8')) for code in js[start:])
+
+
+def _instrument(render):
+    def profiled_render(self):
+        profile = _active.get()
+        if profile is None:
+            return render(self)
+        stack = profile._stack()
+        if stack and stack[-1][0] is self:
+            # A widget calling its base class's render(), e.g. Center via super().
+            return render(self)
+        parent_widget, parent = stack[-1] if stack else (None, None)
+        span = RenderSpan(self, (parent.stack if parent else []) + [''], 0.0)
+        span.stack[-1] = span.label
+        js = getattr(self, 'js', None)
+        js_start = len(js) if isinstance(js, list) else 0
+        stack.append((self, span))
+        start = time.perf_counter()
+        try:
+            html = render(self)
+        finally:
+            elapsed = time.perf_counter() - start
+            stack.pop()
+        js_bytes = _js_size(self, js_start)
+        span.start = start - profile._origin
+        span.cumulative_time = elapsed
+        span.self_time = elapsed - span._child_time
+        span.output_bytes = len(html.encode('utf-8'))
+        span.js_bytes = js_bytes - span._child_js_bytes
+        if parent is not None:
+            parent._child_time += elapsed
+            if js_bytes and getattr(parent_widget, 'js', None) is js:
+                # Both appended to one shared list; the parent only owns its own share.
+                parent._child_js_bytes += js_bytes
+        with profile._lock:
+            profile.spans.append(span)
+        return html
+    profiled_render.__wrapped__ = render
+    return profiled_render
+
+
+def _widget_classes() -> Iterator[type]:
+    pending = [Widget]
+    while pending:
+        cls = pending.pop()
+        yield cls
+        pending.extend(cls.__subclasses__())
+    yield FrozenWidget
+
+
+@contextmanager
+def profile_render() -> Iterator[RenderProfile]:
+    """
+    Records a span for every widget rendered inside the `with` block.
+
+    Only renders in the calling thread or asyncio task are recorded, so
+    requests served concurrently neither appear in the profile nor pay for
+    it beyond one context lookup per widget. Instrumentation is installed
+    when the first block opens and removed when the last one closes, so
+    rendering afterwards runs the original render() methods.
+
+    Yields:
+        RenderProfile: The profile receiving the spans.
+
+    Raises:
+        RuntimeError: If a profile is already active in this thread or task.
+    """
+    global _open_profiles
+    if _active.get() is not None:
+        raise RuntimeError('a render profile is already active')
+    profile = RenderProfile()
+    with _install_lock:
+        if _open_profiles == 0:
+            for cls in _widget_classes():
+                render = cls.__dict__.get('render')
+                if render is not None:
+                    _originals[cls] = render
+                    cls.render = _instrument(render)
+        _open_profiles += 1
+    token = _active.set(profile)
+    try:
+        yield profile
+    finally:
+        _active.reset(token)
+        with _install_lock:
+            _open_profiles -= 1
+            if _open_profiles == 0:
+                for cls, render in _originals.items():
+                    cls.render = render
+                _originals.clear()
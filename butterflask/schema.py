@@ -0,0 +1,275 @@
+"""
+Declarative widget fields.
+
+A widget lists its constructor parameters as Fields and `schema` generates
+its `__init__` once, when the class is defined, in the spirit of dataclasses:
+
+    @schema(
+        Field('text', str, doc='The text displayed on the button.'),
+        NO_CHILDREN, DEFAULT, ID, CLASSES, FUNC_NAME, METHOD, JS, ON_CLICK, STYLE, *AJAX,
+        default_style={'color': 'white'},
+    )
+    class Button(Widget):
+        ...
+
+The generated constructor stores every field with plain attribute
+assignments. The default style is merged once per class (or once per
+combination of the fields it depends on) and copied into each widget;
+it is only merged again when the caller passes styles of their own.
+"""
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union, get_args, get_origin
+
+from .Widget import Widget
+
+
+class _Required:
+    def __repr__(self) -> str:
+        return 'REQUIRED'
+
+
+# The default of fields without one, and the annotation of fields without one.
+REQUIRED = _Required()
+
+
+class Field:
+    """
+    A constructor parameter of a widget and the attribute it is stored in.
+
+    Attributes:
+        name (str): The parameter name.
+        annotation (Any): The parameter annotation, if any.
+        default (Any): The default value, or REQUIRED.
+        doc (str): The description used in the generated docstring.
+        attribute (str): The attribute the value is stored in; None if it is not stored.
+        value (str): The stored expression, with `{name}` standing for the parameter.
+        init (bool): Whether the field is a constructor parameter.
+        check (Callable, optional): Called with the fields named by its parameters when the
+            value is not the default; raises if the combination is invalid.
+    """
+
+    __slots__ = ('name', 'annotation', 'default', 'doc', 'attribute', 'value', 'init', 'check')
+
+    def __init__(
+        self,
+        name: str,
+        annotation: Any = REQUIRED,
+        default: Any = REQUIRED,
+        doc: str = '',
+        attribute: Optional[str] = '',
+        value: str = '{name}',
+        init: bool = True,
+        check: Optional[Callable] = None
+    ):
+        self.name = name
+        self.annotation = annotation
+        self.default = default
+        self.doc = doc
+        self.attribute = name if attribute == '' else attribute
+        self.value = value
+        self.init = init
+        self.check = check
+
+    def replace(self, **changes) -> 'Field':
+        """
+        Returns a copy of the field with some of its settings changed.
+        """
+        settings = {name: getattr(self, name) for name in self.__slots__}
+        if 'name' in changes and 'attribute' not in changes and self.attribute == self.name:
+            settings['attribute'] = changes['name']
+        settings.update(changes)
+        return Field(**settings)
+
+
+def _check_prefetch(prefetch, method, route, before_send):
+    # Imported here so that widgets without prefetch support do not load the prefetch module.
+    from .prefetch import check_prefetch
+    check_prefetch(prefetch, method, route, before_send)
+
+
+CHILDREN = Field('children', List[Widget], None, 'The list of child widgets.', value='{name} or []')
+NO_CHILDREN = Field('children', init=False, value='[]')
+STYLE = Field('style', Optional[Dict[str, str]], None, 'CSS styles for the widget. Defaults to an empty dictionary.',
+              value='{name} or {{}}')
+DEFAULT = Field('default', bool, True, 'Whether to apply default styles to the widget. Defaults to True.')
+ID = Field('id', str, '', "The ID attribute of the widget. Defaults to ''.")
+CLASSES = Field('classes', List[str], None, 'The classes to apply to the widget. Defaults to an empty list.',
+                value='{name} or []')
+FUNC_NAME = Field('func_name', Optional[str], None,
+                  "The name of the JavaScript function associated with the widget's click event.")
+METHOD = Field('method', str, 'POST', "The HTTP method used for AJAX requests. Defaults to 'POST'.")
+JS = Field('js', Optional[List[str]], None, 'The shared list the generated JavaScript is appended to.',
+           value='{name} or []')
+ON_CLICK = Field('on_click', Optional[str], None, 'JavaScript code to be executed on click.')
+PREFETCH = Field('prefetch', Optional[str], None,
+                 "Prefetch the GET route on 'hover' (pointer or focus) or when 'visible'. Defaults to None.",
+                 check=_check_prefetch)
+AJAX = (
+    Field('route', Optional[str], None, 'The URL for AJAX requests. Defaults to None.'),
+    Field('request_data', str, '', 'Data to be sent with AJAX requests. Defaults to an empty string.'),
+    Field('before_send', str, '', 'JavaScript code to be executed before sending AJAX requests.'),
+    Field('data_type', str, 'json', "The expected data type for AJAX responses. Defaults to 'json'."),
+    Field('content_type', str, 'application/json', "The content type for AJAX requests. Defaults to 'application/json'."),
+    Field('on_success', str, '', 'JavaScript code to be executed on successful AJAX response.'),
+    Field('on_completed', str, '', 'JavaScript code to be executed after AJAX request completes.'),
+    Field('on_error', str, '', 'JavaScript code to be executed on AJAX error response.'),
+)
+
+
+def _parameters(function: Callable) -> Tuple[str, ...]:
+    code = function.__code__
+    return code.co_varnames[:code.co_argcount]
+
+
+def _type_name(annotation: Any) -> str:
+    if get_origin(annotation) is Union:
+        arguments = [argument for argument in get_args(annotation) if argument is not type(None)]
+        if len(arguments) == 1:
+            annotation = arguments[0]
+    if isinstance(annotation, type):
+        return annotation.__name__
+    return repr(annotation).replace('typing.', '').replace('butterflask.Widget.', '')
+
+
+def _docstring(cls: type, fields: Tuple[Field, ...]) -> str:
+    lines = [f'Initializes a {cls.__name__} instance.', '', 'Args:']
+    for field in fields:
+        if not field.init:
+            continue
+        kind = '' if field.annotation is REQUIRED else _type_name(field.annotation)
+        if field.default is not REQUIRED:
+            kind = f'{kind}, optional' if kind else 'optional'
+        lines.append(f'    {field.name} ({kind}): {field.doc}' if kind else f'    {field.name}: {field.doc}')
+    return '\n'.join(lines)
+
+
+def _compile(source: str, name: str, namespace: Dict[str, Any]) -> Callable:
+    exec(source, namespace)
+    return namespace[name]
+
+
+def _make_init(
+    cls: type,
+    fields: Tuple[Field, ...],
+    default_style: Union[Dict[str, str], Callable, None],
+    default_flag: Optional[str]
+) -> Callable:
+    namespace: Dict[str, Any] = {}
+    parameters = []
+    annotations = {}
+    for field in fields:
+        if not field.init:
+            continue
+        if field.default is REQUIRED:
+            parameters.append(field.name)
+        else:
+            namespace[f'_default_{field.name}'] = field.default
+            parameters.append(f'{field.name}=_default_{field.name}')
+        if field.annotation is not REQUIRED:
+            annotations[field.name] = field.annotation
+
+    # Widget.__init__ stored the children first; keep that attribute order.
+    stored = sorted((field for field in fields if field.attribute), key=lambda field: field.attribute != 'children')
+    body = []
+    for field in stored:
+        value = field.value.format(name=field.name)
+        if field.attribute == 'style' and default_style is not None and default_flag:
+            if callable(default_style):
+                arguments = ', '.join(_parameters(default_style))
+                namespace['_style_base'] = lru_cache(maxsize=256)(default_style)
+                base = f'_style_base({arguments})'
+            else:
+                namespace['_style_base'] = dict(default_style)
+                base = '_style_base'
+            body += [
+                f'if {default_flag}:',
+                f'    _base = {base}',
+                f'    self.style = {{**_base, **{field.name}}} if {field.name} else _base.copy()',
+                'else:',
+                f'    self.style = {value}',
+            ]
+        else:
+            body.append(f'self.{field.attribute} = {value}')
+    for field in fields:
+        if field.check is not None:
+            namespace[f'_check_{field.name}'] = field.check
+            arguments = ', '.join(_parameters(field.check))
+            body.append(f'if {field.name} is not _default_{field.name}:')
+            body.append(f'    _check_{field.name}({arguments})')
+
+    source = f"def __init__(self, {', '.join(parameters)}):\n" + ''.join(f'    {line}\n' for line in body or ['pass'])
+    init = _compile(source, '__init__', namespace)
+    init.__annotations__ = annotations
+    init.__qualname__ = f'{cls.__qualname__}.__init__'
+    init.__module__ = cls.__module__
+    init.__doc__ = _docstring(cls, fields)
+    return init
+
+
+def _make_apply_default_style(default_style: Union[Dict[str, str], Callable]) -> Callable:
+    if callable(default_style):
+        names = _parameters(default_style)
+
+        def _apply_default_style(self):
+            base = default_style(*[getattr(self, name) for name in names])
+            self.style = {**base, **self.style}
+    else:
+        def _apply_default_style(self):
+            self.style = {**default_style, **self.style}
+    _apply_default_style.__doc__ = 'Applies the default CSS styles, keeping the styles already set.'
+    return _apply_default_style
+
+
+def _make_render_js(fields: Tuple[Field, ...]) -> Callable:
+    names = {field.name for field in fields}
+    prefetch = 'prefetch' in names
+    # Imported here so that widgets without AJAX support do not load the generator.
+    from .js_code_generator import generate_js_code
+    namespace: Dict[str, Any] = {'generate_js_code': generate_js_code}
+    arguments = ('func_name', 'method', 'route', 'request_data', 'data_type', 'content_type',
+                 'before_send', 'on_success', 'on_error', 'on_completed')
+    call = ', '.join(f'self.{name}' for name in arguments)
+    lines = ['if self.js and self.route:']
+    if prefetch:
+        from .prefetch import PREFETCH_JS
+        namespace['PREFETCH_JS'] = PREFETCH_JS
+        lines += [
+            f'    js_code = generate_js_code({call}, bool(self.prefetch))',
+            '    if self.prefetch and PREFETCH_JS not in self.js:',
+            '        self.js.append(PREFETCH_JS)',
+            '    self.js.append(js_code)',
+        ]
+    else:
+        lines.append(f'    self.js.append(generate_js_code({call}))')
+    source = 'def _render_js(self):\n' + ''.join(f'    {line}\n' for line in lines)
+    render_js = _compile(source, '_render_js', namespace)
+    render_js.__doc__ = "Appends the widget's AJAX function to its shared `js` list if it has a route."
+    return render_js
+
+
+def schema(
+    *fields: Field,
+    default_style: Union[Dict[str, str], Callable, None] = None,
+    default_flag: Optional[str] = 'default'
+) -> Callable[[type], type]:
+    """
+    Generates the constructor of a widget class from its fields.
+
+    Args:
+        *fields (Field): The constructor parameters, in order.
+        default_style (Dict[str, str] or Callable, optional): The default CSS styles, or a
+            function returning them from the fields named by its parameters. Defaults to None.
+        default_flag (str, optional): The field that turns the default styles on. Defaults to 'default'.
+
+    Returns:
+        Callable[[type], type]: A class decorator.
+    """
+    def decorate(cls: type) -> type:
+        cls.fields = fields
+        cls.__init__ = _make_init(cls, fields, default_style, default_flag)
+        if default_style is not None:
+            cls._apply_default_style = _make_apply_default_style(default_style)
+        if any(field.name == 'js' for field in fields):
+            cls._render_js = _make_render_js(fields)
+        return cls
+    return decorate
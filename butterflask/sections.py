@@ -0,0 +1,283 @@
+"""
+Lazily loaded Page sections.
+
+A Page created with `lazy=True` renders as an empty placeholder of the same
+size. Its children are registered in a SectionStore, pre-rendered in the
+background, and fetched by the browser from the section route when the
+placeholder approaches the viewport:
+
+    sections = lazy_sections([hero, features, pricing, faq], eager=1)
+    ui = Widget(children=sections)
+
+The Flask extension registers the section route when given a store with
+`ButterFlask(app, section_store=...)`; Django projects
+include `butterflask.integrations.django.urls`.
+
+Sections are kept in memory by default, which only works while one process
+serves every request. Servers with several worker processes or hosts
+install a store backed by a shared fragment cache:
+
+    SectionStore(cache=SQLiteFragmentCache('/var/cache/app/fragments.db')).install()
+
+A page answered with 304 Not Modified is not rendered, so its sections are
+registered with `register_sections` instead; the browser fetches them from
+its cached copy of the page.
+"""
+import copy
+import json
+import queue
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Optional, Sequence, Tuple
+
+from .Widget import Widget
+from .fingerprint import fingerprint
+from .fragment_cache import FragmentCache, MemoryFragmentCache
+from .frozen import freeze
+
+SECTION_ROUTE = '/_butterflask/section/'
+
+# Loads the placeholder it is part of when it comes within one viewport height of the screen.
+SECTION_JS = (
+    "(function(s){var l=window.butterflaskSection;if(!l){var load=function(e){"
+    "fetch(e.getAttribute('data-butterflask-section'),{credentials:'same-origin'})"
+    ".then(function(r){if(!r.ok){throw new Error('section '+r.status);}return r.json();})"
+    ".then(function(f){e.removeAttribute('data-butterflask-section');e.innerHTML=f.html;"
+    "if(f.js){var c=document.createElement('script');c.text=f.js;document.head.appendChild(c);}})"
+    ".catch(function(x){console.log(x);});};"
+    "var o='IntersectionObserver' in window?new IntersectionObserver(function(es){es.forEach(function(en){"
+    "if(en.isIntersecting){o.unobserve(en.target);load(en.target);}});},{rootMargin:'100% 0px'}):null;"
+    "l=window.butterflaskSection=function(e){if(o){o.observe(e);}else{load(e);}};}"
+    "l(s);})(document.currentScript.parentNode);"
+)
+
+
+def render_section(children: Sequence) -> str:
+    """
+    Renders the children of a lazy section as the JSON document served by the section route.
+
+    The children are frozen first, so the JavaScript they generate is
+    collected without touching the `js` lists of the original page.
+
+    Args:
+        children (Sequence[Widget]): The section's children.
+
+    Returns:
+        str: A JSON object with the `html` and `js` of the section.
+    """
+    section = freeze(Widget(list(children)))
+    return json.dumps({'html': section.render(), 'js': '\n'.join(section.js_code())}, separators=(',', ':'))
+
+
+def section_key(page) -> str:
+    """
+    Returns the key of a lazy Page's section, computed once per page.
+
+    Args:
+        page (Page): A lazy Page, whose children must not change once it has been rendered.
+
+    Returns:
+        str: The fingerprint of the page's children.
+    """
+    key = page.__dict__.get('_section_key')
+    if key is None:
+        key = page._section_key = fingerprint(Widget(list(page.children)))
+    return key
+
+
+class SectionStore:
+    """
+    Keeps the children of lazy sections until the browser fetches them.
+
+    Sections are keyed by the fingerprints of their children, so every visitor
+    of a page shares one entry. Newly registered sections are pre-rendered by
+    a background thread, by default into a size-bounded memory cache. With a
+    shared cache, such as a SQLiteFragmentCache or RedisFragmentCache used by
+    every worker, any worker can serve the browser's request for a section;
+    a worker that did not register it waits up to `wait` seconds for the
+    worker that did to store it.
+
+    Attributes:
+        route (str): The URL prefix of the section route.
+        max_sections (int): The maximum number of sections kept for rendering on demand.
+        cache (FragmentCache): The cache of rendered sections.
+        shared (bool): Whether the cache is shared with other processes.
+        wait (float): Seconds to wait for a section another process registered.
+    """
+
+    def __init__(
+        self,
+        route: str = SECTION_ROUTE,
+        max_sections: int = 1024,
+        max_bytes: int = 16 * 1024 * 1024,
+        prerender: bool = True,
+        cache: Optional[FragmentCache] = None,
+        wait: float = 2.0
+    ):
+        """
+        Initializes a SectionStore.
+
+        Args:
+            route (str, optional): The URL prefix of the section route. Defaults to SECTION_ROUTE.
+            max_sections (int, optional): The maximum number of sections kept for rendering on demand.
+                Defaults to 1024.
+            max_bytes (int, optional): The size limit of the default memory cache. Defaults to 16 MiB.
+            prerender (bool, optional): Whether to pre-render sections in a background thread.
+                Always true with a shared cache, which other processes read. Defaults to True.
+            cache (FragmentCache, optional): A cache shared by every process serving the application.
+                Defaults to a memory cache of this process.
+            wait (float, optional): Seconds to wait for a section another process registered.
+                Defaults to 2.
+        """
+        self.route = route
+        self.max_sections = max_sections
+        self.shared = cache is not None
+        self.cache = cache if cache is not None else MemoryFragmentCache(max_bytes)
+        self._sections: 'OrderedDict[str, Tuple]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.wait = wait
+        self._queue: Optional[queue.Queue] = queue.Queue(max_sections) if prerender or self.shared else None
+        self._worker: Optional[threading.Thread] = None
+
+    def install(self) -> 'SectionStore':
+        """
+        Makes this the store lazy Pages register their sections in and the section routes serve.
+
+        Returns:
+            SectionStore: The store itself.
+        """
+        global SECTIONS
+        SECTIONS = self
+        return self
+
+    def url(self, key: str) -> str:
+        return self.route + key
+
+    def register(self, children: Sequence, key: Optional[str] = None) -> str:
+        """
+        Stores the children of a lazy section and queues it for pre-rendering.
+
+        The children must not be changed after the page has been rendered.
+
+        Args:
+            children (Sequence[Widget]): The section's children.
+            key (str, optional): The section key, if it is known already. Defaults to
+                the fingerprint of the children.
+
+        Returns:
+            str: The section key.
+        """
+        children = tuple(children)
+        if key is None:
+            key = fingerprint(Widget(list(children)))
+        with self._lock:
+            if key in self._sections:
+                self._sections.move_to_end(key)
+                return key
+            self._sections[key] = children
+            while len(self._sections) > self.max_sections:
+                self._sections.popitem(last=False)
+        if self._queue is not None and self.cache.get(key) is None:
+            self._start_worker()
+            try:
+                self._queue.put_nowait(key)
+            except queue.Full:
+                pass
+        return key
+
+    def fetch(self, key: str) -> Optional[str]:
+        """
+        Returns a rendered section, rendering it now if it was not pre-rendered yet.
+
+        Args:
+            key (str): The section key.
+
+        Returns:
+            str: The JSON document of the section, or None for an unknown key.
+        """
+        payload = self.cache.get(key)
+        if payload is not None:
+            return payload
+        with self._lock:
+            children = self._sections.get(key)
+        if children is None:
+            return self._await(key) if self.shared else None
+        payload = render_section(children)
+        self.cache.set(key, payload)
+        return payload
+
+    def _await(self, key: str) -> Optional[str]:
+        """
+        Polls the shared cache for a section another process is pre-rendering.
+        """
+        deadline = time.monotonic() + self.wait
+        delay = 0.01
+        while time.monotonic() < deadline:
+            time.sleep(delay)
+            payload = self.cache.get(key)
+            if payload is not None:
+                return payload
+            delay = min(delay * 2, 0.2)
+        return None
+
+    def _start_worker(self) -> None:
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._prerender, name='butterflask-sections', daemon=True)
+                self._worker.start()
+
+    def _prerender(self) -> None:
+        while True:
+            key = self._queue.get()
+            try:
+                self.fetch(key)
+            except Exception:
+                # The browser's request renders the section again and reports the error.
+                pass
+
+
+SECTIONS = SectionStore()
+
+
+def register_sections(root) -> None:
+    """
+    Registers the lazy sections of a widget tree without rendering it.
+
+    A page answered with 304 Not Modified is shown from the browser's cache,
+    which still fetches its sections from this server.
+
+    Args:
+        root (Widget): The root of the widget tree.
+    """
+    pending = [root]
+    while pending:
+        widget = pending.pop()
+        children = getattr(widget, 'children', None)
+        if getattr(widget, 'lazy', False):
+            SECTIONS.register(children, section_key(widget))
+        elif children:
+            pending.extend(children)
+
+
+def lazy_sections(pages: List, eager: int = 1) -> List:
+    """
+    Makes every page after the first `eager` ones load lazily.
+
+    The given pages are not changed; pages whose `lazy` setting differs are copied.
+
+    Args:
+        pages (List[Page]): The stacked page sections, top to bottom.
+        eager (int, optional): The number of sections rendered inline. Defaults to 1.
+
+    Returns:
+        List[Page]: The pages, lazy after the first `eager` ones.
+    """
+    sections = []
+    for index, page in enumerate(pages):
+        lazy = index >= eager
+        if page.lazy != lazy:
+            page = copy.copy(page)
+            page.lazy = lazy
+        sections.append(page)
+    return sections
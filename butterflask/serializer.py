@@ -0,0 +1,475 @@
+"""
+Compact JSON encoding of widget trees for rendering in the browser.
+
+Instead of markup, a page can ship the tree as data and let RUNTIME_JS
+build the DOM:
+
+    payload = {
+        'v': 2,
+        'shapes': [[tag, [attribute names], void, [default values]], ...],
+        'styles': [style attribute, ...],
+        'nodes': [node, ...],
+        'js': [generated AJAX function, ...],
+    }
+
+Each node is `[shape, attributes, *children]`. Attribute values follow the
+shape's attribute names. A shape's default values are those a widget of its
+class renders when constructed with its defaults; values equal to them are
+written as 0 and trailing ones are dropped, and missing defaults are empty.
+A style attribute that differs from its default is a 1-based index into the
+shared style table. Children are nodes, or strings holding the widget's own
+text markup.
+Attribute values and text are kept exactly as render() writes them, so
+`to_html(to_data(widget)) == widget.render()`.
+"""
+import json
+import re
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .Widgets.Button import Button
+from .Widgets.Card import Card
+from .Widgets.Center import Center
+from .Widgets.Column import Column
+from .Widgets.Image import Image
+from .Widgets.Page import Page
+from .Widgets.Row import Row
+from .Widgets.Text import Text
+from .class_formatter import format_class_attr
+from .fingerprint import _own_attrs
+from .fragment_cache import CachedFragment
+from .frozen import FrozenWidget, _render_shell
+from .markup import escape
+from .schema import REQUIRED
+from .style_formatter import format_style
+
+VERSION = 2
+
+_OPEN_TAG = re.compile(r'<([A-Za-z][\w-]*)((?:\s+[^\s"\'=<>/]+(?:="[^"]*")?)*)\s*>')
+_ATTRIBUTE = re.compile(r'\s+([^\s"\'=<>/]+)(?:="([^"]*)")?')
+_VOID_TAGS = frozenset(('area', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link', 'meta', 'source', 'wbr'))
+
+# The element of a widget: (tag, attribute names, attribute values, text before the children).
+Element = Tuple[str, Tuple[str, ...], List[str], str]
+
+_DIV = ('id', 'class', 'style', 'onclick')
+_PREFETCH = (
+    'data-prefetch', 'data-prefetch-method', 'data-prefetch-url',
+    'data-prefetch-data', 'data-prefetch-type', 'data-prefetch-content-type'
+)
+
+
+def _common_values(attrs: Dict[str, Any]) -> List[str]:
+    """
+    Formats the id, class, style and onclick attributes as the widgets' render() does.
+    """
+    on_click = attrs['on_click']
+    return [
+        escape(attrs['id']),
+        format_class_attr(attrs['classes']),
+        format_style(attrs['style']),
+        escape(f'event.preventDefault(); {on_click}' if on_click else ''),
+    ]
+
+
+def _prefetch_values(attrs: Dict[str, Any]) -> List[str]:
+    return [
+        attrs['prefetch'],
+        escape(attrs['method'].upper()),
+        escape(attrs['route']),
+        escape(attrs['request_data']),
+        escape(attrs['data_type']),
+        escape(attrs['content_type']),
+    ]
+
+
+def _div(attrs: Dict[str, Any]) -> Element:
+    return 'div', _DIV, _common_values(attrs), ''
+
+
+def _card(attrs: Dict[str, Any]) -> Element:
+    if attrs['prefetch']:
+        return 'div', _DIV + _PREFETCH, _common_values(attrs) + _prefetch_values(attrs), ''
+    return _div(attrs)
+
+
+def _button(attrs: Dict[str, Any]) -> Element:
+    names, values = _DIV, _common_values(attrs)
+    if attrs['prefetch']:
+        names, values = names + _PREFETCH, values + _prefetch_values(attrs)
+    return 'button', names, values, escape(attrs['text'])
+
+
+def _text(attrs: Dict[str, Any]) -> Element:
+    values = [escape(attrs['id']), escape(attrs['classes']), Text._format_style(_Attributes(attrs))]
+    return 'span', _DIV[:3], values, escape(attrs['text'])
+
+
+def _image(attrs: Dict[str, Any]) -> Optional[Element]:
+    width = attrs['width']
+    if width:
+        # Imported here so that images without a display width do not load the pipeline.
+        from . import images
+        if images.PIPELINE is not None:
+            # Its attributes depend on the variants generated so far.
+            return None
+    id_, class_attr, style_attr, onclick = _common_values(attrs)
+    names = ('id', 'src', 'width', 'alt', 'style', 'class', 'onclick') if width else \
+        ('id', 'src', 'alt', 'style', 'class', 'onclick')
+    values = [id_, escape(attrs['source'])] + ([str(int(width))] if width else []) + \
+        [escape(attrs['alt']), style_attr, class_attr, onclick]
+    if attrs['prefetch']:
+        names, values = names + _PREFETCH, values + _prefetch_values(attrs)
+    return 'img', names, values, ''
+
+
+class _Attributes:
+    """
+    Exposes a dict of widget attributes as attributes, for formatting helpers of widget classes.
+    """
+
+    def __init__(self, attrs: Dict[str, Any]):
+        self.__dict__ = attrs
+
+
+# Builds the element of a widget from its attributes, or returns None to capture it from render().
+_ELEMENTS: Dict[type, Callable[[Dict[str, Any]], Optional[Element]]] = {
+    Button: _button,
+    Card: _card,
+    Center: _div,
+    Column: _div,
+    Image: _image,
+    Page: _div,
+    Row: _div,
+    Text: _text,
+}
+
+
+@lru_cache(maxsize=None)
+def _defaults(widget_type: type) -> Dict[str, str]:
+    """
+    Returns the attribute values a widget class renders with its default settings.
+
+    Required fields are set to empty strings. Classes without declared
+    fields, and classes that cannot be built that way, have no defaults.
+    """
+    fields = getattr(widget_type, 'fields', None)
+    if not fields:
+        return {}
+    try:
+        widget = widget_type(**{field.name: '' for field in fields if field.init and field.default is REQUIRED})
+        element = _ELEMENTS.get(widget_type)
+        attrs = _own_attrs(vars(widget))
+        if element is not None:
+            _, names, values, _ = element(attrs)
+            return dict(zip(names, values))
+        prefix, _, _, _ = _render_shell(widget_type, attrs, False)
+    except Exception:
+        return {}
+    match = _OPEN_TAG.match(prefix)
+    return dict(_ATTRIBUTE.findall(match.group(2))) if match else {}
+
+
+@lru_cache(maxsize=4096)
+def _shape(widget_type: type, tag: str, names: Tuple[str, ...]) -> Tuple[Tuple, Tuple[str, ...], Optional[int]]:
+    """
+    Returns the shape of an element, the default value of each of its attributes,
+    and the index of its style attribute.
+    """
+    defaults = _defaults(widget_type)
+    values = tuple(defaults.get(name, '') for name in names)
+    shape_defaults = list(values)
+    while shape_defaults and not shape_defaults[-1]:
+        shape_defaults.pop()
+    style = names.index('style') if 'style' in names else None
+    return (tag, names, tag.lower() in _VOID_TAGS, tuple(shape_defaults)), values, style
+
+
+def _encode_attributes(widget_type: type, tag: str, names: Tuple[str, ...], values) -> Tuple[Tuple, List, Optional[int]]:
+    """
+    Encodes attribute values against the defaults of a widget class.
+
+    Returns:
+        Tuple: (shape, encoded attribute values, index of a style value to intern or None).
+    """
+    shape, defaults, style = _shape(widget_type, tag, names)
+    encoded = [0 if value == default else value for value, default in zip(values, defaults)]
+    while encoded and encoded[-1] == 0:
+        encoded.pop()
+    if style is not None and (style >= len(encoded) or not encoded[style]):
+        style = None
+    return shape, encoded, style
+
+
+@lru_cache(maxsize=4096)
+def _parse_open_tag(markup: str, widget_type: type):
+    """
+    Parses an opening tag into its shape and encoded attribute values.
+
+    Returns:
+        Tuple: (shape, encoded attribute values, index of a style value to intern or None).
+    """
+    match = _OPEN_TAG.fullmatch(markup)
+    attributes = _ATTRIBUTE.findall(match.group(2))
+    shape, encoded, style = _encode_attributes(
+        widget_type, match.group(1), tuple(name for name, _ in attributes), [value for _, value in attributes]
+    )
+    return shape, tuple(encoded), style
+
+
+def _parse_element(prefix: str, suffix: str, widget_type: type):
+    """
+    Splits a widget's own markup into its shape, attributes and text around the children.
+
+    Args:
+        prefix (str): The markup before the children.
+        suffix (str): The markup after the children; empty for widgets without children.
+        widget_type (type): The widget class, whose defaults the attributes are compared with.
+
+    Returns:
+        Tuple: (shape, encoded attribute values, index of the style value, text before,
+            text after), or None if the markup is not a single element.
+    """
+    match = _OPEN_TAG.match(prefix)
+    if match is None:
+        return None
+    shape, values, style = _parse_open_tag(match.group(0), widget_type)
+    tag, _, void, _ = shape
+    before, after = prefix[match.end():], suffix
+    if void and (before or after):
+        return None
+    if not void:
+        closing = f'</{tag}>'
+        if after:
+            if not after.endswith(closing):
+                return None
+            after = after[:-len(closing)]
+        elif before.endswith(closing):
+            before = before[:-len(closing)]
+        else:
+            return None
+    return shape, list(values), style, before, after
+
+
+def _own_markup(widget) -> Tuple[str, str, Tuple[str, ...]]:
+    """
+    Returns a widget's own markup before and after its children, and its own JavaScript.
+    """
+    if isinstance(widget, FrozenWidget):
+        return widget._prefix, widget._suffix, widget._js
+    generates_js = bool(getattr(widget, 'js', None) and getattr(widget, 'route', None))
+    return _render_shell(type(widget), _own_attrs(vars(widget)), generates_js)[:3]
+
+
+def _own_js(widget_type: type, attrs: Dict[str, Any]) -> List[str]:
+    """
+    Returns the JavaScript a widget generates itself, without rendering it.
+    """
+    if not hasattr(widget_type, '_render_js'):
+        return []
+    shell = object.__new__(widget_type)
+    shell.__dict__.update(attrs)
+    shell.js = [' ']
+    shell._render_js()
+    return shell.js[1:]
+
+
+class _Encoder:
+    """
+    Interns element shapes and styles while encoding one payload.
+    """
+
+    def __init__(self):
+        self.shapes: Dict[Tuple, int] = {}
+        self.styles: Dict[str, int] = {}
+        self.js: List[str] = []
+
+    def encode(self, widget, nodes: List[Any]) -> None:
+        """
+        Appends the nodes of a widget to a list; widgets without markup of their
+        own contribute their children.
+
+        The built-in widgets are encoded from their attributes. Other widget
+        classes render a copy of themselves without children, whose markup is parsed.
+        """
+        widget_type = type(widget)
+        build = _ELEMENTS.get(widget_type)
+        if build is not None:
+            attrs = widget.__dict__
+            js = _own_js(widget_type, attrs) if attrs.get('route') and attrs.get('js') else ()
+        elif widget_type is FrozenWidget:
+            widget_type = widget.widget_type
+            build = _ELEMENTS.get(widget_type)
+            attrs = widget._values
+            js = widget._js
+        elif widget_type is CachedFragment:
+            self.encode(widget.children[0], nodes)
+            return
+        if build is not None and attrs.get('lazy'):
+            raise TypeError('lazy Page sections cannot be serialized; serialize their children instead')
+        children = getattr(widget, 'children', None) or ()
+        element = build(attrs) if build is not None else None
+        if element is not None:
+            tag, names, values, before = element
+            shape, encoded, style = _encode_attributes(widget_type, tag, names, values)
+            after = ''
+            self.js.extend(js)
+        else:
+            if getattr(widget, 'lazy', False):
+                raise TypeError('lazy Page sections cannot be serialized; serialize their children instead')
+            prefix, suffix, js = _own_markup(widget)
+            self.js.extend(js)
+            if not prefix and not suffix:
+                for child in children:
+                    self.encode(child, nodes)
+                return
+            parsed = _parse_element(prefix, suffix, widget_type)
+            if parsed is None:
+                raise ValueError(f'{type(widget).__name__} does not render a single element: {prefix[:80]!r}')
+            shape, encoded, style, before, after = parsed
+        if style is not None:
+            encoded[style] = self.styles.setdefault(encoded[style], len(self.styles)) + 1
+        node = [self.shapes.setdefault(shape, len(self.shapes)), encoded]
+        if before:
+            node.append(before)
+        for child in children:
+            self.encode(child, node)
+        if after:
+            node.append(after)
+        nodes.append(node)
+
+
+def to_data(widget) -> Dict[str, Any]:
+    """
+    Encodes a widget tree as a JSON-compatible payload.
+
+    Args:
+        widget (Widget): The root of the widget tree, mutable or frozen.
+
+    Returns:
+        Dict[str, Any]: The payload.
+    """
+    encoder = _Encoder()
+    nodes: List[Any] = []
+    encoder.encode(widget, nodes)
+    return {
+        'v': VERSION,
+        'shapes': [
+            [tag, list(names), 1 if void else 0, list(defaults)] for tag, names, void, defaults in encoder.shapes
+        ],
+        'styles': list(encoder.styles),
+        'nodes': nodes,
+        'js': list(dict.fromkeys(encoder.js)),
+    }
+
+
+def dumps(widget) -> str:
+    """
+    Encodes a widget tree as compact JSON.
+
+    Args:
+        widget (Widget): The root of the widget tree, mutable or frozen.
+
+    Returns:
+        str: The JSON document.
+    """
+    return json.dumps(to_data(widget), separators=(',', ':'), ensure_ascii=False)
+
+
+def to_html(payload: Dict[str, Any]) -> str:
+    """
+    Decodes a payload back into the HTML render() produces.
+
+    Args:
+        payload (Dict[str, Any]): A payload from `to_data`, or its parsed JSON.
+
+    Returns:
+        str: The HTML representation of the tree.
+    """
+    if payload.get('v') != VERSION:
+        raise ValueError(f"unsupported payload version: {payload.get('v')!r}")
+    shapes, styles = payload['shapes'], payload['styles']
+    parts: List[str] = []
+
+    def decode(node):
+        tag, names, void, defaults = shapes[node[0]]
+        values = node[1]
+        parts.append(f'<{tag}')
+        for index, name in enumerate(names):
+            value = values[index] if index < len(values) else 0
+            if value == 0:
+                value = defaults[index] if index < len(defaults) else ''
+            elif name == 'style' and isinstance(value, int):
+                value = styles[value - 1]
+            parts.append(f' {name}="{value}"')
+        parts.append('>')
+        for child in node[2:]:
+            if isinstance(child, str):
+                parts.append(child)
+            else:
+                decode(child)
+        if not void:
+            parts.append(f'</{tag}>')
+
+    for node in payload['nodes']:
+        decode(node)
+    return ''.join(parts)
+
+
+RUNTIME_JS = """
+(function(global) {
+    var decoder = document.createElement('textarea');
+
+    function decode(value) {
+        if (value.indexOf('&') < 0) {
+            return value;
+        }
+        decoder.innerHTML = value;
+        return decoder.value;
+    }
+
+    function build(payload, node) {
+        var shape = payload.shapes[node[0]];
+        var names = shape[1];
+        var defaults = shape[3];
+        var values = node[1];
+        var element = document.createElement(shape[0]);
+        for (var i = 0; i < names.length; i++) {
+            var value = i < values.length ? values[i] : 0;
+            if (value === 0) {
+                value = i < defaults.length ? defaults[i] : '';
+            } else if (typeof value === 'number') {
+                value = payload.styles[value - 1];
+            }
+            element.setAttribute(names[i], value ? decode(value) : '');
+        }
+        for (var j = 2; j < node.length; j++) {
+            if (typeof node[j] === 'string') {
+                element.insertAdjacentHTML('beforeend', node[j]);
+            } else {
+                element.appendChild(build(payload, node[j]));
+            }
+        }
+        return element;
+    }
+
+    function mount(target, payload) {
+        if (payload.v !== 2) {
+            throw new Error('unsupported ButterFlask payload version ' + payload.v);
+        }
+        var fragment = document.createDocumentFragment();
+        for (var i = 0; i < payload.nodes.length; i++) {
+            fragment.appendChild(build(payload, payload.nodes[i]));
+        }
+        if (payload.js.length) {
+            var script = document.createElement('script');
+            script.text = payload.js.join('\\n');
+            document.head.appendChild(script);
+        }
+        target.replaceChildren(fragment);
+    }
+
+    global.butterflask = global.butterflask || {};
+    global.butterflask.mount = mount;
+})(window);
+"""
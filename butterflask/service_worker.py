@@ -0,0 +1,274 @@
+"""
+Service worker for repeat visits.
+
+A ServiceWorker generates a service worker script and the snippet that
+registers it. The worker precaches the content-hashed JS/CSS bundles and
+jQuery, and serves the registered pages and the GET routes of their widgets
+stale-while-revalidate: repeat visits are answered from the cache at once
+while the cache is refreshed in the background. Lazy sections and image
+variants, which never change, are served cache-first. Caches of earlier
+versions are deleted when a new version activates.
+
+The cache manifest is derived from the registered widget trees:
+
+    worker = ServiceWorker.from_registry(registry, precache=[JQUERY_URL, '/static/app.css'])
+    butterflask = ButterFlask(app, service_worker=worker)
+
+Static exports write the worker with `--service-worker`.
+"""
+import hashlib
+import json
+from typing import Dict, Iterable, List, Optional, Sequence
+
+from .document import JQUERY_URL
+from .frozen import FrozenWidget
+from .images import IMAGE_ROUTE
+from .prefetch import SAFE_METHODS
+from .sections import SECTION_ROUTE
+
+SERVICE_WORKER_URL = '/butterflask-sw.js'
+
+# Responses under these prefixes are content-addressed and served cache-first.
+IMMUTABLE_PREFIXES = (SECTION_ROUTE, IMAGE_ROUTE)
+
+SERVICE_WORKER_JS = """
+var MANIFEST = %(manifest)s;
+var PRECACHE = MANIFEST.prefix + 'precache-' + MANIFEST.version;
+var RUNTIME = MANIFEST.prefix + 'runtime-' + MANIFEST.version;
+var precached = new Set(MANIFEST.precache.map(function(url) {
+    return new URL(url, self.location).href;
+}));
+var pages = new Set(MANIFEST.pages);
+var routes = new Set(MANIFEST.routes);
+
+function cacheable(response) {
+    if (response.type === 'opaque') {
+        return true;
+    }
+    return response.status === 200 && !/no-store/.test(response.headers.get('Cache-Control') || '');
+}
+
+function store(cache, request, response) {
+    if (!cacheable(response)) {
+        return Promise.resolve(response);
+    }
+    return cache.put(request, response.clone()).then(function() {
+        return cache.keys();
+    }).then(function(keys) {
+        // Keys are in insertion order; drop the oldest entries beyond the limit.
+        return Promise.all(keys.slice(0, Math.max(0, keys.length - MANIFEST.maxEntries)).map(function(key) {
+            return cache.delete(key);
+        }));
+    }).then(function() {
+        return response;
+    });
+}
+
+function cacheFirst(request, name) {
+    return caches.open(name).then(function(cache) {
+        return cache.match(request).then(function(cached) {
+            return cached || fetch(request).then(function(response) {
+                return store(cache, request, response);
+            });
+        });
+    });
+}
+
+function staleWhileRevalidate(event) {
+    var request = event.request;
+    return caches.open(RUNTIME).then(function(cache) {
+        return cache.match(request).then(function(cached) {
+            var network = fetch(request).then(function(response) {
+                return store(cache, request, response);
+            });
+            if (!cached) {
+                return network;
+            }
+            event.waitUntil(network.catch(function() {}));
+            return cached;
+        });
+    });
+}
+
+self.addEventListener('install', function(event) {
+    event.waitUntil(caches.open(PRECACHE).then(function(cache) {
+        return Promise.all(MANIFEST.precache.map(function(url) {
+            var sameOrigin = new URL(url, self.location).origin === self.location.origin;
+            var request = new Request(url, sameOrigin ? {} : {mode: 'no-cors'});
+            return fetch(request).then(function(response) {
+                if (cacheable(response)) {
+                    return cache.put(request, response);
+                }
+            });
+        }));
+    }).then(function() {
+        return self.skipWaiting();
+    }));
+});
+
+self.addEventListener('activate', function(event) {
+    event.waitUntil(caches.keys().then(function(keys) {
+        return Promise.all(keys.filter(function(key) {
+            return key.indexOf(MANIFEST.prefix) === 0 && key !== PRECACHE && key !== RUNTIME;
+        }).map(function(key) {
+            return caches.delete(key);
+        }));
+    }).then(function() {
+        return self.clients.claim();
+    }));
+});
+
+self.addEventListener('fetch', function(event) {
+    var request = event.request;
+    if (request.method !== 'GET') {
+        return;
+    }
+    var url = new URL(request.url);
+    if (precached.has(url.href)) {
+        event.respondWith(cacheFirst(request, PRECACHE));
+        return;
+    }
+    if (url.origin !== self.location.origin) {
+        return;
+    }
+    if (MANIFEST.immutable.some(function(prefix) { return url.pathname.indexOf(prefix) === 0; })) {
+        event.respondWith(cacheFirst(request, RUNTIME));
+    } else if ((request.mode === 'navigate' && pages.has(url.pathname)) || routes.has(url.pathname)) {
+        event.respondWith(staleWhileRevalidate(event));
+    }
+});
+"""
+
+REGISTRATION_JS = (
+    "if('serviceWorker' in navigator){window.addEventListener('load',function(){"
+    "navigator.serviceWorker.register(%(url)s,{scope:%(scope)s}).catch(function(e){console.log(e);});});}"
+)
+
+
+def get_routes(root) -> List[str]:
+    """
+    Collects the routes a widget tree requests with GET or HEAD.
+
+    Args:
+        root (Widget): The root of the widget tree, mutable or frozen.
+
+    Returns:
+        List[str]: The distinct routes, sorted.
+    """
+    routes = set()
+    seen = set()
+    pending = [root]
+    while pending:
+        widget = pending.pop()
+        if id(widget) in seen:
+            continue
+        seen.add(id(widget))
+        values = widget._values if isinstance(widget, FrozenWidget) else vars(widget)
+        route = values.get('route')
+        if route and str(values.get('method', '')).upper() in SAFE_METHODS:
+            routes.add(route)
+        pending.extend(getattr(widget, 'children', None) or ())
+    return sorted(routes)
+
+
+class ServiceWorker:
+    """
+    A generated service worker and the snippet registering it.
+
+    Attributes:
+        precache (Tuple[str, ...]): URLs fetched when the worker installs and served cache-first.
+        pages (Tuple[str, ...]): Page paths served stale-while-revalidate.
+        routes (Tuple[str, ...]): GET route paths served stale-while-revalidate.
+        url (str): The URL the script is served from.
+        scope (str): The registration scope.
+        cache_prefix (str): The prefix of the worker's cache names.
+        max_entries (int): The maximum number of responses in the runtime cache.
+    """
+
+    def __init__(
+        self,
+        precache: Iterable[str] = (JQUERY_URL,),
+        pages: Iterable[str] = (),
+        routes: Iterable[str] = (),
+        url: str = SERVICE_WORKER_URL,
+        scope: str = '/',
+        cache_prefix: str = 'butterflask-',
+        max_entries: int = 256
+    ):
+        self.precache = tuple(sorted(set(precache)))
+        self.pages = tuple(sorted(set(pages)))
+        self.routes = tuple(sorted(set(routes)))
+        self.url = url
+        self.scope = scope
+        self.cache_prefix = cache_prefix
+        self.max_entries = max_entries
+        self._script: Optional[str] = None
+
+    @classmethod
+    def from_registry(cls, registry, precache: Sequence[str] = (JQUERY_URL,), **options) -> 'ServiceWorker':
+        """
+        Builds the cache manifest from the pages of a PreloadRegistry.
+
+        Every page builder runs once. Pages are named by their routes; the
+        GET and HEAD routes of all their widgets are collected.
+
+        Args:
+            registry (PreloadRegistry): The registry of page builders.
+            precache (Sequence[str], optional): URLs to precache. Defaults to jQuery.
+            **options: Passed on to the constructor.
+
+        Returns:
+            ServiceWorker: The service worker.
+        """
+        pages = []
+        routes = set()
+        for name, builder in registry.pages():
+            if name.startswith('/'):
+                pages.append(name)
+            routes.update(get_routes(builder()))
+        return cls(precache, pages, routes, **options)
+
+    def manifest(self) -> Dict:
+        """
+        Returns the cache manifest embedded in the script.
+
+        Its version is a hash of its contents and of the worker code, so
+        every change activates a new worker with fresh caches.
+
+        Returns:
+            Dict: The manifest.
+        """
+        manifest = {
+            'precache': list(self.precache),
+            'pages': list(self.pages),
+            'routes': list(self.routes),
+            'immutable': list(IMMUTABLE_PREFIXES),
+            'prefix': self.cache_prefix,
+            'maxEntries': self.max_entries,
+        }
+        state = json.dumps(manifest, sort_keys=True) + SERVICE_WORKER_JS
+        manifest['version'] = hashlib.blake2b(state.encode('utf-8'), digest_size=8).hexdigest()
+        return manifest
+
+    def script(self) -> str:
+        """
+        Returns the service worker script, generated on first use.
+
+        Returns:
+            str: The JavaScript source.
+        """
+        if self._script is None:
+            manifest = json.dumps(self.manifest(), separators=(',', ':'))
+            self._script = SERVICE_WORKER_JS % {'manifest': manifest}
+        return self._script
+
+    def registration(self) -> str:
+        """
+        Returns the script tag registering the worker, for the head of every page.
+
+        Returns:
+            str: The HTML snippet.
+        """
+        code = REGISTRATION_JS % {'url': json.dumps(self.url), 'scope': json.dumps(self.scope)}
+        code = code.replace('</', '<\\/')
+        return f'<script>{code}</script>'
@@ -0,0 +1,368 @@
+"""
+Binary snapshots of widget trees.
+
+A snapshot stores a built tree so other processes can load it instead of
+rebuilding it from expensive configuration:
+
+    snapshot.save(build_catalogue(cms), 'catalogue.bfs')
+    ...
+    js = [' ']
+    ui = snapshot.load('catalogue.bfs', js=js)
+
+File layout (integers are little-endian):
+
+    magic      8 bytes  b'BFSNAP\\r\\n'
+    version    uint16
+    flags      uint16   reserved, 0
+    count      uint32   number of sections
+    index      count x (uint64 offset, uint32 length)
+    sections   marshal data
+
+Section 0 holds the shared tables: widget class names, one base attribute
+dict per class and the style table, in which every distinct style dict and
+every style key and value is stored once. Section 1 holds the root of the
+tree. Each node stores only the attributes that differ from its class's
+base dict; its style is an index into the style table, and the names of
+attributes holding Markup are listed under the key 0. Large child lists
+are stored in sections of their own, which `load(lazy=True)` reads from a
+memory-mapped file the first time they are used.
+"""
+import importlib
+import marshal
+import mmap
+import struct
+from typing import Any, Dict, List, Optional, Tuple
+
+from .markup import Markup
+
+MAGIC = b'BFSNAP\r\n'
+VERSION = 1
+
+_HEADER = struct.Struct('<8sHHI')
+_SECTION = struct.Struct('<QI')
+
+# The `js` attribute of a node: absent, the widget's own empty list, or the shared accumulator.
+_NO_JS, _OWN_JS, _SHARED_JS = 0, 1, 2
+# The child count of a node without a `children` attribute.
+_NO_CHILDREN = -1
+# The key listing the attributes whose values are Markup; attribute names are strings.
+_MARKUP = 0
+
+
+class _Writer:
+    """
+    Collects the shared tables and sections while encoding one tree.
+    """
+
+    def __init__(self, segment_nodes: Optional[int]):
+        self.segment_nodes = segment_nodes
+        self.types: Dict[type, int] = {}
+        self.bases: List[Dict[str, Any]] = []
+        self.styles: Dict[Tuple, int] = {}
+        self.strings: Dict[str, str] = {}
+        self.sections: List[List[Tuple]] = []
+
+    def _canonical(self, value: Any, name: str) -> Any:
+        """
+        Returns a marshal-able copy of a value in which equal strings are one object.
+        """
+        value_type = type(value)
+        if value_type is str:
+            return self.strings.setdefault(value, value)
+        if value is None or value_type is bool or value_type is int or value_type is float:
+            return value
+        if isinstance(value, Markup):
+            raise TypeError(f'cannot snapshot Markup inside attribute {name!r}')
+        if isinstance(value, list):
+            return [self._canonical(item, name) for item in value]
+        if isinstance(value, tuple):
+            return tuple(self._canonical(item, name) for item in value)
+        if isinstance(value, dict):
+            return {self._canonical(key, name): self._canonical(item, name) for key, item in value.items()}
+        raise TypeError(f'cannot snapshot attribute {name!r} of type {type(value).__name__}')
+
+    def _style(self, style: Dict[str, str]) -> int:
+        items = tuple((self._canonical(key, 'style'), self._canonical(value, 'style')) for key, value in style.items())
+        return self.styles.setdefault(items, len(self.styles))
+
+    def _attrs(self, widget) -> Dict[str, Any]:
+        attrs = {}
+        markup = []
+        for name, value in vars(widget).items():
+            if name == 'children' or name == 'js':
+                continue
+            if isinstance(value, Markup):
+                markup.append(self._canonical(name, name))
+                attrs[markup[-1]] = self._canonical(str(value), name)
+            elif name == 'style' and isinstance(value, dict):
+                attrs[self._canonical(name, name)] = self._style(value)
+            else:
+                attrs[self._canonical(name, name)] = self._canonical(value, name)
+        if markup:
+            attrs[_MARKUP] = tuple(markup)
+        return attrs
+
+    def _size(self, widget) -> int:
+        return 1 + sum(self._size(child) for child in getattr(widget, 'children', None) or ())
+
+    def encode(self, widgets) -> int:
+        """
+        Encodes a list of sibling subtrees into a new section, in post-order.
+
+        Returns:
+            int: The section number.
+        """
+        number = len(self.sections)
+        nodes: List[Tuple] = []
+        self.sections.append(nodes)
+        for widget in widgets:
+            self._encode(widget, nodes)
+        return number
+
+    def _encode(self, widget, nodes: List[Tuple]) -> None:
+        if hasattr(widget, 'widget_type'):
+            raise TypeError('snapshot the mutable tree, then freeze() it after loading')
+        children = getattr(widget, 'children', None)
+        section = 0
+        if children is None:
+            count = _NO_CHILDREN
+        else:
+            count = len(children)
+            if children and self.segment_nodes is not None and sum(map(self._size, children)) >= self.segment_nodes:
+                section = self.encode(children)
+            else:
+                for child in children:
+                    self._encode(child, nodes)
+        if not hasattr(widget, 'js'):
+            js = _NO_JS
+        else:
+            js = _SHARED_JS if widget.js else _OWN_JS
+        widget_type = type(widget)
+        attrs = self._attrs(widget)
+        index = self.types.get(widget_type)
+        if index is None:
+            index = self.types[widget_type] = len(self.types)
+            self.bases.append(attrs)
+            diff = {}
+        else:
+            base = self.bases[index]
+            diff = {name: value for name, value in attrs.items() if name not in base or base[name] != value}
+            missing = tuple(name for name in base if name not in attrs)
+            if missing:
+                diff[None] = missing
+        nodes.append((index, diff, js, count, section))
+
+    def tables(self) -> Tuple:
+        types = tuple(f'{widget_type.__module__}:{widget_type.__qualname__}' for widget_type in self.types)
+        styles = tuple(dict(items) for items in self.styles)
+        return types, tuple(self.bases), styles
+
+
+def dumps(widget, segment_nodes: Optional[int] = 4096) -> bytes:
+    """
+    Encodes a widget tree as a snapshot.
+
+    Args:
+        widget (Widget): The root of a mutable widget tree.
+        segment_nodes (int, optional): Child lists with at least this many widgets
+            are stored in sections of their own, to be loaded lazily; None stores the
+            whole tree in one section. Defaults to 4096.
+
+    Returns:
+        bytes: The snapshot.
+    """
+    writer = _Writer(segment_nodes)
+    writer.sections.append([])
+    writer.encode([widget])
+    sections = [marshal.dumps(writer.tables(), 4)] + [marshal.dumps(nodes, 4) for nodes in writer.sections[1:]]
+    offset = _HEADER.size + _SECTION.size * len(sections)
+    index = []
+    for data in sections:
+        index.append(_SECTION.pack(offset, len(data)))
+        offset += len(data)
+    return b''.join([_HEADER.pack(MAGIC, VERSION, 0, len(sections))] + index + sections)
+
+
+def save(widget, path: str, segment_nodes: Optional[int] = 4096) -> None:
+    """
+    Writes a widget tree to a snapshot file.
+
+    Args:
+        widget (Widget): The root of a mutable widget tree.
+        path (str): The file to write.
+        segment_nodes (int, optional): See `dumps`. Defaults to 4096.
+    """
+    data = dumps(widget, segment_nodes)
+    with open(path, 'wb') as file:
+        file.write(data)
+
+
+class LazyChildren(list):
+    """
+    A child list read from its snapshot section the first time it is used.
+    """
+
+    __slots__ = ('_reader',)
+
+    def __init__(self, reader: '_Reader', section: int):
+        super().__init__()
+        self._reader = (reader, section)
+
+    def _load(self) -> None:
+        if self._reader is not None:
+            reader, section = self._reader
+            self._reader = None
+            list.extend(self, reader.section(section))
+
+    def __iter__(self):
+        self._load()
+        return list.__iter__(self)
+
+    def __len__(self) -> int:
+        self._load()
+        return list.__len__(self)
+
+    def __getitem__(self, index):
+        self._load()
+        return list.__getitem__(self, index)
+
+    def __setitem__(self, index, value):
+        self._load()
+        list.__setitem__(self, index, value)
+
+    def __delitem__(self, index):
+        self._load()
+        list.__delitem__(self, index)
+
+    def __repr__(self) -> str:
+        return 'LazyChildren(...)' if self._reader is not None else list.__repr__(self)
+
+    def append(self, value) -> None:
+        self._load()
+        list.append(self, value)
+
+    def extend(self, values) -> None:
+        self._load()
+        list.extend(self, values)
+
+    def insert(self, index, value) -> None:
+        self._load()
+        list.insert(self, index, value)
+
+    def pop(self, index=-1):
+        self._load()
+        return list.pop(self, index)
+
+    def remove(self, value) -> None:
+        self._load()
+        list.remove(self, value)
+
+
+class _Reader:
+    """
+    Decodes the sections of one snapshot.
+    """
+
+    def __init__(self, data, js: Optional[List[str]], lazy: bool):
+        magic, version, _, count = _HEADER.unpack_from(data, 0)
+        if magic != MAGIC:
+            raise ValueError('not a ButterFlask snapshot')
+        if version != VERSION:
+            raise ValueError(f'unsupported snapshot version: {version}')
+        self.data = data
+        self.lazy = lazy
+        self.js = [' '] if js is None else js
+        self.index = [_SECTION.unpack_from(data, _HEADER.size + _SECTION.size * number) for number in range(count)]
+        types, self.bases, self.styles = marshal.loads(self._bytes(0))
+        self.classes = []
+        for name in types:
+            module, _, qualname = name.partition(':')
+            widget_type = importlib.import_module(module)
+            for part in qualname.split('.'):
+                widget_type = getattr(widget_type, part)
+            self.classes.append(widget_type)
+        # Attributes whose base value is a list or dict, which every node needs its own copy of.
+        self.mutable = [
+            tuple(name for name, value in base.items() if isinstance(value, (list, dict)) and name != 'style')
+            for base in self.bases
+        ]
+
+    def _bytes(self, section: int):
+        offset, length = self.index[section]
+        return memoryview(self.data)[offset:offset + length]
+
+    def section(self, section: int) -> List:
+        """
+        Builds the sibling subtrees stored in a section.
+        """
+        nodes = marshal.loads(self._bytes(section))
+        classes, bases, styles, mutable = self.classes, self.bases, self.styles, self.mutable
+        shared_js, new = self.js, object.__new__
+        stack: List = []
+        for index, diff, js, count, child_section in nodes:
+            widget = new(classes[index])
+            attrs = bases[index].copy()
+            if diff:
+                attrs.update(diff)
+                missing = attrs.pop(None, None)
+                if missing:
+                    for name in missing:
+                        del attrs[name]
+            for name in mutable[index]:
+                attrs[name] = attrs[name].copy()
+            if _MARKUP in attrs:
+                for name in attrs.pop(_MARKUP):
+                    attrs[name] = Markup(attrs[name])
+            style = attrs.get('style')
+            if type(style) is int:
+                attrs['style'] = styles[style].copy()
+            if child_section:
+                attrs['children'] = LazyChildren(self, child_section) if self.lazy else self.section(child_section)
+            elif count > 0:
+                attrs['children'] = stack[-count:]
+                del stack[-count:]
+            elif count == 0:
+                attrs['children'] = []
+            if js == _SHARED_JS:
+                attrs['js'] = shared_js
+            elif js == _OWN_JS:
+                attrs['js'] = []
+            widget.__dict__ = attrs
+            stack.append(widget)
+        return stack
+
+
+def loads(data, js: Optional[List[str]] = None):
+    """
+    Builds a widget tree from a snapshot.
+
+    Args:
+        data (bytes): The snapshot.
+        js (List[str], optional): The JavaScript accumulator given to AJAX widgets. Defaults to a new `[' ']`.
+
+    Returns:
+        Widget: The root of the widget tree.
+    """
+    return _Reader(data, js, False).section(1)[0]
+
+
+def load(path: str, js: Optional[List[str]] = None, lazy: bool = False):
+    """
+    Builds a widget tree from a snapshot file.
+
+    With `lazy=True` the file is memory-mapped and child lists stored in
+    sections of their own are only built when they are first used.
+
+    Args:
+        path (str): The snapshot file.
+        js (List[str], optional): The JavaScript accumulator given to AJAX widgets. Defaults to a new `[' ']`.
+        lazy (bool, optional): Whether to build large child lists on first use. Defaults to False.
+
+    Returns:
+        Widget: The root of the widget tree.
+    """
+    with open(path, 'rb') as file:
+        if not lazy:
+            return loads(file.read(), js)
+        data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    return _Reader(data, js, True).section(1)[0]
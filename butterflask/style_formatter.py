@@ -1,13 +1,41 @@
-from typing import Dict
+from typing import Dict, Optional
 
-def format_style(style: Dict[str, str]) -> str:
+from .markup import _NEEDS_ESCAPE, escape
+
+# Styles whose keys and values needed no escaping, formatted once per process.
+# Such strings render the same whether or not they are Markup, so equal keys
+# can share an entry.
+_FORMATTED: Dict = {}
+_MAX_FORMATTED = 4096
+
+
+def _is_plain(value) -> bool:
+    return isinstance(value, str) and _NEEDS_ESCAPE.search(value) is None
+
+
+def format_style(style: Dict[str, str], separator: str = ': ') -> str:
     """
     Formats the CSS styles as a string.
 
+    Keys and values are HTML-escaped.
+
     Args:
         style (Dict[str, str]): The CSS styles.
+        separator (str, optional): The text between a key and its value. Defaults to ': '.
 
     Returns:
         str: The formatted CSS styles.
     """
-    return '; '.join(f'{key}: {value}' for key, value in style.items())
+    key: Optional[tuple] = (separator, tuple(style.items()))
+    try:
+        formatted = _FORMATTED.get(key)
+    except TypeError:
+        formatted = key = None
+    if formatted is not None:
+        return formatted
+    formatted = '; '.join([f'{escape(name)}{separator}{escape(value)}' for name, value in style.items()])
+    if key is not None and all(_is_plain(name) and _is_plain(value) for name, value in style.items()):
+        if len(_FORMATTED) >= _MAX_FORMATTED:
+            _FORMATTED.clear()
+        _FORMATTED[key] = formatted
+    return formatted
@@ -0,0 +1,150 @@
+"""
+Escaping of widget output: text, attribute values and style values are
+escaped, Markup and objects with `__html__` pass through unchanged.
+"""
+import os
+import sys
+import unittest
+from html.parser import HTMLParser
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from butterflask.Widgets.Button import Button
+from butterflask.Widgets.Column import Column
+from butterflask.Widgets.Image import Image
+from butterflask.Widgets.Text import Text
+from butterflask.class_formatter import format_class_attr
+from butterflask.markup import Markup, escape
+from butterflask.style_formatter import format_style
+
+HOSTILE = '<script>alert("x")</script> & \'quoted\''
+
+
+class _Element(HTMLParser):
+    """
+    Parses the first element of a document into its tag, decoded attributes and decoded text.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.tags = []
+        self.attrs = None
+        self.text = ''
+
+    def handle_starttag(self, tag, attrs):
+        self.tags.append(tag)
+        if self.attrs is None:
+            self.attrs = dict(attrs)
+
+    def handle_data(self, data):
+        self.text += data
+
+
+def parse(html):
+    parser = _Element()
+    parser.feed(html)
+    parser.close()
+    return parser
+
+
+class EscapeTest(unittest.TestCase):
+    def test_special_characters(self):
+        self.assertEqual(escape(HOSTILE), '&lt;script&gt;alert(&quot;x&quot;)&lt;/script&gt; &amp; &#x27;quoted&#x27;')
+
+    def test_plain_strings_are_returned_as_they_are(self):
+        value = 'nothing to escape'
+        self.assertIs(escape(value), value)
+
+    def test_long_strings_are_escaped_like_short_ones(self):
+        self.assertEqual(escape(HOSTILE * 20), escape(HOSTILE) * 20)
+
+    def test_markup_passes_through(self):
+        markup = Markup('<b>bold</b> &amp; more')
+        self.assertIs(escape(markup), markup)
+
+    def test_html_protocol_passes_through(self):
+        class Safe:
+            def __html__(self):
+                return '<i>safe</i>'
+
+        self.assertEqual(escape(Safe()), '<i>safe</i>')
+
+    def test_markup_operations_return_plain_strings(self):
+        combined = Markup('<b>') + '<i>'
+        self.assertIs(type(combined), str)
+        self.assertEqual(escape(combined), '&lt;b&gt;&lt;i&gt;')
+
+    def test_other_values_are_converted(self):
+        self.assertEqual(escape(3), '3')
+        self.assertEqual(escape(None), 'None')
+
+
+class WidgetEscapingTest(unittest.TestCase):
+    def test_text_content(self):
+        html = Text(HOSTILE).render()
+        parsed = parse(html)
+        self.assertEqual(parsed.tags, ['span'])
+        self.assertEqual(parsed.text, HOSTILE)
+
+    def test_markup_content(self):
+        html = Text(Markup('<b>bold</b> &amp; more')).render()
+        self.assertTrue(html.endswith('><b>bold</b> &amp; more</span>'))
+
+    def test_attribute_values(self):
+        widgets = {
+            'text': Text('a', id=HOSTILE, classes=HOSTILE),
+            'button': Button('a', id=HOSTILE, classes=[HOSTILE, 'plain'], on_click=HOSTILE),
+            'image': Image(HOSTILE, alt=HOSTILE, id=HOSTILE, classes=[HOSTILE]),
+            'column': Column(id=HOSTILE, classes=[HOSTILE], on_click=HOSTILE),
+        }
+        for name, widget in widgets.items():
+            with self.subTest(widget=name):
+                parsed = parse(widget.render())
+                self.assertEqual(len(parsed.tags), 1)
+                self.assertEqual(parsed.attrs['id'], HOSTILE)
+                self.assertTrue(parsed.attrs['class'].startswith(HOSTILE))
+        self.assertEqual(parse(widgets['button'].render()).attrs['onclick'], f'event.preventDefault(); {HOSTILE}')
+        self.assertEqual(parse(widgets['image'].render()).attrs['src'], HOSTILE)
+        self.assertEqual(parse(widgets['image'].render()).attrs['alt'], HOSTILE)
+
+    def test_style_values(self):
+        style = {'font-family': '"Inter", sans-serif', 'content': HOSTILE}
+        for widget in (Text('a', style=style), Button('a', style=style), Column(style=style)):
+            with self.subTest(widget=type(widget).__name__):
+                parsed = parse(widget.render())
+                self.assertEqual(len(parsed.tags), 1)
+                self.assertIn('font-family', parsed.attrs['style'])
+                self.assertIn('"Inter", sans-serif', parsed.attrs['style'])
+                self.assertIn(HOSTILE, parsed.attrs['style'])
+
+    def test_text_default_font_family(self):
+        html = Text('a').render()
+        self.assertIn('font-family:&quot;Lato&quot;, &quot;Corbel&quot;', html)
+        self.assertNotIn('&amp;quot;', html)
+        self.assertIn('font-family:"Lato", "Corbel", "Avenir"', parse(html).attrs['style'])
+
+    def test_text_font_size(self):
+        parsed = parse(Text('a', font_size='1rem" onmouseover="x').render())
+        self.assertNotIn('onmouseover', parsed.attrs)
+        self.assertTrue(parsed.attrs['style'].startswith('font-size:1rem" onmouseover="x;'))
+
+
+class FormatterTest(unittest.TestCase):
+    def test_style_keys_and_values(self):
+        self.assertEqual(format_style({'a"b': '<c>'}), 'a&quot;b: &lt;c&gt;')
+        self.assertEqual(format_style({'a"b': '<c>'}, ':'), 'a&quot;b:&lt;c&gt;')
+
+    def test_style_markup_values_pass_through(self):
+        trusted = Markup('&quot;Lato&quot;')
+        self.assertEqual(format_style({'font-family': trusted}), 'font-family: &quot;Lato&quot;')
+        # A plain string equal to escaped markup is not served from the memo of the markup.
+        self.assertEqual(format_style({'font-family': '&quot;Lato&quot;'}), 'font-family: &amp;quot;Lato&amp;quot;')
+        self.assertEqual(format_style({'font-family': trusted}), 'font-family: &quot;Lato&quot;')
+
+    def test_class_names(self):
+        self.assertEqual(format_class_attr(['a', '"b"', Markup('<c>')]), 'a &quot;b&quot; <c>')
+        self.assertEqual(format_class_attr([]), '')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,110 @@
+"""
+The constructors generated from field schemas keep the signatures, defaults
+and stored attributes of the hand-written constructors they replaced.
+"""
+import inspect
+import os
+import subprocess
+import sys
+import unittest
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+from butterflask.Widgets.Button import Button
+from butterflask.Widgets.Card import Card
+from butterflask.Widgets.Center import Center
+from butterflask.Widgets.Column import Column
+from butterflask.Widgets.Image import Image
+from butterflask.Widgets.Page import Page
+from butterflask.Widgets.Row import Row
+from butterflask.Widgets.Text import Text
+
+REQUIRED = inspect.Parameter.empty
+
+_AJAX = [
+    ('route', None), ('request_data', ''), ('before_send', ''), ('data_type', 'json'),
+    ('content_type', 'application/json'), ('on_success', ''), ('on_completed', ''), ('on_error', ''),
+]
+_CALLBACKS = [('id', ''), ('classes', None), ('func_name', None), ('method', 'POST'), ('js', None), ('on_click', None)]
+
+# The parameters of the hand-written constructors, in order, with their defaults.
+SIGNATURES = {
+    Button: [('text', REQUIRED), ('default', True), *_CALLBACKS, ('style', None), *_AJAX, ('prefetch', None)],
+    Card: [('children', None), ('style', None), ('default_css', True), *_CALLBACKS, *_AJAX, ('prefetch', None)],
+    Center: [('child', REQUIRED), ('default', True), *_CALLBACKS, ('style', None), *_AJAX],
+    Column: [
+        ('direction', 'column'), ('vertical', 'flex-start'), ('horizontal', 'flex-start'),
+        ('children', None), ('style', None), ('default', True), *_CALLBACKS, *_AJAX,
+    ],
+    # `width` was added after the constructors were generated.
+    Image: [
+        ('source', REQUIRED), ('alt', ''), ('style', None), ('default', True), *_CALLBACKS, *_AJAX,
+        ('prefetch', None), ('width', None),
+    ],
+    Page: [('children', None), ('style', None), ('default_css', True), *_CALLBACKS, *_AJAX, ('lazy', False)],
+    Row: [
+        ('direction', 'row'), ('horizontal', 'flex-start'), ('vertical', 'center'),
+        ('children', None), ('style', None), ('default', True), *_CALLBACKS, *_AJAX,
+    ],
+    Text: [('text', REQUIRED), ('font_size', '1.0rem'), ('style', None), ('id', ''), ('classes', ''), ('on_click', None)],
+}
+
+REQUIRED_ARGUMENTS = {Button: ('Go',), Center: (Text('a'),), Image: ('/static/a.png',), Text: ('Hello',)}
+
+
+class GeneratedConstructorTest(unittest.TestCase):
+    def test_signatures_and_defaults(self):
+        for cls, expected in SIGNATURES.items():
+            with self.subTest(widget=cls.__name__):
+                parameters = list(inspect.signature(cls.__init__).parameters.values())[1:]
+                self.assertEqual([(parameter.name, parameter.default) for parameter in parameters], expected)
+
+    def test_defaults_are_stored(self):
+        for cls, expected in SIGNATURES.items():
+            with self.subTest(widget=cls.__name__):
+                widget = cls(*REQUIRED_ARGUMENTS.get(cls, ()))
+                attrs = vars(widget)
+                for name, default in expected:
+                    if name in ('child', 'default') or default is REQUIRED:
+                        continue
+                    if default is None and name in ('children', 'classes', 'js'):
+                        self.assertEqual(attrs[name], [], name)
+                    elif name != 'style':
+                        self.assertEqual(attrs[name], default, name)
+                if cls is not Text:
+                    # Widget.__init__ stored the children first.
+                    self.assertEqual(list(attrs)[0], 'children')
+
+    def test_mutable_defaults_are_not_shared(self):
+        for cls in SIGNATURES:
+            with self.subTest(widget=cls.__name__):
+                first, second = (cls(*REQUIRED_ARGUMENTS.get(cls, ())) for _ in range(2))
+                self.assertIsNot(first.style, second.style)
+                if cls is not Text:
+                    self.assertIsNot(first.children, second.children)
+
+    def test_default_styles(self):
+        self.assertEqual(Button('Go').style['background-color'], '#2196f3')
+        self.assertEqual(Button('Go', style={'color': 'red'}).style['color'], 'red')
+        self.assertEqual(Button('Go', default=False, style={'color': 'red'}).style, {'color': 'red'})
+        self.assertEqual(Card(default_css=False).style, {})
+        self.assertEqual(Column(vertical='center').style['justify-content'], 'center')
+        self.assertEqual(Row(horizontal='space-between').style['justify-content'], 'space-between')
+        self.assertEqual(Text('a').style, {})
+
+    def test_field_checks(self):
+        with self.assertRaises(ValueError):
+            Button('Go', prefetch='hover')
+        with self.assertRaises(ValueError):
+            Card(prefetch='visible', route='/save')
+        Button('Go', prefetch='hover', route='/items', method='GET')
+
+    def test_text_does_not_load_prefetch(self):
+        code = "import sys; from butterflask import Text; Text('a'); print('butterflask.prefetch' in sys.modules)"
+        result = subprocess.run([sys.executable, '-c', code], cwd=ROOT, capture_output=True, text=True, check=True)
+        self.assertEqual(result.stdout.strip(), 'False')
+
+
+if __name__ == '__main__':
+    unittest.main()
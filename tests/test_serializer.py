@@ -0,0 +1,241 @@
+"""
+Round-trip tests of the JSON serializer: the payload decodes into the HTML
+render() produces, both with `to_html` and with RUNTIME_JS in Node.
+"""
+import json
+import os
+import shutil
+import subprocess
+import sys
+import unittest
+from html.parser import HTMLParser
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from butterflask.Widgets.Button import Button
+from butterflask.Widgets.Card import Card
+from butterflask.Widgets.Center import Center
+from butterflask.Widgets.Column import Column
+from butterflask.Widgets.Image import Image
+from butterflask.Widgets.Page import Page
+from butterflask.Widgets.Row import Row
+from butterflask.Widgets.Text import Text
+from butterflask.Widget import Widget
+from butterflask.document import render_with_js
+from butterflask.frozen import freeze
+from butterflask.markup import Markup
+from butterflask.serializer import RUNTIME_JS, dumps, to_data, to_html
+
+
+class Badge(Widget):
+    """
+    A widget the serializer has no encoder for, so its markup is parsed.
+    """
+
+    def __init__(self, label, children=None):
+        super().__init__(children)
+        self.label = label
+
+    def render(self):
+        return f'<mark title="{self.label}">{self.label}: {super().render()}</mark>'
+
+
+def build_trees():
+    js = [' ']
+    prefetch_js = [' ']
+    return {
+        'defaults': Page(children=[Column(children=[Text('Hello'), Button('Go'), Image('/static/a.png')])]),
+        'custom': Page(children=[
+            Row(horizontal='space-between', id='row', classes=['a', 'b'], children=[
+                Text('Styled', font_size='2rem', style={'color': '#333'}, id='title', classes='lead'),
+                Text('Overridden', style={'font-family': 'serif'}),
+                Image('/static/b.png', alt='A "quoted" <alt>', style={'border': '1px solid red'}, default=False),
+            ]),
+            Card(children=[Button('Plain', id='plain', default=False)]),
+        ]),
+        'escaped': Column(children=[
+            Text('<script>alert("x") & more</script>'),
+            Text(Markup('<b>bold</b> &amp; <i>markup</i>')),
+            Button('Tom & "Jerry"', on_click="alert('hi')"),
+        ]),
+        'ajax': Page(children=[Card(children=[
+            Button(f'Save {index}', id=f'save-{index}', js=js, route=f'/api/items/{index}',
+                   func_name=f'save{index}', on_click=f'save{index}(event)', on_success='console.log(response);')
+            for index in range(3)
+        ])]),
+        'prefetch': Row(children=[
+            Card(prefetch='hover', route='/cards/1', method='get', js=prefetch_js, children=[
+                Button('Open', prefetch='visible', route='/items/1', method='GET', js=prefetch_js, request_data='a=1'),
+                Image('/static/c.png', width=120, prefetch='hover', route='/images/c', method='GET', content_type='text/plain'),
+            ]),
+            Image('/static/d.png', width=64, id='d'),
+        ]),
+        'custom widget': Column(children=[Badge('new', children=[Text('Fresh')]), Widget([Text('bare')])]),
+        'nested': Center(Column(children=[Row(children=[Column(children=[Text(str(index))]) for index in range(4)])])),
+    }
+
+
+class _Events(HTMLParser):
+    """
+    Parses HTML into start, end and text events with decoded attribute values and text.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.events = []
+
+    def handle_starttag(self, tag, attrs):
+        self.events.append(('start', tag, tuple((name, value or '') for name, value in attrs)))
+
+    def handle_endtag(self, tag):
+        self.events.append(('end', tag))
+
+    def handle_data(self, data):
+        if self.events and self.events[-1][0] == 'text':
+            self.events[-1] = ('text', self.events[-1][1] + data)
+        else:
+            self.events.append(('text', data))
+
+
+def dom_events(html):
+    parser = _Events()
+    parser.feed(html)
+    parser.close()
+    return parser.events
+
+
+# A minimal DOM for RUNTIME_JS: elements serialize to HTML, and the textarea
+# used to decode attribute values understands the entities render() writes.
+_DOM_STUB = r"""
+var VOID = {area: 1, br: 1, col: 1, embed: 1, hr: 1, img: 1, input: 1, link: 1, meta: 1, source: 1, wbr: 1};
+var ENTITIES = {amp: '&', lt: '<', gt: '>', quot: '"', apos: "'"};
+
+function unescape(value) {
+    return value.replace(/&(#x[0-9a-f]+|#[0-9]+|[a-z]+);/gi, function(entity, name) {
+        if (name[0] === '#') {
+            return String.fromCodePoint(name[1] === 'x' || name[1] === 'X' ? parseInt(name.slice(2), 16) : parseInt(name.slice(1), 10));
+        }
+        return ENTITIES[name] !== undefined ? ENTITIES[name] : entity;
+    });
+}
+
+function escapeAttribute(value) {
+    return value.replace(/&/g, '&amp;').replace(/"/g, '&quot;').replace(/</g, '&lt;').replace(/>/g, '&gt;');
+}
+
+function Element(tag) {
+    this.tag = tag;
+    this.attributes = [];
+    this.children = [];
+    this.text = '';
+}
+Element.prototype.setAttribute = function(name, value) { this.attributes.push([name, String(value)]); };
+Element.prototype.appendChild = function(child) {
+    if (child.fragment) { this.children.push.apply(this.children, child.children); } else { this.children.push(child); }
+    return child;
+};
+Element.prototype.insertAdjacentHTML = function(position, html) {
+    if (position !== 'beforeend') { throw new Error('unsupported position ' + position); }
+    this.children.push(html);
+};
+Element.prototype.replaceChildren = function(child) { this.children = []; this.appendChild(child); };
+Object.defineProperty(Element.prototype, 'innerHTML', {set: function(html) { this.decoded = unescape(html); }});
+Object.defineProperty(Element.prototype, 'value', {get: function() { return this.decoded; }});
+Element.prototype.toHTML = function() {
+    if (this.fragment) { return this.children.map(serialize).join(''); }
+    var attributes = this.attributes.map(function(pair) { return ' ' + pair[0] + '="' + escapeAttribute(pair[1]) + '"'; });
+    var open = '<' + this.tag + attributes.join('') + '>';
+    return VOID[this.tag] ? open : open + this.children.map(serialize).join('') + '</' + this.tag + '>';
+};
+
+function serialize(child) { return typeof child === 'string' ? child : child.toHTML(); }
+
+var head = new Element('head');
+globalThis.window = globalThis;
+globalThis.document = {
+    head: head,
+    createElement: function(tag) { return new Element(tag); },
+    createDocumentFragment: function() { var fragment = new Element(''); fragment.fragment = true; return fragment; },
+};
+"""
+
+_MOUNT = r"""
+var target = new Element('div');
+target.fragment = true;
+window.butterflask.mount(target, JSON.parse(require('fs').readFileSync(0, 'utf8')));
+process.stdout.write(JSON.stringify({
+    html: target.toHTML(),
+    scripts: head.children.map(function(script) { return script.text; }),
+}));
+"""
+
+
+class RoundTripTest(unittest.TestCase):
+    def test_to_html_matches_render(self):
+        for name, tree in build_trees().items():
+            with self.subTest(tree=name):
+                html, js = render_with_js(tree)
+                payload = json.loads(dumps(tree))
+                self.assertEqual(to_html(payload), html)
+                self.assertEqual(payload['js'], js)
+
+    def test_frozen_trees_encode_like_mutable_ones(self):
+        for name, tree in build_trees().items():
+            with self.subTest(tree=name):
+                self.assertEqual(to_data(freeze(tree)), to_data(tree))
+
+    def test_default_attributes_are_omitted(self):
+        payload = to_data(Column(children=[Text('a'), Text('b', style={'color': 'red'}), Text('c', id='c')]))
+        shapes = payload['shapes']
+        column, (first, second, third) = payload['nodes'][0][:2], payload['nodes'][0][2:]
+        self.assertEqual(column[1], [])
+        self.assertEqual(first[1], [])
+        self.assertEqual(second[1], [0, 0, 1])
+        self.assertEqual(third[1], ['c'])
+        self.assertEqual(shapes[first[0]][1], ['id', 'class', 'style'])
+        self.assertTrue(shapes[first[0]][3][2].startswith('font-size:1.0rem;'))
+        self.assertNotIn(shapes[first[0]][3][2], payload['styles'])
+
+    def test_empty_value_with_non_empty_default(self):
+        tree = Column(children=[Image('/static/a.png', default=False)])
+        payload = to_data(tree)
+        self.assertIn('', payload['nodes'][0][2][1])
+        self.assertEqual(to_html(payload), tree.render())
+
+    def test_lazy_pages_are_rejected(self):
+        with self.assertRaises(TypeError):
+            dumps(Column(children=[Page(lazy=True, children=[Text('later')])]))
+
+    def test_unsupported_version(self):
+        payload = to_data(Text('a'))
+        payload['v'] = 1
+        with self.assertRaises(ValueError):
+            to_html(payload)
+
+
+@unittest.skipIf(shutil.which('node') is None, 'node is not installed')
+class RuntimeTest(unittest.TestCase):
+    def mount(self, payload):
+        result = subprocess.run(
+            ['node', '-e', _DOM_STUB + RUNTIME_JS + _MOUNT], input=payload, capture_output=True,
+            text=True, encoding='utf-8', timeout=30, check=True
+        )
+        return json.loads(result.stdout)
+
+    def test_runtime_builds_the_rendered_dom(self):
+        for name, tree in build_trees().items():
+            with self.subTest(tree=name):
+                html, js = render_with_js(tree)
+                mounted = self.mount(dumps(tree))
+                self.assertEqual(dom_events(mounted['html']), dom_events(html))
+                self.assertEqual(mounted['scripts'], ['\n'.join(js)] if js else [])
+
+    def test_runtime_rejects_other_versions(self):
+        payload = to_data(Text('a'))
+        payload['v'] = 1
+        with self.assertRaises(subprocess.CalledProcessError):
+            self.mount(json.dumps(payload))
+
+
+if __name__ == '__main__':
+    unittest.main()